@@ -0,0 +1,204 @@
+# -*- mode: Python; -*-
+
+'''On-disk cache of the results of a deterministic external annotator
+for each sentence, so that a repeated sentence (boilerplate, quoted
+posts, signatures) need not be sent to the annotator again.
+
+An entry is keyed by a digest of the context (the tool, its options,
+the annotator command) and the bytes that the tool would send to the
+annotator for the sentence. The value is whatever the tool reads for
+the sentence, pickled.
+
+The entries are in an SQLite database in the cache directory, which
+can be shared by several processes. Least recently used entries are
+evicted when the total size of the values exceeds a given limit.
+
+'''
+
+from hashlib import sha256
+import os, pickle, sqlite3, threading, time
+
+from libvrt.bad import BadData
+
+FILE = 'cache.sqlite'
+
+# dests of options that do not affect what the annotator produces:
+# the file options of libvrt.args, and whatever the functions that add
+# options register with driver
+DRIVER = set(('infile', 'outfile', 'inplace', 'backup', 'sibling'))
+
+def driver(*dests):
+    '''Register the dests of options that do not affect what the
+    annotator produces, so they are not in the context of the cache.
+
+    '''
+    DRIVER.update(dests)
+
+def add_cache(parser):
+    '''Add --cache and --cache-size options to parser.'''
+    driver('cache', 'cache_size')
+    parser.add_argument('--cache', metavar = 'dir',
+                        help = '''
+
+                        answer sentences from an on-disk cache in the
+                        directory when they are there, and store new
+                        results there (the cache is only valid for a
+                        deterministic annotator)
+
+                        ''')
+    parser.add_argument('--cache-size', metavar = 'MB',
+                        type = int, default = 1024,
+                        help = '''
+
+                        evict least recently used entries when the
+                        cache is larger than this (1024)
+
+                        ''')
+
+def context(args, *command):
+    '''Return the context (bytes) of a cache key from the tool and its
+    options in args, other than the options in DRIVER, and from the
+    annotator command, when known.
+
+    '''
+    options = sorted((name, repr(value))
+                     for name, value in vars(args).items()
+                     if name not in DRIVER)
+    return repr((options, command)).encode('UTF-8')
+
+class Cache:
+    '''Sentence results by key. Reads and writes are batched in
+    transactions, so call close when done.
+
+    '''
+
+    def __init__(self, directory, context, *, size = 1024, batch = 1000):
+        try:
+            os.makedirs(directory, exist_ok = True)
+            self._db = sqlite3.connect(os.path.join(directory, FILE),
+                                       timeout = 60,
+                                       check_same_thread = False)
+            self._db.executescript('''
+            create table if not exists entry (
+              key blob primary key,
+              value blob not null,
+              size integer not null,
+              used integer not null
+            ) without rowid;
+            create index if not exists entry_used on entry (used);
+            ''')
+            self.total, = self._db.execute('select coalesce(sum(size), 0)'
+                                           ' from entry').fetchone()
+        except (OSError, sqlite3.Error) as exn:
+            raise BadData('cannot open cache: {}: {}'.format(directory, exn))
+
+        self._context = sha256(context).digest()
+        self._limit = size << 20
+        self._batch = batch
+        self._lock = threading.Lock()
+        self._new = {}
+        self._used = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+    def key(self, sent):
+        '''Return the key (bytes) of the sentence as sent (bytes).'''
+        return sha256(self._context + sent).digest()
+
+    def get(self, key):
+        '''Return the cached value for key, or None.'''
+        with self._lock:
+            if key in self._new:
+                value = self._new[key]
+            else:
+                row = self._db.execute('select value from entry where key = ?',
+                                       (key,)).fetchone()
+                value = None if row is None else row[0]
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._used.add(key)
+            if len(self._used) >= self._batch:
+                self._flush()
+
+        return pickle.loads(value)
+
+    def put(self, key, value):
+        '''Store value for key.'''
+        data = pickle.dumps(value, protocol = pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._new[key] = data
+            if len(self._new) >= self._batch:
+                self._flush()
+
+    def close(self):
+        '''Write out what is pending, evict if over the size limit.'''
+        with self._lock:
+            self._flush()
+            self._evict()
+            self._db.close()
+
+    def report(self):
+        '''Return statistics as a line of text.'''
+        asked = self.hits + self.misses
+        return ('cache: {} hits, {} misses ({:.1f}% hits),'
+                ' {} stored, {} evicted, {:.1f} MB'
+                .format(self.hits, self.misses,
+                        100 * self.hits / asked if asked else 0,
+                        self.stored, self.evicted,
+                        self.total / (1 << 20)))
+
+    def _flush(self):
+        now = time.time_ns()
+        with self._db:
+            # the sizes of the entries that are replaced
+            replaced = sum(size
+                           for key in self._new
+                           for size, in self._db.execute(
+                                   'select size from entry where key = ?',
+                                   (key,)))
+            self._db.executemany('insert or replace into entry'
+                                 ' values (?, ?, ?, ?)',
+                                 ( (key, data, len(data), now)
+                                   for key, data in self._new.items() ))
+            self._db.executemany('update entry set used = ? where key = ?',
+                                 ( (now, key) for key in self._used ))
+
+        self.stored += len(self._new)
+        self.total += sum(map(len, self._new.values())) - replaced
+        self._new.clear()
+        self._used.clear()
+
+        if self.total > self._limit:
+            self._evict()
+
+    def _evict(self):
+        # down to nine tenths of the limit, so as not to evict at
+        # every flush once full
+        if self.total <= self._limit: return
+
+        self.total, = self._db.execute('select coalesce(sum(size), 0)'
+                                       ' from entry').fetchone()
+        excess = self.total - self._limit * 9 // 10
+        if excess <= 0: return
+
+        # entries flushed together were used at the same time, so
+        # delete exactly the entries counted
+        freed, keys = 0, []
+        for key, size in self._db.execute('select key, size from entry'
+                                          ' order by used'):
+            freed += size
+            keys.append((key,))
+            if freed >= excess: break
+
+        with self._db:
+            self._db.executemany('delete from entry where key = ?', keys)
+
+        self.evicted += len(keys)
+        self.total -= freed
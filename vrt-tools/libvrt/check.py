@@ -1,43 +1,251 @@
 # Support for various check tools,
-# to provide uniform output format.
+# to provide uniform output format,
+# and to run several checks in one pass.
 
-import sys
+import re
 
-_binary = None
-_output_stream = None
+class Report:
+    '''Messages of a check to an output stream, a line of line number,
+    level, kind and what for each, after a head line (unless head is
+    false, when continuing a report), in binary or in text.
+
+    '''
+
+    def __init__(self, ous, *, binary, head = True):
+        self._ous = ous
+        self._binary = binary
+        if not head:
+            pass
+        elif binary:
+            ous.write(b'\t'.join((b'line', b'level', b'kind', b'what')))
+            ous.write(b'\n')
+        else:
+            print('line', 'level', 'kind', 'what',
+                  sep = '\t',
+                  file = ous)
+
+    def _message(self, k, level, kind, what):
+        if self._binary:
+            self._ous.write(b'\t'.join((str(k).encode('UTF-8'),
+                                        level.encode('UTF-8'),
+                                        kind, what)))
+            self._ous.write(b'\n')
+        else:
+            print(k, level, kind, what, sep = '\t',
+                  file = self._ous)
+
+    def error(self, k, kind, what):
+        self._message(k, 'error', kind, what)
+
+    def warn(self, k, kind, what):
+        self._message(k, 'warning', kind, what)
+
+    def info(self, k, kind, what):
+        self._message(k, 'info', kind, what)
+
+_report = None
 
 def setup_binary(ous):
-    global _binary, _output_stream
-    _binary = True
-    _output_stream = ous
-    ous.write(b'\t'.join((b'line', b'level', b'kind', b'what')))
-    ous.write(b'\n')
+    global _report
+    _report = Report(ous, binary = True)
 
 def setup_text(ous):
-    global _binary, _output_stream
-    _binary = False
-    _output_stream = ous
-    print('line', 'level', 'kind', 'what',
-          sep = '\t',
-          file = ous)
-
-def _message(k, level, kind, what):
-    if _output_stream is None:
-        raise Exception('libvrt.check: output stream not set')
+    global _report
+    _report = Report(ous, binary = False)
 
-    if _binary:
-        _output_stream.write(b'\t'.join((str(k).encode('UTF-8'),
-                                         level, kind, what)))
-        _output_stream.write(b'\n')
-    else:
-        print(k, level, kind, what, sep = '\t',
-              file = _output_stream)
+def _current():
+    if _report is None:
+        raise Exception('libvrt.check: output stream not set')
+    return _report
 
 def error(k, kind, what):
-    _message(k, (b'error' if _binary else 'error'), kind, what)
+    _current().error(k, kind, what)
 
 def warn(k, kind, what):
-    _message(k, (b'warning' if _binary else 'warning'), kind, what)
+    _current().warn(k, kind, what)
 
 def info(k, kind, what):
-    _message(k, (b'info' if _binary else 'info'), kind, what)
+    _current().info(k, kind, what)
+
+# lines are read in blocks of about this many bytes (or characters),
+# and a block that has some of the characters that the checks look
+# for is scanned again in parts of this many lines
+BLOCK = 1 << 16
+PART = 32
+
+class Scanner:
+    '''Finds the characters (chars) of all the checks in a block of
+    lines at once, so that a block without any can be skipped.
+
+    A check has chars, a compiled pattern, when it only reports on
+    lines where the pattern is found, as when looking for characters
+    of a class. The ASCII bytes that are none of the characters are
+    deleted from a block in UTF-8 before the block is decoded and
+    scanned; what remains is still valid UTF-8 (as no byte of a
+    multibyte character is ASCII) and usually short.
+
+    '''
+
+    def __init__(self, checks):
+        self.chars = re.compile('|'.join(check.chars.pattern
+                                         for check in checks))
+        self.ascii = bytes(b for b in range(128)
+                           if not self.chars.search(chr(b)))
+
+    @classmethod
+    def of(cls, checks):
+        '''Return a scanner for the checks, or None if some check has
+        no chars and needs every line.
+
+        '''
+        if all(hasattr(check, 'chars') for check in checks):
+            return cls(checks)
+        return None
+
+    def search(self, line):
+        return self.chars.search(line)
+
+    def parts(self, lines):
+        '''Yield (clean, part) for the lines (str, or bytes in UTF-8) in
+        parts that are either clean or to be checked line by line.
+
+        '''
+        if self.clean(lines):
+            yield True, lines
+            return
+        for j in range(0, len(lines), PART):
+            part = lines[j:j + PART]
+            yield self.clean(part), part
+
+    def clean(self, lines):
+        '''Whether the lines (str, or bytes in UTF-8) surely have none
+        of the characters, and no CR (that would split lines).
+
+        '''
+        block = (''.join(lines).encode('UTF-8', 'surrogatepass')
+                 if isinstance(lines[0], str) else
+                 b''.join(lines))
+        if b'\r' in block:
+            return False
+        try:
+            rest = block.translate(None, self.ascii).decode('UTF-8')
+        except UnicodeDecodeError:
+            return False
+        return not self.chars.search(rest)
+
+def check_each(ins, check):
+    '''Run the check over the lines of the input stream ins as they
+    are (bytes or str), numbered from 1. A check with chars (see
+    Scanner) reads str.
+
+    '''
+    scanner = Scanner.of((check,))
+    k = 0
+    while True:
+        lines = ins.readlines(BLOCK)
+        if not lines: break
+        for clean, part in (scanner.parts(lines) if scanner else
+                            ((False, lines),)):
+            if clean:
+                k += len(part)
+                continue
+            for k, line in enumerate(part, start = k + 1):
+                if scanner is not None and not scanner.search(line):
+                    continue
+                if check.line(k, line):
+                    return
+    check.end()
+
+def check_lines(ins, checks, *, state = None, checkpoint = None):
+    '''Run the checks over the lines of the binary input stream ins in
+    one pass, reading and decoding each line only once.
+
+    A check has an attribute text, whether it checks lines decoded as
+    UTF-8 (and numbered and split at any CR as when read in text mode)
+    or lines as bytes, a method line(k, line) that checks line k and
+    returns true when the check is to stop, and a method end() that is
+    called at the end of input if the check did not stop. Lines that
+    do not decode are left to the byte checks. When the text checks
+    have chars (see Scanner), blocks of lines without any of their
+    characters are skipped.
+
+    After each block of lines, checkpoint (if given) is called with a
+    function that returns the state of the checks: the position in
+    ins, the line numbers, the indices of the checks that have
+    stopped, and the attributes of each check other than args and
+    report. The checks resume from such a state when given one.
+
+    '''
+    binary = [ check for check in checks if not check.text ]
+    textual = [ check for check in checks if check.text ]
+    k = 0 # line number
+    t = 0 # line number in text mode
+    if state is not None:
+        ins.seek(state['position'])
+        k, t = state['k'], state['t']
+        for check, attributes in zip(checks, state['checks']):
+            vars(check).update(attributes)
+        for j in state['stopped']:
+            (textual if checks[j].text else binary).remove(checks[j])
+    scanner = Scanner.of(textual)
+    while binary or textual:
+        lines = ins.readlines(BLOCK)
+        if not lines: break
+
+        for check in tuple(binary):
+            for n, line in enumerate(lines, start = k + 1):
+                if check.line(n, line):
+                    binary.remove(check)
+                    break
+        k += len(lines)
+
+        if not textual: continue
+
+        for clean, part in (scanner.parts(lines) if scanner else
+                            ((False, lines),)):
+            if clean:
+                t += len(part)
+                continue
+            for line in part:
+                try:
+                    text = line.decode('UTF-8')
+                except UnicodeDecodeError:
+                    t += 1
+                    continue
+                for text in _textlines(text):
+                    t += 1
+                    if scanner is not None and not scanner.search(text):
+                        continue
+                    stopped = [ check for check in textual
+                                if check.line(t, text) ]
+                    for check in stopped:
+                        textual.remove(check)
+                    if stopped:
+                        scanner = Scanner.of(textual)
+
+        if checkpoint is not None:
+            checkpoint(lambda: dict(
+                position = ins.tell(),
+                k = k,
+                t = t,
+                stopped = [ j for j, check in enumerate(checks)
+                            if check not in binary
+                            if check not in textual ],
+                checks = [ { name : value
+                             for name, value in vars(check).items()
+                             if name not in ('args', 'report') }
+                           for check in checks ]))
+
+    for check in (*binary, *textual):
+        check.end()
+
+def _textlines(text):
+    '''Split text (a line) to lines as when read in text mode, where
+    CR LF and a lone CR are also line terminators read as LF.
+
+    '''
+    if '\r' not in text:
+        return (text,)
+    lines = re.sub('\r\n?', '\n', text).split('\n')
+    last = lines.pop()
+    return ( *(line + '\n' for line in lines), *((last,) if last else ()) )
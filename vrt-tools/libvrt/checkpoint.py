@@ -0,0 +1,145 @@
+'''Checkpoints of a tool that reads a long input file, saved now and
+then in a sidecar file, so that a run that dies or is killed (say, at
+the time limit of a batch job) can be resumed from the last
+checkpoint instead of from the beginning.
+
+A checkpoint is the state of the tool at a line boundary, pickled,
+with the position in the input and the sizes of the output files
+(flushed) at that point: to resume, the tool seeks to the position,
+truncates its outputs to the sizes (dropping what was written after
+the checkpoint) and appends to them. The sidecar also records the
+size and modification time of the input file and a key of the tool
+(its name and the options that affect its state or its output), and
+a checkpoint is not resumed from if they differ.
+
+checkpoint = Checkpoint(path, infile, key, every = 600)
+state = checkpoint.load() # or None
+...
+    if checkpoint.due():
+        checkpoint.save(state)
+...
+checkpoint.remove()
+
+'''
+
+import os, pickle, time
+
+from libvrt.bad import BadData
+
+HEAD = b'VRT checkpoint 1\n'
+
+class Checkpoint:
+    '''The sidecar file at path of the checkpoints of reading infile,
+    saved when due every so many seconds (or never if every is None).
+
+    '''
+
+    def __init__(self, path, infile, key, *, every = None):
+        self.path = path
+        self.infile = infile
+        self.key = key
+        self.every = every
+        self.last = time.monotonic()
+
+    def _identity(self):
+        stat = os.stat(self.infile)
+        return (stat.st_size, stat.st_mtime_ns, self.key)
+
+    def due(self):
+        return (self.every is not None and
+                time.monotonic() - self.last >= self.every)
+
+    def save(self, state):
+        '''Replace the checkpoint in the sidecar file with state.'''
+        temp = self.path + '.tmp'
+        with open(temp, mode = 'wb') as out:
+            out.write(HEAD)
+            pickle.dump((self._identity(), state), out,
+                        protocol = pickle.HIGHEST_PROTOCOL)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp, self.path)
+        self.last = time.monotonic()
+
+    def load(self):
+        '''Return the state in the sidecar file, or None if there is no
+        sidecar file.
+
+        '''
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, mode = 'rb') as ins:
+            if ins.readline() != HEAD:
+                raise BadData('not a checkpoint file: ' + self.path)
+            identity, state = pickle.load(ins)
+        if identity != self._identity():
+            raise BadData('checkpoint not of this input file or these'
+                          ' options: ' + self.path)
+        return state
+
+    def remove(self):
+        '''Remove the sidecar file when the work is done.'''
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def flushed(*streams):
+    '''Flush the output streams (files) and return their sizes.'''
+    sizes = []
+    for ous in streams:
+        ous.flush()
+        sizes.append(os.fstat(ous.fileno()).st_size)
+    return sizes
+
+def truncate(path, size):
+    '''Truncate the output file at path to its size at a checkpoint.'''
+    with open(path, mode = 'r+b') as out:
+        out.truncate(size)
+
+class Reading:
+    '''The reading of a text input stream in one stage of the work of
+    a tool (as one of the statistics of hrt-stat), with checkpoints
+    between any two items that the tool makes of the lines: the state
+    is the position and the number of lines read, values given when a
+    checkpoint is due (at), and objects kept by reference (keep) that
+    the tool updates.
+
+    '''
+
+    def __init__(self, checkpoint, stage, state = None):
+        self.checkpoint = checkpoint
+        self.stage = stage
+        self.state = state or dict()
+        self.kept = dict()
+        self.ins = None
+        self.k = 0
+
+    def resumed(self, name, default):
+        '''Return the value of name when resumed, else default.'''
+        return self.state.get(name, default)
+
+    def keep(self, **kept):
+        self.kept.update(kept)
+
+    def lines(self, ins):
+        '''Yield the numbered lines of the text stream ins, from the
+        position when resumed. (The lines are read with readline so
+        that the position can be told.)
+
+        '''
+        self.ins = ins
+        if 'position' in self.state:
+            ins.seek(self.state['position'])
+            self.k = self.state['k']
+        for line in iter(ins.readline, ''):
+            self.k += 1
+            yield self.k, line
+
+    def at(self, **values):
+        '''Save a checkpoint with the values if one is due.'''
+        if self.checkpoint.due():
+            self.checkpoint.save(dict(stage = self.stage,
+                                      state = dict(self.kept,
+                                                   **values,
+                                                   position =
+                                                   self.ins.tell(),
+                                                   k = self.k)))
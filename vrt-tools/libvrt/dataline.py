@@ -4,13 +4,83 @@ Warning: this is not a validator.
 
 '''
 
+from libvrt.bad import BadData
+
 from itertools import chain
+from operator import itemgetter
 import re
 import sys
 
 def record(line):
     return line.rstrip(b'\r\n').split(b'\t')
 
+def picker(*ix):
+    '''Return a function that makes a token line (with a newline) of
+    the fields of a token line at positions ix, splitting the line
+    only as far as the last of them, so that the fields after it are
+    not made into objects at all. The same as
+
+        b'\\t'.join(keeper(*ix)(record(line))) + b'\\n'
+
+    only without the unwanted work. Raise BadData if the line has
+    too few fields.
+
+    '''
+
+    if not ix:
+        return lambda line: b'\n'
+
+    n = max(ix) + 1
+    if ix == tuple(range(n)):
+        def get(fields): return fields[:n]
+    elif len(ix) == 1:
+        k, = ix
+        def get(fields): return (fields[k],)
+    else:
+        get = itemgetter(*ix)
+
+    def pick(line):
+        fields = line.split(b'\t', n)
+        if len(fields) <= n:
+            if len(fields) < n:
+                raise BadData('too few fields: {} < {}'
+                              .format(len(fields), n))
+            fields[-1] = fields[-1].rstrip(b'\r\n')
+        return b'\t'.join(get(fields)) + b'\n'
+
+    return pick
+
+def resetter(ix, value):
+    '''Return a function that replaces the fields at positions ix of a
+    token line with value, splitting the line only as far as the last
+    of them. The same as setting each field of record(line) and
+    joining the fields back into a line. Raise BadData if the line has
+    too few fields.
+
+    '''
+
+    if not ix:
+        return lambda line: line.rstrip(b'\r\n') + b'\n'
+
+    n = max(ix) + 1
+
+    def reset(line):
+        fields = line.split(b'\t', n)
+        if len(fields) < n:
+            raise BadData('too few fields: {} < {}'
+                          .format(len(fields), n))
+        rest = fields[-1]
+        if (len(fields) > n and
+            rest.endswith(b'\n') and not rest.endswith(b'\r\n')):
+            # the rest of the line is shipped as it is
+            for k in ix: fields[k] = value
+            return b'\t'.join(fields)
+        fields[-1] = rest.rstrip(b'\r\n')
+        for k in ix: fields[k] = value
+        return b'\t'.join(fields) + b'\n'
+
+    return reset
+
 def valuegetter(head, *,
                 missing, # missing value mark (safe bytes)
                 warn = True,
@@ -0,0 +1,408 @@
+'''External merge sort: sort more items than fit in memory, stably,
+in runs that fit in a memory budget, spilling each sorted run to a
+temporary file and merging the runs in a heap. Also typed sort keys
+for attribute values (bytes), named by the ordering option letters of
+the GNU sort command, but the same in every locale. And an external
+shuffle, for items that need not fit in memory.
+
+for key, value in sort(pairs, memory = 256):
+    ...
+
+items = Shuffle(random.shuffle, random.random, memory = 256)
+for item in ...: items.append(item)
+for item in items:
+    ...
+
+'''
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from hashlib import sha1
+from heapq import merge
+from itertools import islice
+from multiprocessing import Pool
+from operator import itemgetter
+from tempfile import mkstemp
+import locale, math, os, pickle, re
+
+# runs merged at a time, to stay within the open file limit
+FANIN = 128
+
+# pairs pickled at a time in a run file
+CHUNK = 1024
+
+# key options: b (ignore leading blanks), d (dictionary order), f
+# (ignore case), i (ignore nonprinting) change the value, g (general
+# numeric), h (human numeric), M (month), n (numeric), R (random), V
+# (version), D (date), L (locale collation) choose the type of key, r
+# reverses the order
+OPTIONS = frozenset('bdfiMghnRVDLr')
+
+def sort(pairs, *, memory = 256, tempdir = None, workers = 1,
+         size = None):
+    '''Yield (key, value) pairs (picklable) in the order of their keys,
+    stably. Keep in memory about as many pairs as fit in the memory
+    budget (MB, estimated by size(pair), by default from the lengths
+    of bytes in the value), spill each sorted run to a temporary file
+    in tempdir, and merge the runs at the end. With more workers, sort
+    and spill the runs in other processes while reading on, with at
+    most that many runs in the making.
+
+    '''
+
+    size = size or _size
+    budget = memory << 20
+
+    pool = Pool(workers) if workers > 1 else None
+
+    # runs are the paths of the spilled runs, or the results of the
+    # pool that will be the paths, and temps are all the files made,
+    # to be removed at the end however it comes
+    runs, temps = [], []
+    def spilled(each):
+        if not isinstance(each, str):
+            each = each.get()
+            temps.append(each)
+        return each
+
+    try:
+        run, used = [], 0
+        for pair in pairs:
+            run.append(pair)
+            used += size(pair)
+            if used >= budget:
+                if pool is None:
+                    runs.append(_spill(run, tempdir))
+                    temps.append(runs[-1])
+                else:
+                    runs.append(pool.apply_async(_spill, (run, tempdir)))
+                run, used = [], 0
+                if len(runs) > workers > 1:
+                    runs[-workers - 1] = spilled(runs[-workers - 1])
+
+        paths = list(map(spilled, runs))
+        if pool is not None:
+            pool.close()
+
+        run.sort(key = itemgetter(0))
+        if not paths:
+            yield from run
+            return
+
+        while len(paths) + 1 > FANIN:
+            staged = []
+            for k in range(0, len(paths), FANIN):
+                staged.append(_spill(_merged(paths[k:k + FANIN]), tempdir,
+                                     presorted = True,
+                                     remove = paths[k:k + FANIN]))
+                temps.append(staged[-1])
+            paths = staged
+
+        yield from merge(*map(_read, paths), iter(run),
+                         key = itemgetter(0))
+    finally:
+        for each in runs:
+            try:
+                # a run in the making may yet make a file
+                spilled(each)
+            except Exception:
+                pass
+        if pool is not None:
+            pool.terminate()
+        for path in temps:
+            if os.path.exists(path):
+                os.remove(path)
+
+def _size(pair):
+    key, value = pair
+    return 200 + sum(len(part) for part in ((value,)
+                                            if isinstance(value, bytes)
+                                            else value)
+                     if isinstance(part, bytes))
+
+def _spill(run, tempdir, *, presorted = False, remove = ()):
+    '''Write the run (pairs), sorted by key unless presorted, to a new
+    temporary file in chunks of pickled lists, remove the files in
+    remove, and return the path.
+
+    '''
+    if not presorted:
+        run.sort(key = itemgetter(0))
+    fd, path = mkstemp(dir = tempdir, prefix = 'run-', suffix = '.tmp')
+    try:
+        with open(fd, mode = 'wb') as out:
+            run = iter(run)
+            while True:
+                chunk = list(islice(run, CHUNK))
+                if not chunk: break
+                pickle.dump(chunk, out, protocol = pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(path)
+        raise
+    for each in remove:
+        os.remove(each)
+    return path
+
+def _read(path):
+    '''Yield the pairs in the run file at path.'''
+    with open(path, mode = 'rb') as ins:
+        while True:
+            try:
+                chunk = pickle.load(ins)
+            except EOFError:
+                return
+            yield from chunk
+
+def _merged(paths):
+    return merge(*map(_read, paths), key = itemgetter(0))
+
+class Shuffle:
+    '''Collect items (picklable) and yield them in a random order: as
+    shuffled by shuffle (in place) while they fit in the memory budget
+    (MB, estimated by size(item), by default from the lengths of bytes
+    in the item), else spill each shuffled run to a temporary file in
+    tempdir and interleave the runs at random, at most FANIN at a time,
+    drawing the next item from each run in proportion to the items
+    left in it (random() returns a float in [0, 1)). The result is a uniformly random order
+    either way, and the same for the same random state.
+
+    The last item appended stays in memory until the next is appended
+    (so it can be extended), and the items can be iterated only once.
+
+    '''
+
+    def __init__(self, shuffle, random, *, memory = 256, tempdir = None,
+                 size = None):
+        self._shuffle = shuffle
+        self._random = random
+        self._budget = memory << 20
+        self._tempdir = tempdir
+        self._size = size or _itemsize
+        self._run, self._used = [], 0
+        self._runs = [] # (path, count)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, item):
+        if self._run and self._used >= self._budget:
+            self._shuffle(self._run)
+            self._runs.append((_spill(self._run, self._tempdir,
+                                      presorted = True),
+                               len(self._run)))
+            self._run, self._used = [], 0
+        self._run.append(item)
+        self._used += self._size(item)
+        self._count += 1
+
+    def last(self):
+        '''Return the last item appended.'''
+        return self._run[-1]
+
+    def __iter__(self):
+        self._shuffle(self._run)
+        if not self._runs:
+            yield from self._run
+            return
+
+        # every file made, to be removed at the end however it comes
+        temps = [ path for path, count in self._runs ]
+        try:
+            while len(self._runs) + 1 > FANIN:
+                # interleave the runs in stages, FANIN at a time, to
+                # stay within the open file limit
+                staged = []
+                for k in range(0, len(self._runs), FANIN):
+                    paths, counts = zip(*self._runs[k:k + FANIN])
+                    items = _interleaved(list(map(_read, paths)), counts,
+                                         self._random)
+                    staged.append((_spill(items, self._tempdir,
+                                          presorted = True,
+                                          remove = paths),
+                                   sum(counts)))
+                    temps.append(staged[-1][0])
+                self._runs = staged
+
+            yield from _interleaved(
+                [ *( _read(path) for path, count in self._runs ),
+                  iter(self._run) ],
+                [ *( count for path, count in self._runs ),
+                  len(self._run) ],
+                self._random)
+        finally:
+            for path in temps:
+                if os.path.exists(path):
+                    os.remove(path)
+
+def _interleaved(sources, counts, random):
+    '''Yield the items of the sources (iterators of as many items as in
+    counts) at random, drawing the next item from each in proportion
+    to the items left in it, so that shuffled sources make a shuffled
+    whole.
+
+    '''
+    counts = list(counts)
+    left = sum(counts)
+    while left:
+        k = math.floor(random() * left)
+        for source, count in enumerate(counts):
+            if k < count: break
+            k -= count
+        yield next(sources[source])
+        counts[source] -= 1
+        left -= 1
+
+def _itemsize(item):
+    return 64 + sum(64 + len(part) for part in ((item,)
+                                                if isinstance(item, bytes)
+                                                else item)
+                    if isinstance(part, bytes))
+
+def keyfunc(options):
+    '''Return a function from an attribute value (bytes) to a sort key
+    for the ordering options (str of letters in OPTIONS). Raise
+    ValueError for an unknown option or a conflict.
+
+    '''
+
+    unknown = set(options) - OPTIONS
+    if unknown:
+        raise ValueError('unknown option: {}'
+                         .format(''.join(sorted(unknown))))
+    types = [ letter for letter in options if letter in 'ghMnRVDL' ]
+    if len(set(types)) > 1:
+        raise ValueError('options are incompatible: {}'
+                         .format(''.join(sorted(set(types)))))
+
+    edits = []
+    if 'b' in options: edits.append(str.lstrip)
+    if 'd' in options: edits.append(_dictionary)
+    if 'i' in options: edits.append(_printable)
+    if 'f' in options: edits.append(str.upper)
+
+    typed = _TYPES[types[0]] if types else None
+    if types == ['L']:
+        locale.setlocale(locale.LC_COLLATE, '')
+    if types == ['R']:
+        salt = os.urandom(16)
+        def typed(value):
+            # equal values together, in a random order
+            return sha1(salt + value.encode('UTF-8',
+                                            'surrogateescape')).digest()
+
+    reverse = 'r' in options
+
+    def key(value):
+        value = value.decode('UTF-8', 'surrogateescape')
+        for edit in edits:
+            value = edit(value)
+        if typed is not None:
+            value = typed(value)
+        return Reversed(value) if reverse else value
+
+    return key
+
+class Reversed:
+    '''Wrap a key to compare in reverse order.'''
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __repr__(self):
+        return 'Reversed({!r})'.format(self.key)
+
+def _dictionary(value):
+    return ''.join(char for char in value
+                   if char.isalnum() or char in ' \t')
+
+def _printable(value):
+    return ''.join(char for char in value if char.isprintable())
+
+_NUMBER = re.compile(r'\s*(-?[0-9]*(?:\.[0-9]*)?)')
+
+def _numeric(value):
+    # leading number or 0, as sort -n
+    number = _NUMBER.match(value).group(1)
+    try:
+        return Decimal(number)
+    except InvalidOperation:
+        return Decimal(0)
+
+def _general(value):
+    # non-numbers, then NaN, then numbers, as sort -g
+    try:
+        number = float(value)
+    except ValueError:
+        return (0, 0.0)
+    if math.isnan(number):
+        return (1, 0.0)
+    return (2, number)
+
+_HUMAN = re.compile(r'\s*(-?)([0-9]*(?:\.[0-9]*)?)([kKMGTPEZYRQ]?)')
+
+def _human(value):
+    # sign, then suffix, then number, as sort -h
+    sign, number, suffix = _HUMAN.match(value).groups()
+    try:
+        number = Decimal(number)
+    except InvalidOperation:
+        number = Decimal(0)
+    if number == 0:
+        return (0, 0, Decimal(0))
+    order = ' KMGTPEZYRQ'.index(suffix.upper() or ' ')
+    return ((-1, -order, -number)
+            if sign else
+            (1, order, number))
+
+_MONTHS = { month : k for k, month in
+            enumerate('JAN FEB MAR APR MAY JUN JUL AUG SEP OCT NOV DEC'
+                      .split(), start = 1) }
+
+def _month(value):
+    return _MONTHS.get(value.lstrip()[:3].upper(), 0)
+
+_DIGITS = re.compile(r'([0-9]+)')
+
+def _version(value):
+    # digit runs compare as numbers
+    parts = _DIGITS.split(value)
+    return tuple((int(part), part) if k % 2 else part
+                 for k, part in enumerate(parts))
+
+_ISODATE = re.compile(r'\s*(\d{4})(?:-?(\d\d)(?:-?(\d\d))?)?(.*)')
+_DOTDATE = re.compile(r'\s*(\d{1,2})\.(\d{1,2})\.(\d{4})(.*)')
+
+def _date(value):
+    # YYYY, YYYY-MM, YYYY-MM-DD (or YYYYMMDD) or D.M.YYYY, with any
+    # time after the date compared as text; others before dates
+    match = _DOTDATE.fullmatch(value)
+    if match:
+        day, month, year, rest = match.groups()
+    else:
+        match = _ISODATE.fullmatch(value)
+        if not match:
+            return (0, 0, 0, 0, value)
+        year, month, day, rest = match.groups()
+    try:
+        date(int(year), int(month or 1), int(day or 1))
+    except ValueError:
+        return (0, 0, 0, 0, value)
+    return (1, int(year), int(month or 0), int(day or 0), rest.strip())
+
+_TYPES = dict(g = _general,
+              h = _human,
+              M = _month,
+              n = _numeric,
+              R = None,
+              V = _version,
+              D = _date,
+              L = locale.strxfrm)
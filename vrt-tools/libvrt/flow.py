@@ -0,0 +1,153 @@
+# -*- mode: Python; -*-
+
+'''Flow control between the thread that reads input sentences and
+sends them to an external process and the thread that combines the
+output of the external process with the copy of the input, as in
+libvrt.pr1 and vrt-udpipe.
+
+A Flow is a window of sentences in flight: read but not yet written
+out. The reading thread acquires a place for each sentence and the
+combining thread releases it when the sentence is written, so the
+copy of the input stays bounded however slow the external process.
+
+An external process that keeps its output in a buffer until it has
+read more input could make a full window wait for ever. So, before
+the reading thread waits, it flushes the input of the process, and
+when a full window sees no progress in the stall time, the window is
+doubled, and this is reported. A watchdog thread reports any stall
+with sentences in flight, and what the process is doing.
+
+'''
+
+from argparse import ArgumentTypeError
+from threading import Condition, Event, Thread
+from time import monotonic
+import math, sys
+
+from libvrt.cache import driver
+
+def _window(arg):
+    if arg.isdigit():
+        return int(arg)
+    raise ArgumentTypeError('not a non-negative integer: ' + repr(arg))
+
+def _seconds(arg):
+    try:
+        value = float(arg)
+    except ValueError:
+        value = math.nan
+    if 0 < value < math.inf:
+        return value
+    raise ArgumentTypeError('not a positive number: ' + repr(arg))
+
+def add_flow(parser, *, window = 1000, stall = 60):
+    '''Add --window and --stall options to parser.'''
+    driver('window', 'stall')
+    parser.add_argument('--window', metavar = 'N',
+                        type = _window, default = window,
+                        help = '''
+
+                        sentences in flight, read but not yet written,
+                        0 for no limit ({})
+
+                        '''.format(window))
+    parser.add_argument('--stall', metavar = 'seconds',
+                        type = _seconds, default = stall,
+                        help = '''
+
+                        report when there is no output from the
+                        external process in this time, and grow a
+                        full window ({})
+
+                        '''.format(stall))
+
+class Flow:
+    '''Window of sentences in flight, with a watchdog.'''
+
+    def __init__(self, prog, procs, *, window = 1000, stall = 60):
+        self.prog = prog
+        self.procs = procs
+        self.window = window
+        self.stall = stall
+
+        self.inflight = 0
+        self.progress = monotonic()
+        self._waiting = False
+        self._cond = Condition()
+        self._closed = Event()
+
+        self._watchdog = Thread(target = self._watch,
+                                name = 'Watchdog Thread',
+                                daemon = True)
+        self._watchdog.start()
+
+    def acquire(self, flush):
+        '''Take a place in the window for a sentence, waiting if the
+        window is full, first calling flush (to make the external
+        process see what has been sent).
+
+        '''
+        with self._cond:
+            if not self.window or self.inflight < self.window:
+                self.inflight += 1
+                return
+
+        flush()
+
+        with self._cond:
+            while self.inflight >= self.window:
+                then = self.progress
+                self._waiting = True
+                self._cond.wait(self.stall)
+                self._waiting = False
+                if (self.inflight >= self.window and
+                    self.progress == then and
+                    monotonic() - then >= self.stall):
+                    self.window *= 2
+                    self._report('window full for {:.1f} s, grown to {}'
+                                 ' (output may be buffered in the'
+                                 ' external process)'
+                                 .format(self.stall, self.window))
+            self.inflight += 1
+
+    def release(self):
+        '''Give up the place of a sentence that is written out.'''
+        with self._cond:
+            self.inflight -= 1
+            self.progress = monotonic()
+            if self._waiting:
+                self._cond.notify()
+
+    def close(self):
+        '''Stop the watchdog.'''
+        self._closed.set()
+        self._watchdog.join()
+
+    def _watch(self):
+        # reports is the number of reports of the stall since progress
+        reports, since = 0, self.progress
+        while not self._closed.wait(self.stall / 2):
+            with self._cond:
+                if since != self.progress:
+                    if reports: self._report('output resumed')
+                    reports, since = 0, self.progress
+                waited = monotonic() - self.progress
+                if self.inflight and waited >= self.stall * (reports + 1):
+                    self._report('no output from external process in'
+                                 ' {:.1f} s, {} sentences in flight, {}'
+                                 .format(waited, self.inflight,
+                                         self._state()))
+                    reports += 1
+
+    def _state(self):
+        codes = [ proc.poll() if hasattr(proc, 'poll') else None
+                  for proc in self.procs ]
+        if all(code is None for code in codes):
+            return 'process running'
+        return ', '.join('process exited with {}'.format(code)
+                         if code is not None
+                         else 'process running'
+                         for code in codes)
+
+    def _report(self, message):
+        print('{}: {}'.format(self.prog, message), file = sys.stderr)
@@ -0,0 +1,93 @@
+'''A pool of append handles to many output files, of which at most a
+limited number are open at a time (the least recently used is closed
+to make room), with the data for each file buffered in memory and
+appended in large writes.
+
+Each write of a buffer is a single append under an exclusive lock on
+the file, and the data of a single call to write always goes to the
+file in one piece, so several processes can append to the same files
+at the same time. The head (bytes) is written at the start of each
+file, by whichever process happens to write to it first.
+
+with HandlePool(head) as pool:
+    pool.write(path, data)
+
+'''
+
+from collections import OrderedDict
+import fcntl, os
+
+class HandlePool:
+
+    def __init__(self, head = b'', *, limit = 100, buffer = 1 << 16,
+                 memory = 1 << 26):
+        '''Keep at most limit files open, and buffer up to buffer bytes
+        for each file and up to memory bytes in all.
+
+        '''
+        self.head = head
+        self.limit = limit
+        self.buffer = buffer
+        self.memory = memory
+        self.paths = set()
+        self._buffers = {}
+        self._buffered = 0
+        self._handles = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, path, data):
+        '''Append data (bytes) to the file at path, in time.'''
+        self.paths.add(path)
+        buffer = self._buffers.setdefault(path, bytearray())
+        buffer += data
+        self._buffered += len(data)
+        if len(buffer) >= self.buffer:
+            self._flush(path)
+        if self._buffered >= self.memory:
+            self.flush()
+
+    def flush(self):
+        '''Append all buffered data to the files.'''
+        for path in list(self._buffers):
+            self._flush(path)
+
+    def close(self):
+        '''Append all buffered data and close all files.'''
+        try:
+            self.flush()
+        finally:
+            while self._handles:
+                _, fd = self._handles.popitem()
+                os.close(fd)
+
+    def _flush(self, path):
+        data = self._buffers.pop(path)
+        self._buffered -= len(data)
+        fd = self._open(path)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if self.head and os.fstat(fd).st_size == 0:
+                data[:0] = self.head
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _open(self, path):
+        if path in self._handles:
+            self._handles.move_to_end(path)
+            return self._handles[path]
+
+        while len(self._handles) >= self.limit:
+            _, fd = self._handles.popitem(last = False)
+            os.close(fd)
+
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+        self._handles[path] = fd
+        return fd
@@ -0,0 +1,219 @@
+'''Sidecar index of a VRT file (file.vrt.idx) for random access: the
+byte offset of the start tag of every element of the indexed names
+(text, paragraph, sentence by default), and the number of tokens
+before it, built in one pass over the file.
+
+The index is a head line, a line of JSON, and then for each indexed
+name an array of fixed-width records (RECORD) of offset and tokens
+before, in file order. The JSON tells the size and modification time
+of the VRT file when indexed (an index that does not match them is
+not used), the number of tokens, the positional-attributes comment
+(the first, if any), and the count and position of the records for
+each name (relative to the end of the JSON line).
+
+index = open_index('file.vrt')
+if index is not None and b'sentence' in index:
+    with open('file.vrt', mode = 'rb') as ins:
+        lines = index.element(ins, b'sentence', k)
+
+'''
+
+from bisect import bisect_right
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from tempfile import mkstemp, TemporaryFile
+import json, os, re, shutil
+
+from libvrt.bad import BadData
+from libvrt.nameline import isnameline
+
+SUFFIX = '.idx'
+HEAD = b'VRT index 1\n'
+NAMES = (b'text', b'paragraph', b'sentence')
+RECORD = Struct('<QQ')
+
+_START = re.compile(rb'<([^\s>/!?]+)[\s>]')
+
+def index_path(path):
+    '''Return the path of the index of the VRT file at path.'''
+    return path + SUFFIX
+
+def build_index(path, names = NAMES):
+    '''Write the index of the VRT file at path, of the elements of the
+    given names (bytes), through a temporary file that is renamed at
+    the end. Return the head (dict) of the index.
+
+    '''
+
+    names = tuple(dict.fromkeys(names))
+    stat = os.stat(path)
+    arrays = { name : TemporaryFile() for name in names }
+    counts = dict.fromkeys(names, 0)
+    offset, tokens, nameline = 0, 0, None
+    with open(path, mode = 'rb') as ins:
+        for line in ins:
+            if line.startswith(b'<'):
+                match = _START.match(line)
+                if match and match.group(1) in arrays:
+                    name = match.group(1)
+                    arrays[name].write(RECORD.pack(offset, tokens))
+                    counts[name] += 1
+                elif nameline is None and isnameline(line):
+                    nameline = line
+            elif not line.isspace():
+                tokens += 1
+            offset += len(line)
+
+    head = dict(size = stat.st_size,
+                mtime_ns = stat.st_mtime_ns,
+                tokens = tokens,
+                names = (nameline.decode('UTF-8')
+                         if nameline is not None
+                         else None),
+                elements = {})
+    start = 0
+    for name in names:
+        head['elements'][name.decode('UTF-8')] = dict(count = counts[name],
+                                                      start = start)
+        start += counts[name] * RECORD.size
+
+    fd, temp = mkstemp(dir = os.path.dirname(path) or '.',
+                       prefix = os.path.basename(index_path(path)),
+                       suffix = '.tmp')
+    try:
+        os.chmod(temp, stat.st_mode & 0o666)
+        with open(fd, mode = 'wb') as out:
+            out.write(HEAD)
+            out.write(json.dumps(head).encode('UTF-8'))
+            out.write(b'\n')
+            for name in names:
+                arrays[name].seek(0)
+                shutil.copyfileobj(arrays[name], out)
+                arrays[name].close()
+        os.rename(temp, index_path(path))
+    except BaseException:
+        os.remove(temp)
+        raise
+
+    return head
+
+def open_index(path):
+    '''Return the Index of the VRT file at path, or None if there is no
+    index or the file has changed since it was indexed.
+
+    '''
+    try:
+        index = Index(index_path(path))
+    except FileNotFoundError:
+        return None
+
+    stat = os.stat(path)
+    if (index.head['size'], index.head['mtime_ns']) != (stat.st_size,
+                                                        stat.st_mtime_ns):
+        index.close()
+        return None
+
+    return index
+
+class Index:
+    '''Read access to an index (mapped to memory).'''
+
+    def __init__(self, path):
+        with open(path, mode = 'rb') as ins:
+            if ins.readline() != HEAD:
+                raise BadData('not a VRT index: ' + path)
+            self.head = json.loads(ins.readline())
+            self._base = ins.tell()
+            self._map = (mmap(ins.fileno(), 0, access = ACCESS_READ)
+                         if os.fstat(ins.fileno()).st_size > self._base
+                         else b'')
+
+        self.tokens = self.head['tokens']
+        self.names = (self.head['names'].encode('UTF-8')
+                      if self.head['names'] is not None
+                      else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._map:
+            self._map.close()
+
+    def __contains__(self, name):
+        return name.decode('UTF-8') in self.head['elements']
+
+    def count(self, name):
+        '''Return the number of elements of the name (bytes).'''
+        return self.head['elements'][name.decode('UTF-8')]['count']
+
+    def record(self, name, k):
+        '''Return the offset and the tokens before the element k (from 0)
+        of the name.
+
+        '''
+        element = self.head['elements'][name.decode('UTF-8')]
+        if not 0 <= k < element['count']:
+            raise IndexError(k)
+        return RECORD.unpack_from(self._map,
+                                  self._base +
+                                  element['start'] +
+                                  k * RECORD.size)
+
+    def find_token(self, name, n):
+        '''Return the last element k of the name that starts at or before
+        token n (from 0), or -1 if none does.
+
+        '''
+        before = _Before(self, name)
+        return bisect_right(before, n) - 1
+
+    def element(self, ins, name, k):
+        '''Return the lines (list) of element k of the name in ins (the
+        binary VRT file, seekable), from the start tag to the end tag.
+
+        '''
+        offset, before = self.record(name, k)
+        ins.seek(offset)
+        end = b'</' + name + b'>'
+        lines = []
+        for line in ins:
+            lines.append(line)
+            if line.startswith(end):
+                return lines
+        raise BadData('input stream ended before end tag: ' + repr(end))
+
+    def token(self, ins, n, name = b'sentence'):
+        '''Return the line of token n (from 0) in ins (the binary VRT
+        file, seekable), skipping from the start of the element of the
+        name that contains it.
+
+        '''
+        if not 0 <= n < self.tokens:
+            raise IndexError(n)
+        k = self.find_token(name, n)
+        offset, before = (0, 0) if k < 0 else self.record(name, k)
+        ins.seek(offset)
+        for line in ins:
+            if not line.startswith(b'<') and not line.isspace():
+                if before == n:
+                    return line
+                before += 1
+        raise BadData('index does not match the file')
+
+class _Before:
+    '''The tokens before each element of a name, as a sequence.'''
+
+    def __init__(self, index, name):
+        self._index = index
+        self._name = name
+        self._count = index.count(name)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, k):
+        return self._index.record(self._name, k)[1]
@@ -8,6 +8,7 @@ import re
 import sys
 
 from collections import OrderedDict
+from collections.abc import Mapping
 
 def attributes(line):
     '''Get list of attribute names in start tag line (bytes).'''
@@ -22,6 +23,104 @@ def pairs(line):
     '''Get list of attribute (name, value) pairs in start tag line (bytes).'''
     return re.findall(br'(\S+?)="([^"]*)"', line)
 
+class Attributes(Mapping):
+    '''Read-only mapping of attribute names (bytes) to values (bytes)
+    of a start tag line, in their order in the line, as from parser().
+    The values are in a tuple; the names and an index of them are in a
+    layout that is shared by all start tags with the same attributes
+    in the same order.
+
+    Use mapping() to get an OrderedDict that can be modified.
+
+    '''
+
+    __slots__ = ('_layout', '_values')
+
+    def __init__(self, layout, values):
+        self._layout = layout
+        self._values = values
+
+    def __getitem__(self, name):
+        return self._values[self._layout.index[name]]
+
+    def __contains__(self, name):
+        return name in self._layout.index
+
+    def __iter__(self):
+        return iter(self._layout.names)
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, name, default = None):
+        k = self._layout.index.get(name)
+        return default if k is None else self._values[k]
+
+    def pairs(self):
+        '''Return the (name, value) pairs as pairs(line) would.'''
+        return list(zip(self._layout.names, self._values))
+
+    def __repr__(self):
+        return 'Attributes({!r})'.format(self.pairs())
+
+class _Layout:
+    '''Element name, attribute names, an index of the names, and a
+    compiled pattern that matches a start tag with exactly these
+    attributes in this order, capturing the values.
+
+    '''
+
+    __slots__ = ('element', 'names', 'index', 'pattern')
+
+    def __init__(self, element, names):
+        self.element = element
+        self.names = names
+        self.index = { name : k for k, name in enumerate(names) }
+        self.pattern = re.compile(
+            b''.join((b'<', re.escape(element),
+                      *(b' ' + re.escape(name) + b'="([^"]*)"'
+                        for name in names),
+                      b'>\r?\n?')))
+
+def parser(*, limit = 1000):
+    '''Return a function that parses a start tag line (bytes) into
+    Attributes, the same names and values as in mapping(line).
+
+    The function caches the attribute layout of the latest start tag
+    of each element, and tries first to match the line with the
+    precompiled pattern of that layout, which typically succeeds
+    because the same attributes in the same order repeat in all
+    elements of a kind (all sentences, say). Only when this fails is
+    the line parsed in full (with pairs) and the new layout compiled,
+    or taken from a cache of at most limit layouts.
+
+    '''
+
+    latest = {} # element -> _Layout
+    layouts = {} # (element, names) -> _Layout
+
+    def parse(line):
+        head = line.partition(b' ')[0]
+        element = head[1:].rstrip(b'>\r\n')
+        layout = latest.get(element)
+        if layout is not None:
+            mo = layout.pattern.fullmatch(line)
+            if mo is not None:
+                return Attributes(layout, mo.groups())
+
+        these = pairs(line)
+        names = tuple(name for name, value in these)
+        layout = layouts.get((element, names))
+        if layout is None:
+            layout = _Layout(element, names)
+            if len(layouts) < limit:
+                layouts[element, names] = layout
+
+        latest[element] = layout
+        return Attributes(layout, tuple(value for name, value in these))
+
+    return parse
+
 def element(line):
     '''Get start or end tag element name from line (bytes).'''
     mo = re.search(rb'\w+', line)
@@ -2,9 +2,11 @@
 
 '''Support the handling of the name lines encountered in VRT.'''
 
+from itertools import chain
 import re
 
 from libvrt.bad import BadData
+from libvrt.runs import COMMENT, DATA
 
 def isnameline(line):
     return line.startswith(b'<!-- #vrt positional-attributes: ')
@@ -56,3 +58,40 @@ def rename(names, mapping):
                               b' '.join(new).decode('UTF-8')))
 
     return new
+
+def splitnames(content, ous, *, limit = 100):
+    '''Find the first name line in the runs of content (as from
+    libvrt.runs.runs) in the first limit lines, before any data line.
+    Write the meta lines before it to ous. Return the name line and
+    the runs that remain, beginning with the rest of the run where the
+    name line was.
+
+    Raise a BadData exception if there is data before the name line,
+    or no name line in the first limit lines.
+
+    Used by vrt-rename, vrt-keep, vrt-drop, at least.
+
+    '''
+
+    content = iter(content)
+    seen = 0
+    for kind, lines in content:
+        if kind == DATA:
+            raise BadData('fields found before field names')
+
+        if kind == COMMENT:
+            for k, line in enumerate(lines[:limit - seen]):
+                if isnameline(line):
+                    ous.writelines(lines[:k])
+                    rest = lines[k + 1:]
+                    return line, (chain([(kind, rest)], content)
+                                  if rest else
+                                  content)
+
+        seen += len(lines)
+        if seen >= limit:
+            break
+
+        ous.writelines(lines)
+
+    raise BadData('first {} lines: no field names found'.format(limit))
@@ -28,20 +28,195 @@ alternative protocol.
    process must write its stderr to a PIPE and pr1_read_stderr must
    deal with it.
 
+6. The sentences are sent in batches of about BATCH tokens, the input
+   of the external process flushed at the end of each batch, and a
+   sentence of LONG or more tokens is a batch of its own. The external
+   process may be started as several workers (with the same command),
+   and then the batches are sent to them in turn. An implementation
+   must not assume a single process in pr1_send and pr1_read.
+
+7. The external process may instead be a connection to a long-lived
+   annotator server (vrt-annotator-server) that runs the same command.
+   Then proc.stdin and proc.stdout are the two ends of a Unix socket,
+   and there is nothing in proc.stderr.
+
+8. The results may be cached on disk (libvrt.cache) by the bytes that
+   pr1_send writes for a sentence, when the external tool is
+   deterministic. Then a sentence found in the cache is not sent, and
+   what pr1_read yielded for it is read from the cache. An
+   implementation must only write to proc.stdin in pr1_send.
+
+9. At most a window of sentences are in flight, read but not yet
+   written (libvrt.flow), and a watchdog reports when the external
+   process stops producing. An implementation must not expect to see
+   the whole input before it produces output.
+
+10. A sentence of a given number of tokens or more may be torn into
+   shreds that are sent as sentences of their own, and then what
+   pr1_read yields for the shreds is mended back into one data
+   component, with pr1_mend if the implementation provides it (as
+   vrt-simple-tear and vrt-conllu-mend would do in separate passes).
+   Only for an implementation with pr1_join and no pr1_join_meta.
+
 A particular tool is implemented as a module that provides the
 tool-specific functionality.
 
 '''
 
+from argparse import ArgumentTypeError
+from io import BytesIO
+from socket import socket, AF_UNIX, SOCK_STREAM, SHUT_WR
+from subprocess import Popen
+from time import monotonic
 import sys
-from itertools import filterfalse, groupby
+from itertools import chain, filterfalse, groupby
 from queue import Queue
 from threading import Thread
 
 from libvrt.bad import BadData, BadCode
+from libvrt.cache import Cache, context, driver
+from libvrt.flow import Flow
+from libvrt.tear import shreds as _shreds
 
 NAMES, OUTER, INNER, TAGS, BEGIN, META, DATA, JOIN, KEEP = range(2, 11)
 
+# copy queue item (WORKER, k) means that the following sentences went
+# to worker k
+WORKER = 11
+
+# tokens in a batch that is sent (and flushed) at a time, to one
+# worker at a time, and tokens in a long sentence that is a batch of
+# its own
+BATCH = 2000
+LONG = 100
+
+# copy queue item (CACHED, components) means that the next sentence
+# is not sent but what pr1_read would yield for it is in components,
+# and (MISS, key) that what pr1_read yields for it is to be cached
+CACHED, MISS = 12, 13
+
+# copy queue item (FAILED, exn) means that the separation thread
+# failed with exn
+FAILED = 14
+
+# copy queue item (TORN, k) means that the next sentence was sent as k
+# shreds
+TORN = 15
+
+def _positive(arg):
+    if arg.isdigit() and int(arg) > 0:
+        return int(arg)
+    raise ArgumentTypeError('not a positive integer: ' + repr(arg))
+
+def add_workers(parser):
+    '''Add --workers, --server and --batch options to parser (of a pr1
+    tool).
+
+    '''
+    driver('workers', 'server', 'batch_tokens')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--workers', metavar = 'N',
+                       type = _positive, default = 1,
+                       help = '''
+
+                       run N instances of the external tool, each
+                       annotating every Nth batch of sentences, and
+                       report their throughput to stderr (1)
+
+                       ''')
+    group.add_argument('--server', metavar = 'socket',
+                       help = '''
+
+                       do not run the external tool but connect to a
+                       vrt-annotator-server at the Unix socket that
+                       runs it already
+
+                       ''')
+    parser.add_argument('--batch', metavar = 'N',
+                        dest = 'batch_tokens',
+                        type = _positive, default = BATCH,
+                        help = '''
+
+                        send sentences in batches of about N tokens,
+                        a sentence of {} or more tokens in a batch of
+                        its own ({})
+
+                        '''.format(LONG, BATCH))
+
+def add_tear(parser):
+    '''Add --tear option to parser (of a pr1 tool with pr1_join and no
+    pr1_join_meta).
+
+    '''
+    parser.add_argument('--tear', metavar = 'N',
+                        type = _positive,
+                        help = '''
+
+                        send a sentence of N or more tokens to the
+                        external tool in shreds of 3N/5 tokens and mend
+                        the annotations of the shreds (instead of
+                        vrt-simple-tear and a mend)
+
+                        ''')
+
+def popen(args, *popenargs, **kwargs):
+    '''Return Popen(*popenargs, **kwargs), or a list of args.workers of
+    them when more than one worker is requested, or a Connection to
+    args.server when there is one.
+
+    '''
+    if getattr(args, 'server', None):
+        return Connection(args.server)
+    workers = getattr(args, 'workers', 1)
+    if workers == 1:
+        return Popen(*popenargs, **kwargs)
+    return [ Popen(*popenargs, **kwargs) for k in range(workers) ]
+
+class Connection:
+    '''Stand in for the Popen of the external tool, connected to an
+    annotator server at a Unix socket. Closing stdin closes the
+    sending end of the socket, and then the server sends the rest of
+    the output and closes the other end.
+
+    '''
+
+    def __init__(self, path):
+        self.socket = socket(AF_UNIX, SOCK_STREAM)
+        try:
+            self.socket.connect(path)
+        except OSError as exn:
+            self.socket.close()
+            raise BadData('cannot connect to server: {}: {}'
+                          .format(path, exn))
+        self.stdin = _Sending(self.socket)
+        self.stdout = self.socket.makefile('rb')
+        self.stderr = BytesIO()
+        self.returncode = None
+
+    def wait(self, timeout = None):
+        self.stdout.close()
+        self.socket.close()
+        self.returncode = 0
+        return self.returncode
+
+    def terminate(self):
+        self.socket.close()
+
+    kill = terminate
+
+class _Sending:
+    '''Buffered sending end of a socket.'''
+
+    def __init__(self, sock):
+        self.socket = sock
+        self.file = sock.makefile('wb')
+        self.write = self.file.write
+        self.flush = self.file.flush
+
+    def close(self):
+        self.file.close()
+        self.socket.shutdown(SHUT_WR)
+
 def transput(args, imp, proc, ins, ous):
 
     '''Set up a thread that pushes a (segmented) copy of ins to a queue
@@ -52,8 +227,17 @@ def transput(args, imp, proc, ins, ous):
     If there is imp.pr1_read_stderr, set it to read all of proc.stderr
     in yet another thread.
 
+    If proc is a list of processes (workers), send batches of
+    sentences to them in turn, read the output of each in a thread of
+    its own to a queue, and combine from the queues in input order.
+
     '''
 
+    if isinstance(proc, list) and len(proc) > 1:
+        return _transput_workers(args, imp, proc, ins, ous)
+    if isinstance(proc, list):
+        proc, = proc
+
     matter = _segment(ins, imp)
     kind, head = next(matter)
 
@@ -66,9 +250,13 @@ def transput(args, imp, proc, ins, ous):
     copy.put((NAMES, names))
     copy.put((OUTER, head))
 
+    cache = _opencache(args, proc)
+    flow = _openflow(args, [proc])
+
     imp.pr1_test(meta = head)
     feed = Thread(target = _separate,
                   args = (args, imp, matter, copy, proc),
+                  kwargs = dict(cache = cache, flow = flow),
                   name = 'Separation Thread',
                   daemon = True)
     feed.start()
@@ -80,7 +268,10 @@ def transput(args, imp, proc, ins, ous):
                       daemon = True)
         deal.start()
 
-    _combinate(args, imp, copy, proc, ous)
+    try:
+        _combinate(args, imp, copy, proc, ous, cache = cache, flow = flow)
+    finally:
+        flow.close()
 
     # proc should have run its course by now; the 30 second timeout
     # may or may not be either wildly excessive or sufficient --
@@ -107,8 +298,134 @@ def transput(args, imp, proc, ins, ous):
         if deal.is_alive():
             raise BadCode('diagnostic thread is still alive')
 
+    _closecache(args, cache)
     return code
 
+def _transput_workers(args, imp, procs, ins, ous):
+    '''As transput but with a list of worker processes, each with a
+    thread that reads its output sentences to a queue of its own.
+    Report the throughput of each worker to stderr.
+
+    '''
+
+    matter = _segment(ins, imp)
+    kind, head = next(matter)
+
+    if kind in (TAGS, BEGIN):
+        raise BadData('no name comment before first sentence')
+
+    names = imp.pr1_init(args, _extract(head))
+
+    copy = Queue()
+    copy.put((NAMES, names))
+    copy.put((OUTER, head))
+
+    start = monotonic()
+    count = [ [0, 0] for proc in procs ]
+    ended = [ None for proc in procs ]
+    queues = [ Queue() for proc in procs ]
+
+    cache = _opencache(args, procs[0])
+    flow = _openflow(args, procs)
+
+    imp.pr1_test(meta = head)
+    feed = Thread(target = _separate,
+                  args = (args, imp, matter, copy, procs, count),
+                  kwargs = dict(cache = cache, flow = flow),
+                  name = 'Separation Thread',
+                  daemon = True)
+    feed.start()
+
+    gather = [ Thread(target = _gather,
+                      args = (imp, proc, queues[k], ended, k),
+                      name = 'Worker Thread {}'.format(k),
+                      daemon = True)
+               for k, proc in enumerate(procs) ]
+    for thread in gather: thread.start()
+
+    if hasattr(imp, 'pr1_read_stderr'):
+        deal = [ Thread(target = _readerr,
+                        args = (args, imp, proc),
+                        name = 'Diagnostic Thread {}'.format(k),
+                        daemon = True)
+                 for k, proc in enumerate(procs) ]
+        for thread in deal: thread.start()
+    else:
+        deal = []
+
+    try:
+        _combinate(args, imp, copy, None, ous,
+                   readers = [ iter(queue.get, None) for queue in queues ],
+                   cache = cache, flow = flow)
+    finally:
+        flow.close()
+
+    codes = [ proc.wait(timeout = 300) for proc in procs ]
+
+    if not copy.empty():
+        raise BadCode('copy queue is not empty')
+
+    for thread in (feed, *gather, *deal):
+        thread.join(5)
+        if thread.is_alive():
+            raise BadCode('{} is still alive'.format(thread.name))
+
+    for k, ((sentences, tokens), end) in enumerate(zip(count, ended)):
+        took = (end or monotonic()) - start
+        print('{}: worker {}: {} sentences, {} tokens in {:.1f} s:'
+              ' {:.0f} tokens/s'
+              .format(args.prog, k, sentences, tokens, took,
+                      tokens / took if took else 0),
+              file = sys.stderr)
+
+    _closecache(args, cache)
+    return next((code for code in codes if code), 0)
+
+def _opencache(args, proc):
+    '''Return a Cache in args.cache, keyed in the context of the tool
+    options and the command of proc, or None if there is no cache.
+
+    '''
+    if not getattr(args, 'cache', None):
+        return None
+    return Cache(args.cache,
+                 context(args, getattr(proc, 'args', None)),
+                 size = args.cache_size)
+
+def _openflow(args, procs):
+    '''Return a Flow for the procs with the window and stall in args,
+    or the defaults.
+
+    '''
+    return Flow(args.prog, procs,
+                window = getattr(args, 'window', 1000),
+                stall = getattr(args, 'stall', 60))
+
+def _closecache(args, cache):
+    '''Close cache, report its statistics to stderr.'''
+    if cache is None: return
+    cache.close()
+    print('{}: {}'.format(args.prog, cache.report()), file = sys.stderr)
+
+class _Sent:
+    '''Stand in for proc in pr1_send, to capture what is sent.'''
+    def __init__(self):
+        self.stdin = BytesIO()
+
+def _gather(imp, proc, queue, ended, k):
+    '''Running in another thread, put each output sentence of a worker
+    process to the queue, data components (iterators) made into lists
+    so that they remain when the reader moves on, and a None at the
+    end. Record the end time in ended[k].
+
+    '''
+    try:
+        for new in imp.pr1_read(proc.stdout):
+            queue.put(iter(list(new)) if hasattr(new, '__next__') else new)
+    finally:
+        ended[k] = monotonic()
+        queue.put(None)
+
 def _segment(ins, imp):
     '''Yield non-empty input lines in classified groups.
 
@@ -171,7 +488,26 @@ def _extract(head):
     names = line.split()[3:-1]
     return names
 
-def _separate(args, imp, matter, copy, proc):
+def _separate(args, imp, matter, copy, proc, count = None, *,
+              cache = None, flow = None):
+    '''Running in another thread, do _separations, and put a FAILED in
+    copy if that fails, and close the input of the external process,
+    so that the output of what was sent can be combined up to FAILED.
+
+    '''
+    try:
+        _separations(args, imp, matter, copy, proc, count,
+                     cache = cache, flow = flow)
+    except BaseException as exn:
+        copy.put((FAILED, exn))
+        for each in (proc if isinstance(proc, list) else [proc]):
+            try:
+                each.stdin.close()
+            except OSError:
+                pass
+
+def _separations(args, imp, matter, copy, proc, count = None, *,
+                 cache = None, flow = None):
     '''Running in another thread, put all incoming matter (segmented ins)
     to copy (a queue of classified groups of lines) and send some of
     the sentences to proc according to imp. Finally put a sentinel in
@@ -192,21 +528,68 @@ def _separate(args, imp, matter, copy, proc):
     Only use JOIN if there is imp.pr1_join, and then imp.pr1_read
     produces a data component for the sentence.
 
+    Hold a BEGIN until the INNER that follows it, so that a batch can
+    end before a long sentence. With a cache, precede a sentence with
+    CACHED or MISS.
+
+    With a flow, take a place in its window for each INNER.
+
+    With args.tear, precede a sentence that is sent in shreds with
+    TORN.
+
     '''
 
     # whether imp.pr1_read produces data components or not
     SENT = (JOIN if hasattr(imp, 'pr1_join') else KEEP)
 
+    # with workers, proc is a list of them and the batches are sent
+    # to each in turn, counting in count[k] the sentences and tokens
+    # sent to worker k
+    procs = proc if isinstance(proc, list) else None
+    if procs:
+        proc, worker = procs[0], 0
+
+    # tokens sent in the current batch
+    size, batch = getattr(args, 'batch_tokens', BATCH), 0
+
+    # tear sentences of tear or more tokens
+    tear = (None if hasattr(imp, 'pr1_join_meta') else
+            getattr(args, 'tear', None))
+
+    # a BEGIN held until the INNER that follows it
+    held = None
+
+    every = procs or [proc]
+    def flush():
+        for each in every:
+            each.stdin.flush()
+
+    def end():
+        nonlocal proc, worker, batch
+        proc.stdin.flush()
+        batch = 0
+        if procs:
+            worker = (worker + 1) % len(procs)
+            proc = procs[worker]
+            copy.put((WORKER, worker))
+
     for kind, lines in matter:
+        if kind == INNER and flow is not None:
+            flow.acquire(flush)
+
+        if held is not None and kind != INNER:
+            copy.put((BEGIN, held))
+            held = None
+
         if kind == BEGIN:
             # imp.pr1_read produces meta components
             # for sent sentences (put to copy as BEGIN)
             # not for skipped (put to copy as TAGS)
             imp.pr1_test(tags = lines)
-            copy.put((( BEGIN
-                        if imp.pr1_test()
-                        else TAGS ),
-                      lines))
+            if not imp.pr1_test():
+                copy.put((TAGS, lines))
+            else:
+                held = lines
         elif kind == TAGS:
             copy.put((kind, lines))
             imp.pr1_test(tags = lines)
@@ -215,21 +598,98 @@ def _separate(args, imp, matter, copy, proc):
             imp.pr1_test(meta = lines)
         elif imp.pr1_test():
             # kind == INNER
+            records = [ line for kind, line in lines if kind == DATA ]
+            tokens = len(records)
+            if tokens >= LONG and batch:
+                end()
+
+            shreds = ([records] if tear is None or tokens < tear else
+                      _shreds(records, tear))
+
+            if cache is None:
+                target = proc
+            else:
+                target = _Sent()
+            for shred in shreds:
+                imp.pr1_send(iter(shred), target)
+
+            if cache is not None:
+                key = cache.key(target.stdin.getvalue())
+                components = cache.get(key)
+                copy.put((CACHED, components)
+                         if components is not None
+                         else (MISS, key))
+            if held is not None:
+                copy.put((BEGIN, held))
+                held = None
+            if cache is not None and components is not None:
+                copy.put((SENT, lines))
+                continue
+            if len(shreds) > 1:
+                copy.put((TORN, len(shreds)))
             copy.put((SENT, lines))
-            imp.pr1_send((line for kind, line in lines
-                          if kind == DATA),
-                         proc)
+            if cache is not None:
+                proc.stdin.write(target.stdin.getvalue())
+
+            if procs:
+                count[worker][0] += 1
+                count[worker][1] += tokens
+            batch += tokens
+            if tokens >= LONG or batch >= size:
+                end()
         else:
             # kind == INNER
+            if held is not None:
+                copy.put((BEGIN, held))
+                held = None
             copy.put((KEEP, lines))
     else:
         copy.put((None, ()))
-        proc.stdin.close()
+        for proc in (procs or [proc]):
+            proc.stdin.close()
+
+def _combinate(args, imp, copy, proc, ous, *, readers = None,
+               cache = None, flow = None):
+    '''In the main thread. With workers, readers are their readers,
+    to be switched at each (WORKER, k) in copy. With a cache, take
+    the components of a sentence from the cache at (CACHED,
+    components), and store them to the cache at (MISS, key). With a
+    flow, release a place in its window at each sentence written. At
+    (TORN, k), mend the data components of the k shreds of the next
+    sentence into one.
 
-def _combinate(args, imp, copy, proc, ous):
-    '''In the main thread.'''
+    '''
 
-    news = imp.pr1_read(proc.stdout)
+    news = imp.pr1_read(proc.stdout) if readers is None else readers[0]
+
+    # components per sentence, and either the cached components of the
+    # current sentence or the key and the components so far to cache
+    per = hasattr(imp, 'pr1_join_meta') + hasattr(imp, 'pr1_join')
+    cached, key, store = None, None, None
+
+    # shreds in the next data component, and how to mend them
+    torn = 0
+    mend = getattr(imp, 'pr1_mend', chain.from_iterable)
+
+    def take(data):
+        nonlocal key, store, torn
+        if cached is not None:
+            new = next(cached)
+            return iter(new) if data else new
+        if torn:
+            new = list(mend([ list(next(news)) for k in range(torn) ]))
+            torn = 0
+            if key is None:
+                return iter(new)
+        elif key is None:
+            return next(news)
+        else:
+            new = list(next(news)) if data else next(news)
+        store.append(new)
+        if len(store) == per:
+            cache.put(key, store)
+            key, store = None, None
+        return iter(new) if data else new
 
     kind, old = copy.get(block = False)
     while kind is not None:
@@ -237,21 +697,40 @@ def _combinate(args, imp, copy, proc, ous):
             _write_meta(old, ous)
         elif kind == BEGIN:
             # there is a meta component for the sentence
-            _write_join_meta(imp, old, next(news), ous)
+            _write_join_meta(imp, old, take(False), ous)
         elif kind == JOIN:
             # there is a data component for the sentence
-            _write_join(imp, old, next(news), ous)
+            _write_join(imp, old, take(True), ous)
+            flow and flow.release()
         elif kind == KEEP:
             # there is no data component for the sentence
             _write_keep(imp, old, ous)
+            flow and flow.release()
         elif kind == NAMES:
             # old is actually *new* names already
             _write_names(old, ous)
+        elif kind == WORKER:
+            # old is actually the index of the next worker
+            news = readers[old]
+        elif kind == CACHED:
+            # old is actually the components of the next sentence
+            cached = iter(old)
+        elif kind == MISS:
+            # old is actually the key of the next sentence
+            cached, key, store = None, old, []
+        elif kind == TORN:
+            # old is actually the number of shreds of the next sentence
+            torn = old
+        elif kind == FAILED:
+            # old is actually the exception in the separation thread
+            raise old
         else:
             raise BadCode('broken protocol')
 
-        # 5 * 60 == 300 (five minutes is 300 seconds)
-        kind, old = copy.get(block = True, timeout = 300)
+        # used to time out in five minutes; now the flow has a
+        # watchdog to report a stall, and the separation thread
+        # always puts a sentinel or a FAILED
+        kind, old = copy.get()
 
 def _write_names(names, ous):
     '''Write names as name comment to ous.'''
@@ -0,0 +1,227 @@
+# -*- mode: Python; -*-
+
+'''Read VRT (or HRT) in large blocks and classify the lines of each
+block in a few C-level operations, yielding runs of lines of the same
+kind instead of one line at a time.
+
+The usual per-line loop, either explicit or as in
+
+    groupby(filter(issome, ins), ismeta)
+
+pays for several Python-level calls on every line. Here a block of
+some 64 KiB (small enough to stay in cache) is read at once, split
+into lines, and the meta lines in it are located by splitting it
+again at every newline that is followed by "<". Only meta lines, which are few, are looked at
+individually; the token lines between them are passed on as slices of
+the list of all lines in the block.
+
+A run is a pair (kind, lines) where kind is one of COMMENT, START,
+END, DATA and lines is a non-empty list of the lines, each with its
+terminating newline (except possibly the last line of input).
+Consecutive lines of the same kind are in the same run, also across
+block boundaries, so a DATA run is always all the tokens between two
+meta lines.
+
+Lines that consist of white space only are dropped unless blanks is
+requested (and then they count as DATA).
+
+Works with both binary and text streams; the lines are bytes or str
+accordingly.
+
+Warning: this is not a validator.
+
+'''
+
+from io import BytesIO, StringIO
+import re
+
+COMMENT, START, END, DATA = range(1, 5)
+
+# read size in bytes (or characters for text streams); larger blocks
+# were observed to be slower
+BLOCK = 1 << 16
+
+# a maximal succession of meta lines of one kind (comment, end tag,
+# start tag, in the order of the alternatives), without its final
+# newline but with the newline that precedes it (each block is
+# prefixed with a newline) so that the pattern starts with a literal
+# and the scan for it is fast; likewise a white-space line
+_META = (r'\n<(?:(![^\n]*(?:\n<![^\n]*)*)'
+         r'|(/[^\n]*(?:\n</[^\n]*)*)'
+         r'|([^\n]*(?:\n<(?![!/])[^\n]*)*))')
+_BLANK = r'\n[^\S\n]*(?=\n)'
+
+# newline, newline followed by "<", compiled _META, compiled _BLANK,
+# and a function that splits a block into lines
+_BYTES = (b'\n', b'\n<',
+          re.compile(_META.encode('ascii')),
+          re.compile(_BLANK.encode('ascii')),
+          lambda block: BytesIO(block).readlines())
+
+_STR = ('\n', '\n<',
+        re.compile(_META),
+        re.compile(_BLANK),
+        lambda block: StringIO(block, newline = '\n').readlines())
+
+# second character of a meta line to kind
+_KIND = {
+    b'!' : COMMENT, '!' : COMMENT,
+    b'/' : END, '/' : END,
+}
+
+# match.lastindex of _META to kind
+_GROUP = (None, COMMENT, END, START)
+
+def blocks(ins, *, size = BLOCK):
+    '''Yield blocks of about size bytes (characters) from ins, each
+    extended to the end of a line.
+
+    '''
+    while True:
+        block = ins.read(size)
+        if not block:
+            return
+        if block[-1:] not in (b'\n', '\n'):
+            block += ins.readline()
+        yield block
+
+def _unblank(block, kit):
+    '''Return block without its white-space lines.'''
+    nl, lt, meta, blank, split = kit
+    block = blank.sub(block[:0], nl + block)[1:]
+    last = block.rfind(nl) + 1
+    if last < len(block) and block[last:].isspace():
+        block = block[:last]
+    return block
+
+def runs(ins, *, size = BLOCK, blanks = False):
+    '''Yield (kind, lines) from ins, merging consecutive lines of the
+    same kind into one run. Drop white-space lines unless blanks.
+
+    '''
+
+    kind, lines = None, []
+    for block in blocks(ins, size = size):
+        kit = nl, lt, meta, blank, split = (
+            _STR if isinstance(block, str) else _BYTES
+        )
+        if not blanks:
+            block = _unblank(block, kit)
+            if not block: continue
+
+        # all the lines of the block, and the index of the next line;
+        # each piece after the first is a meta line without its "<",
+        # followed by the data lines up to the next meta line (the
+        # newline that ends the last of these being the separator)
+        many = split(block)
+        pieces = (nl + (block[:-1] if block.endswith(nl) else block)
+                  ).split(lt)
+
+        ix = pieces[0].count(nl)
+        if ix:
+            if kind == DATA:
+                lines.extend(many[:ix])
+            else:
+                if lines: yield kind, lines
+                kind, lines = DATA, many[:ix]
+
+        for piece in pieces[1:]:
+            this = _KIND.get(piece[:1], START)
+            if this == kind:
+                lines.append(many[ix])
+            else:
+                if lines: yield kind, lines
+                kind, lines = this, [many[ix]]
+            ix += 1
+
+            jx = ix + piece.count(nl)
+            if jx > ix:
+                yield kind, lines
+                kind, lines = DATA, many[ix:jx]
+                ix = jx
+
+    if lines:
+        yield kind, lines
+
+def chunks(ins, *, size = BLOCK, blanks = False):
+    '''Yield (kind, chunk) from ins, where chunk is consecutive lines of
+    the kind as a single bytes (str) object, without splitting them
+    into lines at all. For passing through, for example, a run of
+    tokens as it is.
+
+    Unlike in runs, consecutive lines of the same kind may be in more
+    than one chunk when they happen to cross a block boundary.
+
+    '''
+    for block in blocks(ins, size = size):
+        kit = nl, lt, meta, blank, split = (
+            _STR if isinstance(block, str) else _BYTES
+        )
+        if not blanks:
+            block = _unblank(block, kit)
+            if not block: continue
+
+        # positions are in nl + block; at is the newline before the
+        # next line to cover
+        block = nl + block
+        at = 0
+        for mo in meta.finditer(block):
+            start, end = mo.span()
+            if start > at:
+                yield DATA, block[at + 1:start + 1]
+            yield _GROUP[mo.lastindex], block[start + 1:end + 1]
+            at = end
+
+        if at < len(block) - 1:
+            yield DATA, block[at + 1:]
+
+def groups(ins, *, size = BLOCK, blanks = False):
+    '''Yield (ismeta, lines) from ins like groupby(filter(issome, ins),
+    ismeta) would, except that lines is a list. As runs but without
+    telling the kinds of meta lines apart.
+
+    '''
+
+    ismeta, lines = None, []
+    for block in blocks(ins, size = size):
+        kit = nl, lt, meta, blank, split = (
+            _STR if isinstance(block, str) else _BYTES
+        )
+        if not blanks:
+            block = _unblank(block, kit)
+            if not block: continue
+
+        many = split(block)
+        pieces = (nl + (block[:-1] if block.endswith(nl) else block)
+                  ).split(lt)
+
+        ix = pieces[0].count(nl)
+        if ix:
+            if ismeta is False:
+                lines.extend(many[:ix])
+            else:
+                if lines: yield ismeta, lines
+                ismeta, lines = False, many[:ix]
+
+        for piece in pieces[1:]:
+            if ismeta:
+                lines.append(many[ix])
+            else:
+                if lines: yield ismeta, lines
+                ismeta, lines = True, [many[ix]]
+            ix += 1
+
+            jx = ix + piece.count(nl)
+            if jx > ix:
+                yield ismeta, lines
+                ismeta, lines = False, many[ix:jx]
+                ix = jx
+
+    if lines:
+        yield ismeta, lines
+
+def lines(ins, *, size = BLOCK, blanks = False):
+    '''Yield (kind, line) for each line in ins.'''
+    for kind, many in runs(ins, size = size, blanks = blanks):
+        for line in many:
+            yield kind, line
@@ -0,0 +1,310 @@
+'''Weighted and stratified reservoir sampling in one pass over a
+stream of items: a Reservoir keeps the k items with the largest keys
+u ** (1/w), u uniform in (0, 1] and w the weight of the item
+(Efraimidis and Spirakis, A-Res), which is a weighted random sample
+without replacement, and uniform when all weights are equal. It jumps
+over items by their weights (A-ExpJ), so most items only cost a
+subtraction. The keys are kept as log(u) / w.
+
+A Stratified keeps a Reservoir for each stratum.
+
+Several independent samples can be drawn in the same pass by adding
+each item to each of several samplers, each with its own random
+number generator (see generators).
+
+As the k largest keys of a union are the k largest of the k largest
+keys of each part, the samples of parts of a stream (as fragments of
+a packed corpus) can be written as partial samples with their keys
+(write_partial) and merged to a sample of the whole (merge_partials),
+the same as if drawn in one pass. The parts must use independent
+random numbers.
+
+A partial sample is VRT with comment lines: the number k of the
+sample, a count of the items seen (and their total weight) in each
+stratum of each sample, and the key of each item before its lines,
+in the input order:
+
+<!-- #vrt sample-partial number="k" -->
+<!-- #vrt sample-stratum sample="1" stratum="" seen="N" weight="W" -->
+<!-- #vrt sample-item sample="1" stratum="" key="K" -->
+...
+
+'''
+
+from heapq import heappush, heappushpop, heapreplace
+from itertools import count
+from math import exp, inf, log
+import random, re
+
+from libvrt.bad import BadData
+
+class Reservoir:
+
+    def __init__(self, k, *, rand = random.random):
+        '''Keep a sample of at most k items, using rand() for random
+        numbers in [0, 1).
+
+        '''
+        self.k = k
+        self._random = rand
+        self._heap = [] # (key, seq, item)
+        self._seq = count()
+        self._skip = 0.0 # weight to jump over before the next change
+        self.seen = 0
+        self.weight = 0.0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _uniform(self):
+        # in (0, 1], so that its log is finite
+        return 1.0 - self._random()
+
+    def add(self, item, weight = 1.0):
+        '''Offer the item, of the weight (a non-negative number), to the
+        sample. An item of weight 0 is never taken.
+
+        '''
+        if not weight >= 0:
+            raise ValueError('negative or invalid weight: {}'.format(weight))
+        self.seen += 1
+        self.weight += weight
+        if weight == 0 or self.k <= 0:
+            return
+
+        heap = self._heap
+        if len(heap) < self.k:
+            heappush(heap, (log(self._uniform()) / weight,
+                            next(self._seq),
+                            item))
+            if len(heap) == self.k:
+                self._jump()
+            return
+
+        self._skip -= weight
+        if self._skip > 0:
+            return
+
+        # the key of the new item is conditioned on beating the
+        # smallest kept key
+        least = heap[0][0]
+        floor = exp(least * weight)
+        u = floor + (1.0 - floor) * self._uniform()
+        heapreplace(heap, (log(u) / weight, next(self._seq), item))
+        self._jump()
+
+    def _jump(self):
+        least = self._heap[0][0]
+        self._skip = (log(self._uniform()) / least
+                      if least < 0 else
+                      inf)
+
+    def sample(self):
+        '''Return the sampled items, in the order they were added.'''
+        return [ item for key, item in self.entries() ]
+
+    def entries(self):
+        '''Return the (key, item) of the sampled items, in the order they
+        were added.
+
+        '''
+        return [ (key, item) for key, seq, item in sorted(self._heap,
+                                                          key = _seq) ]
+
+def _seq(entry):
+    return entry[1]
+
+class Stratified:
+
+    def __init__(self, k, *, rand = random.random):
+        '''Keep a sample of at most k items of each stratum.'''
+        self.k = k
+        self._random = rand
+        self.strata = {} # stratum -> Reservoir
+        self._seq = count()
+
+    def add(self, stratum, item, weight = 1.0):
+        '''Offer the item of the stratum (hashable), of the weight, to the
+        sample of the stratum.
+
+        '''
+        reservoir = self.strata.get(stratum)
+        if reservoir is None:
+            reservoir = self.strata[stratum] = Reservoir(self.k,
+                                                         rand = self._random)
+        reservoir.add((next(self._seq), item), weight)
+
+    def sample(self):
+        '''Return the sampled items of all strata, in the order they were
+        added.
+
+        '''
+        return [ item for seq, item in
+                 sorted(item
+                        for reservoir in self.strata.values()
+                        for item in reservoir.sample()) ]
+
+def generators(count):
+    '''Return the random methods of count independent generators, seeded
+    from the random module (so random.seed makes them repeatable).
+
+    '''
+    return [ random.Random(random.getrandbits(64)).random
+             for _ in range(count) ]
+
+def write_partial(ous, samplers, number):
+    '''Write the samples of the samplers (Reservoir or Stratified, whose
+    items are bytes or sequences of bytes) to ous as partial samples of
+    the number.
+
+    '''
+    strata, items = {}, {}
+    for n, sampler in enumerate(samplers, start = 1):
+        stratified = isinstance(sampler, Stratified)
+        for stratum, reservoir in (sampler.strata.items()
+                                   if stratified else
+                                   ((b'', sampler),)):
+            strata[n, stratum] = [reservoir.seen, reservoir.weight]
+            items[n, stratum] = [
+                # Stratified items carry their order in all strata
+                (key, *(item if stratified else (k, item)))
+                for k, (key, item) in enumerate(reservoir.entries())
+            ]
+    write_samples(ous, number, strata, items, partial = True)
+
+def write_samples(ous, number, strata, items, *, partial = False,
+                  wrap = None):
+    '''Write the samples in strata and items (as from merge_partials)
+    to ous, as partial samples of the number if partial, else as VRT
+    with each sample wrapped in the element wrap (bytes) if any, with
+    attribute n when there are more samples.
+
+    '''
+    if partial:
+        ous.write(b'<!-- #vrt sample-partial number="%d" -->\n' % number)
+    samples = sorted({ sample for sample, stratum in strata })
+    for sample in samples:
+        entries = [] # (order, key, stratum, item)
+        for (n, stratum), (seen, weight) in strata.items():
+            if n != sample: continue
+            if partial:
+                ous.write(b'<!-- #vrt sample-stratum sample="%d"'
+                          b' stratum="%s" seen="%d" weight="%s" -->\n'
+                          % (sample, stratum, seen,
+                             repr(weight).encode('UTF-8')))
+            entries.extend((order, key, stratum, item)
+                           for key, order, item
+                           in items.get((sample, stratum), ()))
+
+        if wrap is not None and not partial:
+            ous.write(b'<%s n="%d">\n' % (wrap, sample)
+                      if len(samples) > 1 else
+                      b'<' + wrap + b'>\n')
+        for order, key, stratum, item in sorted(entries, key = _first):
+            if partial:
+                ous.write(b'<!-- #vrt sample-item sample="%d" stratum="%s"'
+                          b' key="%s" -->\n'
+                          % (sample, stratum, repr(key).encode('UTF-8')))
+            if isinstance(item, bytes):
+                ous.write(item)
+            else:
+                for line in item:
+                    ous.write(line)
+        if wrap is not None and not partial:
+            ous.write(b'</' + wrap + b'>\n')
+
+def _first(entry):
+    return entry[0]
+
+_PARTIAL = re.compile(rb'<!-- #vrt sample-(partial|stratum|item) (.*?) ?-->')
+_ATTR = re.compile(rb'(\w+)="([^"]*)"')
+
+def read_partial(ins):
+    '''Yield the parts of a partial sample in ins as ("names", line),
+    ("partial", number), ("stratum", sample, stratum, seen, weight) and
+    ("item", sample, stratum, key, lines).
+
+    '''
+    item = None
+    for line in ins:
+        match = (_PARTIAL.match(line)
+                 if line.startswith(b'<!-- #vrt ')
+                 else None)
+        if match is None:
+            if item is not None:
+                item[-1].append(line)
+            elif line.startswith(b'<!-- #vrt positional-attributes: '):
+                yield ('names', line)
+            elif not line.isspace():
+                raise BadData('not in a sample item: {!r}'.format(line))
+            continue
+
+        if item is not None:
+            yield tuple(item)
+            item = None
+        kind, attrs = match.group(1).decode('UTF-8'), dict(
+            _ATTR.findall(match.group(2)))
+        try:
+            if kind == 'partial':
+                yield (kind, int(attrs[b'number']))
+            elif kind == 'stratum':
+                yield (kind, int(attrs[b'sample']), attrs[b'stratum'],
+                       int(attrs[b'seen']), float(attrs[b'weight']))
+            else:
+                item = [kind, int(attrs[b'sample']), attrs[b'stratum'],
+                        float(attrs[b'key']), []]
+        except (KeyError, ValueError):
+            raise BadData('bad sample comment: {!r}'.format(line))
+    if item is not None:
+        yield tuple(item)
+
+def merge_partials(partials, number = None):
+    '''Merge the partial samples (each an iterable of the parts from
+    read_partial) to samples of the number (by default, the least in
+    the partials, and never more). Return the names line (or None), the
+    number, the strata (a dict from (sample, stratum) to [seen,
+    weight]) and the items (a dict from (sample, stratum) to a list of
+    (key, order, lines) where order is the position of the item in
+    the partials).
+
+    '''
+    names, least = None, None
+    strata, heaps = {}, {}
+    order = count()
+    for partial in partials:
+        for part in partial:
+            kind = part[0]
+            if kind == 'names':
+                names = names or part[1]
+            elif kind == 'partial':
+                least = part[1] if least is None else min(least, part[1])
+                if number is not None and number > part[1]:
+                    raise BadData('partial sample of {} is less than {}'
+                                  .format(part[1], number))
+            elif kind == 'stratum':
+                _, sample, stratum, seen, weight = part
+                counts = strata.setdefault((sample, stratum), [0, 0.0])
+                counts[0] += seen
+                counts[1] += weight
+            else:
+                _, sample, stratum, key, lines = part
+                heap = heaps.setdefault((sample, stratum), [])
+                entry = (key, next(order), lines)
+                k = number if number is not None else least
+                if len(heap) < k:
+                    heappush(heap, entry)
+                elif heap and key > heap[0][0]:
+                    heappushpop(heap, entry)
+
+    if least is None:
+        raise BadData('no partial sample')
+    number = least if number is None else number
+    # a heap may hold more items while the least number was not yet
+    # known, and the largest keys of those are the sample
+    items = { group : sorted(sorted(heap, reverse = True)[:number],
+                             key = _order)
+              for group, heap in heaps.items() }
+    return names, number, strata, items
+
+def _order(entry):
+    return entry[1]
@@ -0,0 +1,252 @@
+# -*- mode: Python; -*-
+
+'''Field names of VRT token lines, parsed once from the name line into
+a Schema, and projections of them (keep, drop, insert, rename) into
+an index Plan that maps the fields of a token line to new fields in
+one pass, however many projections it combines.
+
+A Plan is made from a Schema and then extended step by step,
+
+    plan = Schema.fromline(line).plan().drop([b'msd']).insert([b'x'])
+
+and its target Schema can be passed on without parsing the name line
+again. The index of a plan is a tuple whose each element is either
+the position of a source field (int) or a fixed value (bytes) for an
+inserted field.
+
+'''
+
+from itertools import chain, filterfalse
+
+from libvrt.bad import BadData
+from libvrt.dataline import picker
+from libvrt.keeper import keeper
+from libvrt.nameline import isnameline, parsenameline, makenameline
+from libvrt.nameline import rename, splitnames
+from libvrt.runs import runs, COMMENT, DATA
+
+REST = b'[...]'
+
+def transform(ins, ous, project):
+    '''Transput VRT (bytes) from ins to ous by the Plan that project
+    makes of the identity plan of the schema in the name line. Ship
+    the meta lines as they are, except drop any further name lines.
+
+    Used by vrt-keep, vrt-drop and vrt-rename.
+
+    '''
+
+    line, content = splitnames(runs(ins), ous)
+    plan = project(Schema.fromline(line).plan())
+    ous.write(plan.target.line())
+    pick = _picker(plan)
+
+    for kind, lines in content:
+        if kind == DATA:
+            ous.writelines(lines if pick is None else map(pick, lines))
+        elif kind == COMMENT:
+            ous.writelines(filterfalse(isnameline, lines))
+        else:
+            ous.writelines(lines)
+
+def projected(lines, project, *, limit = 100):
+    '''Yield the VRT lines (bytes) in lines as transform would write
+    them, one line at a time, as in a chain of stages (vrt-chain).
+
+    '''
+
+    lines = iter(lines)
+    line, seen = b'', 0
+    for line in lines:
+        if isnameline(line):
+            break
+        if line.isspace():
+            continue
+        if not line.startswith(b'<'):
+            raise BadData('fields found before field names')
+        seen += 1
+        if seen == limit:
+            break
+        yield line
+    if seen == limit or not isnameline(line):
+        raise BadData('first {} lines: no field names found'.format(limit))
+
+    plan = project(Schema.fromline(line).plan())
+    yield plan.target.line()
+    pick = _picker(plan)
+
+    for line in lines:
+        if line.startswith(b'<'):
+            if not isnameline(line):
+                yield line
+        elif not line.isspace():
+            yield line if pick is None else pick(line)
+
+def _picker(plan):
+    '''Return the function of plan that maps a token line, or None for
+    the identity plan, which ships the lines as they are.
+
+    '''
+
+    return None if plan.isidentity() else plan.maker()
+
+class Schema:
+    '''Field names in order and an index of their positions.'''
+
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.index = { name : k for k, name in enumerate(self.names) }
+        if len(self.index) < len(self.names):
+            raise BadData('duplicate names: {}'
+                          .format(b' '.join(self.names).decode('UTF-8')))
+
+    @classmethod
+    def fromline(cls, line, *, required = ()):
+        '''Parse a name line (bytes) into a Schema.'''
+        return cls(parsenameline(line, required = required))
+
+    def line(self):
+        '''Return the name line (bytes) of the schema.'''
+        return makenameline(self.names)
+
+    def position(self, name):
+        '''Return the position of name, or raise BadData.'''
+        if name not in self.index:
+            raise BadData('no such name: {}: {}'
+                          .format(name.decode('UTF-8'),
+                                  b' '.join(self.names).decode('UTF-8')))
+        return self.index[name]
+
+    def plan(self):
+        '''Return the identity Plan from this schema.'''
+        return Plan(self, self, tuple(range(len(self.names))))
+
+    def __eq__(self, other):
+        return isinstance(other, Schema) and self.names == other.names
+
+    def __hash__(self):
+        return hash(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return 'Schema({!r})'.format(list(self.names))
+
+class Plan:
+    '''Map the fields of a source Schema to those of a target Schema,
+    each target field being either a source field at a position (int)
+    in ix or a fixed value (bytes) in ix.
+
+    Each projection method returns a new Plan that applies this plan
+    and then the projection to its target fields.
+
+    '''
+
+    __slots__ = ('source', 'target', 'ix')
+
+    def __init__(self, source, target, ix):
+        self.source = source
+        self.target = target
+        self.ix = tuple(ix)
+
+    def _then(self, names, ix):
+        # ix in terms of self.target to ix in terms of self.source
+        return Plan(self.source, Schema(names),
+                    ( self.ix[k] if isinstance(k, int) else k
+                      for k in ix ))
+
+    def keep(self, names):
+        '''Keep the named fields in the given order. One REST in names
+        stands for the fields not named, in their order.
+
+        '''
+        names = list(names)
+        if names.count(REST) > 1:
+            raise BadData('more than one rest')
+        for name in names:
+            if name != REST: self.target.position(name)
+        if len(set(names)) < len(names):
+            raise BadData('duplicates')
+        if REST in names:
+            k = names.index(REST)
+            names[k:k + 1] = ( name for name in self.target.names
+                               if name not in names )
+        if not names:
+            raise BadData('must keep some of the fields: {}'
+                          .format(b' '.join(self.target.names)
+                                  .decode('UTF-8')))
+        return self._then(names, map(self.target.position, names))
+
+    def drop(self, names):
+        '''Drop the named fields.'''
+        drop = set(names)
+        for name in drop: self.target.position(name)
+        keep = [ name for name in self.target.names if name not in drop ]
+        if not keep:
+            raise BadData('not allowed to drop all fields')
+        return self._then(keep, map(self.target.position, keep))
+
+    def insert(self, names, *, after = None, value = b'_'):
+        '''Insert new fields, with the given value, after the named
+        field, or after the last field.
+
+        '''
+        old = self.target.names
+        at = len(old) if after is None else self.target.position(after) + 1
+        bare = set(name.rstrip(b'/') for name in old)
+        bad = [ name for name in names if name.rstrip(b'/') in bare ]
+        if bad:
+            raise BadData('new names already in names: {}'
+                          .format(b' '.join(bad).decode('UTF-8')))
+        if len(set(name.rstrip(b'/') for name in names)) < len(names):
+            raise BadData('duplicates in new names: {}'
+                          .format(b' '.join(names).decode('UTF-8')))
+        return self._then(chain(old[:at], names, old[at:]),
+                          chain(range(at), (value for name in names),
+                                range(at, len(old))))
+
+    def rename(self, mapping):
+        '''Rename fields by the mapping (a dict) from old to new.'''
+        for name in mapping: self.target.position(name)
+        return self._then(rename(self.target.names, mapping),
+                          range(len(self.target)))
+
+    def isidentity(self):
+        '''Whether every token line maps to itself.'''
+        return self.ix == tuple(range(len(self.source)))
+
+    def maker(self):
+        '''Return a function that maps a token line of the source schema
+        to a token line of the target schema. The line is split only as
+        far as the last source field that is used.
+
+        '''
+        if all(isinstance(k, int) for k in self.ix):
+            return picker(*self.ix)
+
+        # append the fixed values after the split fields and the rest
+        # of the line, which is always made to have n + 1 elements
+        used = [ k for k in self.ix if isinstance(k, int) ]
+        n = max(used) + 1 if used else 0
+        values = list(dict.fromkeys(k for k in self.ix
+                                    if isinstance(k, bytes)))
+        where = { value : n + 1 + j for j, value in enumerate(values) }
+        get = keeper(*( k if isinstance(k, int) else where[k]
+                        for k in self.ix ))
+
+        def make(line):
+            fields = line.split(b'\t', n)
+            if len(fields) <= n:
+                fields[-1] = fields[-1].rstrip(b'\r\n')
+                if len(fields) == n: fields.append(b'')
+            fields.extend(values)
+            return b'\t'.join(get(fields)) + b'\n'
+
+        return make
+
+    def __repr__(self):
+        return 'Plan({!r}, {!r}, {!r})'.format(self.source, self.target,
+                                              self.ix)
@@ -0,0 +1,315 @@
+'''Mergeable sketches of distributions that are too large to count
+exactly in memory, or that are to be combined across files.
+
+CountMin estimates the count of any item, HyperLogLog the number of
+distinct items, and TopK the most frequent items with their counts,
+each in a fixed amount of memory. Two sketches of the same size merge
+into the sketch of the combined input, so that a sketch can be made of
+each file of a corpus and the sketches merged later. The estimated
+counts are never less than the true counts.
+
+A Sketch is what hrt-stat-data and hrt-stat-meta save in a file for
+hrt-stat-merge: for each key (as an element and an attribute name),
+the distribution of the statistic, counted exactly as its values are
+few (lengths), and a Values sketch of the values (words, attribute
+values) that may be as many as there are in the vocabulary.
+
+'''
+
+from libvrt.bad import BadData
+
+from base64 import b64decode, b64encode
+from collections import Counter, defaultdict
+from hashlib import blake2b
+from heapq import nlargest
+from itertools import chain
+from operator import itemgetter
+import json, math, os
+
+FORMAT = 'hrt-stat sketch 1'
+
+# the counts of so many different items are kept exactly before they
+# are added to the sketches, so that each is hashed once per batch
+BATCH = 1 << 16
+
+def _hashes(item):
+    '''Return two independent 64-bit hashes of the str item, the same
+    in every process.
+
+    '''
+    digest = blake2b(item.encode('UTF-8', 'surrogatepass'),
+                     digest_size = 16).digest()
+    return (int.from_bytes(digest[:8], 'big'),
+            int.from_bytes(digest[8:], 'big'))
+
+def _mismatch(what, one, other):
+    if one != other:
+        raise BadData('cannot merge sketches of different {}: {} and {}'
+                      .format(what, one, other))
+
+class CountMin:
+    '''Counts of items in depth rows of width counters, each item
+    counted in one counter of each row. The estimate of a count is the
+    least of its counters.
+
+    '''
+
+    def __init__(self, width = 2048, depth = 4):
+        self.width = width
+        self.depth = depth
+        self.table = [ [0] * width for _ in range(depth) ]
+
+    def _cells(self, hashes):
+        h1, h2 = hashes
+        return ( (h1 + j * h2) % self.width for j in range(self.depth) )
+
+    def _add(self, hashes, count):
+        for row, cell in zip(self.table, self._cells(hashes)):
+            row[cell] += count
+
+    def add(self, item, count = 1):
+        self._add(_hashes(item), count)
+
+    def estimate(self, item):
+        return min(row[cell] for row, cell
+                   in zip(self.table, self._cells(_hashes(item))))
+
+    def merge(self, other):
+        _mismatch('count-min size',
+                  (self.width, self.depth),
+                  (other.width, other.depth))
+        for row, more in zip(self.table, other.table):
+            for cell, count in enumerate(more):
+                row[cell] += count
+
+    def state(self):
+        return dict(width = self.width,
+                    depth = self.depth,
+                    table = self.table)
+
+    @classmethod
+    def of(cls, state):
+        sketch = cls(state['width'], state['depth'])
+        sketch.table = state['table']
+        return sketch
+
+class HyperLogLog:
+    '''The number of distinct items, estimated from the longest runs of
+    zero bits seen in their hashes in 2 ** p registers (relative error
+    about 1.04 / sqrt(2 ** p)).
+
+    '''
+
+    def __init__(self, p = 14):
+        self.p = p
+        self.registers = bytearray(1 << p)
+
+    def _add(self, hashes):
+        h = hashes[0]
+        rest = 64 - self.p
+        j = h >> rest
+        rank = rest - (h & ((1 << rest) - 1)).bit_length() + 1
+        if rank > self.registers[j]:
+            self.registers[j] = rank
+
+    def add(self, item):
+        self._add(_hashes(item))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # linear counting is better for small numbers
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def merge(self, other):
+        _mismatch('hyperloglog size', self.p, other.p)
+        self.registers = bytearray(map(max, self.registers,
+                                       other.registers))
+
+    def state(self):
+        return dict(p = self.p,
+                    registers = b64encode(self.registers).decode('ASCII'))
+
+    @classmethod
+    def of(cls, state):
+        sketch = cls(state['p'])
+        sketch.registers = bytearray(b64decode(state['registers']))
+        return sketch
+
+class TopK:
+    '''The k items with the greatest counts, as far as known. An item
+    that is not among them has a count of at most floor, and the count
+    of an item among them is at most floor more than its true count.
+
+    '''
+
+    def __init__(self, k = 100):
+        self.k = k
+        self.counts = dict()
+        self.floor = 0
+
+    def update(self, counts, floor = 0):
+        '''Merge in the counts of items (as in a Counter), where any item
+        not in counts has a count of at most floor.
+
+        '''
+        combined = { item : (self.counts.get(item, self.floor) +
+                             counts.get(item, floor))
+                     for item in chain(self.counts, counts) }
+        top = nlargest(self.k + 1, combined.items(), key = itemgetter(1))
+        self.counts = dict(top[:self.k])
+        self.floor = max(self.floor + floor,
+                         top[self.k][1] if len(top) > self.k else 0)
+
+    def add(self, item, count = 1):
+        self.update({ item : count })
+
+    def merge(self, other):
+        _mismatch('top-k size', self.k, other.k)
+        self.update(other.counts, other.floor)
+
+    def state(self):
+        return dict(k = self.k,
+                    floor = self.floor,
+                    counts = sorted(self.counts.items()))
+
+    @classmethod
+    def of(cls, state):
+        sketch = cls(state['k'])
+        sketch.floor = state['floor']
+        sketch.counts = dict(map(tuple, state['counts']))
+        return sketch
+
+class Values:
+    '''CountMin, HyperLogLog and TopK of the same items (str), which are
+    counted exactly in batches of BATCH different items first.
+
+    '''
+
+    def __init__(self):
+        self.countmin = CountMin()
+        self.hyperloglog = HyperLogLog()
+        self.topk = TopK()
+        self.batch = Counter()
+
+    def update(self, items):
+        self.batch.update(items)
+        if len(self.batch) >= BATCH:
+            self.flush()
+
+    def flush(self):
+        for item, count in self.batch.items():
+            hashes = _hashes(item)
+            self.countmin._add(hashes, count)
+            self.hyperloglog._add(hashes)
+        self.topk.update(self.batch)
+        self.batch = Counter()
+
+    def distinct(self):
+        '''Return the estimated number of distinct items.'''
+        self.flush()
+        return self.hyperloglog.count()
+
+    def count(self, item):
+        '''Return the estimated count of item.'''
+        self.flush()
+        return self.countmin.estimate(item)
+
+    def top(self, n):
+        '''Return the n most frequent items, as far as known, with their
+        estimated counts, most frequent first.
+
+        '''
+        self.flush()
+        counts = ( (item, min(count, self.countmin.estimate(item)))
+                   for item, count in self.topk.counts.items() )
+        return sorted(counts, key = lambda pair: (-pair[1], pair[0]))[:n]
+
+    def merge(self, other):
+        self.flush()
+        other.flush()
+        self.countmin.merge(other.countmin)
+        self.hyperloglog.merge(other.hyperloglog)
+        self.topk.merge(other.topk)
+
+    def state(self):
+        self.flush()
+        return dict(countmin = self.countmin.state(),
+                    hyperloglog = self.hyperloglog.state(),
+                    topk = self.topk.state())
+
+    @classmethod
+    def of(cls, state):
+        sketch = cls()
+        sketch.countmin = CountMin.of(state['countmin'])
+        sketch.hyperloglog = HyperLogLog.of(state['hyperloglog'])
+        sketch.topk = TopK.of(state['topk'])
+        return sketch
+
+class Sketch:
+    '''The distribution of the statistic stat and a Values sketch of
+    the values for each key, a tuple of the key fields (as element and
+    attribute names), in a report of a tool.
+
+    '''
+
+    def __init__(self, tool, fields, stat):
+        self.tool = tool
+        self.fields = tuple(fields)
+        self.stat = stat
+        self.stats = defaultdict(Counter)
+        self.values = defaultdict(Values)
+
+    def observe(self, key, value):
+        '''Count value of the statistic.'''
+        self.stats[key][value] += 1
+
+    def add(self, key, items):
+        '''Add the values (str) of key.'''
+        self.values[key].update(items)
+
+    def merge(self, other):
+        _mismatch('tools', self.tool, other.tool)
+        _mismatch('statistics', self.stat, other.stat)
+        for key, counts in other.stats.items():
+            self.stats[key].update(counts)
+        for key, values in other.values.items():
+            self.values[key].merge(values)
+
+    def save(self, path):
+        '''Write the sketch in path, replacing the file at once.'''
+        keys = sorted(set(self.stats) | set(self.values))
+        temp = path + '.tmp'
+        with open(temp, mode = 'w', encoding = 'UTF-8') as out:
+            json.dump(dict(format = FORMAT,
+                           tool = self.tool,
+                           fields = self.fields,
+                           stat = self.stat,
+                           entries = [
+                               dict(key = key,
+                                    stats = sorted(self.stats[key].items()),
+                                    values = self.values[key].state())
+                               for key in keys
+                           ]),
+                      out)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding = 'UTF-8') as ins:
+            try:
+                data = json.load(ins)
+            except ValueError:
+                data = None
+        if not isinstance(data, dict) or data.get('format') != FORMAT:
+            raise BadData('not a sketch file: ' + path)
+        sketch = cls(data['tool'], data['fields'], data['stat'])
+        for entry in data['entries']:
+            key = tuple(entry['key'])
+            sketch.stats[key].update(dict(map(tuple, entry['stats'])))
+            sketch.values[key] = Values.of(entry['values'])
+        return sketch
@@ -0,0 +1,240 @@
+'''Tear long sentences into shreds and mend them back, as streaming
+transforms of VRT lines (bytes) that a tool can apply to its input
+and to its output, with the tear points kept aside in Tears instead
+of in-band markup (as the sen.ten.ce elements of vrt-simple-tear).
+
+A sentence of long or more tokens is torn into shreds of 3/5 of long
+tokens while the rest is long or more (as vrt-simple-tear tears at
+100 into shreds of 60). The first shred has the start tag of the
+sentence, the further shreds just <sentence>. A sentence with
+anything else than tokens in it is not torn.
+
+Tears are the number (from 0) of each torn sentence in the input and
+the number of tokens in each of its shreds. They can be kept in
+memory (for the mending of the output of an annotator that runs
+while the input is being torn), in a sidecar file (HEAD line,
+then a line "k size size ..." for each torn sentence), or in a
+comment line before the first shred of each torn sentence:
+
+<!-- #vrt torn: 60 60 45 -->
+
+tears = Tears()
+for line in mend(annotate(tear(ins, tears)), tears):
+    ...
+
+'''
+
+import re
+
+from libvrt.bad import BadData
+from libvrt.nameline import isnameline, parsenameline
+
+LONG = 100
+
+HEAD = b'VRT tears 1\n'
+COMMENT = b'<!-- #vrt torn: '
+
+_SIZES = re.compile(rb'<!-- #vrt torn: ([0-9 ]+) -->')
+
+class Tears:
+    '''The tears of a stream, appended in order as the stream is torn,
+    to be taken in order as it is mended.
+
+    '''
+
+    def __init__(self, tears = ()):
+        self.tears = list(tears) # (k, sizes)
+
+    def __len__(self):
+        return len(self.tears)
+
+    def append(self, k, sizes):
+        self.tears.append((k, tuple(sizes)))
+
+    def write(self, path):
+        '''Write the tears to a sidecar file at path.'''
+        with open(path, mode = 'wb') as out:
+            out.write(HEAD)
+            for k, sizes in self.tears:
+                out.write(b' '.join(b'%d' % n for n in (k, *sizes)))
+                out.write(b'\n')
+
+    @classmethod
+    def read(cls, path):
+        '''Return the tears in a sidecar file at path.'''
+        with open(path, mode = 'rb') as ins:
+            if ins.readline() != HEAD:
+                raise BadData('not a tears file: ' + path)
+            try:
+                return cls((int(k), tuple(map(int, sizes)))
+                           for k, *sizes in map(bytes.split, ins))
+            except ValueError:
+                raise BadData('bad tears file: ' + path)
+
+def shreds(records, long):
+    '''Return records (a list) torn into shreds of 3/5 of long while the
+    rest is at least long records long.
+
+    '''
+    size = max(1, 3 * long // 5)
+    torn = []
+    while len(records) >= long:
+        torn.append(records[:size])
+        records = records[size:]
+    if records:
+        torn.append(records)
+    return torn
+
+def mend_dependencies(shreds, *, ref, head, rel):
+    '''Return the token annotations (tuples) of a torn sentence, from
+    a list of the annotations of each shred, with the ref and the
+    non-zero head at the given positions renumbered to follow the
+    previous shred, and each root after the first with the relation
+    "root" made a "dep" of the first, as vrt-conllu-mend does.
+
+    '''
+    mended, step, root = [], 0, None
+    for shred in shreds:
+        for new in shred:
+            new = list(new)
+            new[ref] = b'%d' % (int(new[ref]) + step)
+            if new[head] != b'0':
+                new[head] = b'%d' % (int(new[head]) + step)
+            elif new[rel].lower() == b'root':
+                if root is None:
+                    root = new[ref]
+                else:
+                    new[head], new[rel] = root, b'dep'
+            mended.append(tuple(new))
+        if mended:
+            step = int(mended[-1][ref])
+    return mended
+
+def tear(lines, tears = None, *, long = LONG):
+    '''Yield the lines (bytes) with each sentence of long or more tokens
+    torn into shreds, appending the tears to tears (a Tears) before
+    the first shred is yielded, or yielding them in a comment line if
+    tears is None.
+
+    '''
+    k = 0
+    sentence = None
+    for line in lines:
+        if sentence is None:
+            if line.startswith((b'<sentence ', b'<sentence>')):
+                sentence = [line]
+            else:
+                yield line
+            continue
+
+        sentence.append(line)
+        if not line.startswith(b'</sentence>'):
+            continue
+
+        begin, *tokens, end = sentence
+        sentence = None
+        if (len(tokens) < long or
+            any(token.startswith(b'<') for token in tokens)):
+            yield begin
+            yield from tokens
+            yield end
+            k += 1
+            continue
+
+        torn = shreds(tokens, long)
+        sizes = [ len(shred) for shred in torn ]
+        if tears is None:
+            yield (COMMENT +
+                   b' '.join(b'%d' % size for size in sizes) +
+                   b' -->\n')
+        else:
+            tears.append(k, sizes)
+        for shred in torn:
+            yield begin
+            yield from shred
+            yield end
+            begin = b'<sentence>\n'
+        k += 1
+
+    if sentence is not None:
+        raise BadData('input stream ended in a sentence')
+
+def mend(lines, tears = None, *, ref = None, head = None, rel = None):
+    '''Yield the torn lines (bytes) mended, with the shreds of each torn
+    sentence in tears (a Tears, possibly still being appended to), or
+    in the comment lines if tears is None, joined back in one sentence
+    with the start tag of the first shred. Given the names of the ref,
+    head and rel attributes (bytes) that are in the positional
+    attributes, renumber the dependencies as in mend_dependencies.
+
+    '''
+    k = 0 # number of the next sentence before tearing
+    t = 0 # index of the next tear in tears
+    sizes = None # of the sentence being mended
+    begin, torn, shred = None, [], None
+    positions = None
+    for line in lines:
+        if isnameline(line) and None not in (ref, head, rel):
+            names = parsenameline(line)
+            positions = (tuple(names.index(name)
+                               for name in (ref, head, rel))
+                         if all(name in names for name in (ref, head, rel))
+                         else None)
+
+        if shred is not None:
+            # in a shred of a torn sentence
+            if line.startswith(b'</sentence>'):
+                torn.append(shred)
+                shred = None
+                if len(torn) == len(sizes):
+                    yield from _mended(begin, torn, sizes, line, positions)
+                    sizes, begin, torn = None, None, []
+            elif line.startswith(b'<'):
+                raise BadData('meta within a shred: {!r}'.format(line))
+            else:
+                shred.append(line)
+            continue
+
+        if line.startswith(COMMENT) and tears is None:
+            match = _SIZES.match(line)
+            if match is None:
+                raise BadData('bad torn comment: {!r}'.format(line))
+            sizes = tuple(map(int, match.group(1).split()))
+            continue
+
+        if line.startswith((b'<sentence ', b'<sentence>')):
+            if (sizes is None and tears is not None and
+                t < len(tears) and tears.tears[t][0] == k):
+                sizes = tears.tears[t][1]
+                t += 1
+            k += begin is None
+            if sizes is not None:
+                shred = []
+                if begin is None:
+                    begin = line
+                continue
+        elif sizes is not None and not line.isspace():
+            raise BadData('between shreds: {!r}'.format(line))
+
+        yield line
+
+    if sizes is not None:
+        raise BadData('input stream ended in a torn sentence')
+
+def _mended(begin, torn, sizes, end, positions):
+    '''Yield the lines of the mended sentence.'''
+    if tuple(map(len, torn)) != tuple(sizes):
+        raise BadData('shreds do not match the tears: {} tokens, not {}'
+                      .format(list(map(len, torn)), list(sizes)))
+    yield begin
+    if positions is None:
+        for shred in torn:
+            yield from shred
+    else:
+        ref, head, rel = positions
+        records = [ [ line.rstrip(b'\r\n').split(b'\t') for line in shred ]
+                    for shred in torn ]
+        for record in mend_dependencies(records,
+                                        ref = ref, head = head, rel = rel):
+            yield b'\t'.join(record) + b'\n'
+    yield end
@@ -4,7 +4,8 @@
 
 from libvrt.args import BadData, nat
 from libvrt.args import multiput_args
-from libvrt.args import transput
+from libvrt.check import Report, check_lines
+from libvrt.checkpoint import Checkpoint, flushed, truncate
 
 from libvrt.tools import hrt_check_utf8
 from libvrt.tools import hrt_check_meta
@@ -16,6 +17,9 @@ from libvrt.tools import hrt_check_bidi
 from libvrt.tools import hrt_check_shy
 
 from datetime import datetime as datetime
+from tempfile import mkstemp
+import os, sys
+
 def _secs(): return datetime.now().isoformat(' ', timespec = 'seconds')
 
 def parsearguments(argv, *, prog = None):
@@ -66,16 +70,62 @@ def parsearguments(argv, *, prog = None):
 
                         ''')
 
+    parser.add_argument('--checkpoint', metavar = 'SECS',
+                        type = nat,
+                        help = '''
+
+                        Save the state of the checks every SECS
+                        seconds in a sidecar file (the output files
+                        with extension .check.checkpoint) for
+                        --resume.
+
+                        ''')
+    parser.add_argument('--resume', action = 'store_true',
+                        help = '''
+
+                        Continue from the checkpoint of an earlier
+                        run that did not finish, if there is one
+                        (with the same options on the same input
+                        file), else start from the beginning.
+
+                        ''')
+
     args = parser.parse_args(argv)
     args.prog = prog or parser.prog
 
     return args
 
+# each check: module, name, output file extension, what it checks,
+# whether it has --limit, whether its report is written in binary
+CHECKS = (
+    (hrt_check_utf8, 'utf8', 'utf8',
+     'whether a line is UTF-8 at all', True, False),
+    (hrt_check_meta, 'meta', 'meta',
+     'whether structure lines are well-formed', False, True),
+    (hrt_check_control, 'control', 'ctl',
+     'whether there are control codes', True, False),
+    (hrt_check_nonchar, 'nonchar', 'non',
+     'whether there are noncharacter codes', True, False),
+    (hrt_check_private, 'private', 'priv',
+     'whether there are private codes', True, False),
+    (hrt_check_tags, 'tags', 'tag',
+     'whether there are tag (flag) codes', True, False),
+    (hrt_check_bidi, 'bidi', 'bidi',
+     'whether there are bidi codes', True, False),
+    (hrt_check_shy, 'shy', 'shy',
+     'whether there are soft hyphens', True, False),
+)
+
 def main(args, infile, outfile):
     '''Check HRT input file, direct reports to output files, as specified
     in args. Receives infile and outfile as strings, extends outfile
     with appropriate suffix for each output file.
 
+    All checks are run in one pass over the input file, each line read
+    and decoded once, and each report is written to a temporary file
+    that is renamed at the end. With checkpoints, the temporary files
+    are kept when the run fails, for --resume.
+
     '''
 
     # print('infile:', infile)
@@ -83,144 +133,94 @@ def main(args, infile, outfile):
 
     nolimit = [ '--no-limit' ] if args.no_limit else []
 
-    now = _secs()
-    args.quiet or print('{} -- {} (utf8)'.format(now, args.prog))
-    args.quiet or print('{} -- whether a line is UTF-8 at all'
-                        .format(now))
-    args.quiet or print('{} {}.utf8'.format(now, outfile))
-    transput(hrt_check_utf8.parsearguments
-             (
-                 [
-                     '--out', outfile + '.utf8',
-                     '--limit={}'.format(args.limit or 100),
-                     *nolimit,
-                     infile
-                 ],
-                 prog = '{} (utf8)'.format(args.prog)
-             ),
-             hrt_check_utf8.main,
-             in_as_text = False)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (meta)'.format(now, args.prog))
-    args.quiet or print('{} -- whether structure lines are well-formed'
-                        .format(now))
-    args.quiet or print('{} {}.meta'.format(now, outfile))
-    transput(hrt_check_meta.parsearguments
-             (
-                 [
-                     '--out', outfile + '.meta',
-                     # hrt-check-meta does not have --limit (yet?)
-                     # '--limit=100',
-                     infile
-                 ],
-                 prog = '{} (meta)'.format(args.prog)
-             ),
-             hrt_check_meta.main,
-             in_as_text = False,
-             out_as_text = False)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (control)'.format(now, args.prog))
-    args.quiet or print('{} -- whether there are control codes'
-                        .format(now))
-    args.quiet or print('{} {}.ctl'.format(now, outfile))
-    transput(hrt_check_control.parsearguments
-             (
-                 [
-                     '--out', outfile + '.ctl',
-                     '--limit={}'.format(args.limit or 100),
-                     *nolimit,
-                     infile
-                 ],
-                 prog = '{} (control)'.format(args.prog)
-             ),
-             hrt_check_control.main)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (nonchar)'.format(now, args.prog))
-    args.quiet or print('{} -- whether there are noncharacter codes'
-                        .format(now))
-    args.quiet or print('{} {}.non'.format(now, outfile))
-    transput(hrt_check_nonchar.parsearguments
-             (
-                 [
-                     '--out', outfile + '.non',
-                     '--limit={}'.format(args.limit or 100),
-                     *nolimit,
-                     infile
-                 ],
-                 prog = '{} (nonchar)'.format(args.prog)
-             ),
-             hrt_check_nonchar.main)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (private)'.format(now, args.prog))
-    args.quiet or print('{} -- whether there are private codes'
-                        .format(now))
-    args.quiet or print('{} {}.priv'.format(now, outfile))
-    transput(hrt_check_private.parsearguments
-             (
-                 [
-                     '--out', outfile + '.priv',
-                     '--limit={}'.format(args.limit or 100),
-                     *nolimit,
-                     infile
-                 ],
-                 prog = '{} (private)'.format(args.prog)
-             ),
-             hrt_check_private.main)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (tags)'.format(now, args.prog))
-    args.quiet or print('{} -- whether there are tag (flag) codes'
-                        .format(now))
-    args.quiet or print('{} {}.tag'.format(now, outfile))
-    transput(hrt_check_tags.parsearguments
-             (
-                 [
-                     '--out', outfile + '.tag',
-                     '--limit={}'.format(args.limit or 100),
-                     *nolimit,
-                     infile
-                 ],
-                 prog = '{} (tags)'.format(args.prog)
-             ),
-             hrt_check_tags.main)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (bidi)'.format(now, args.prog))
-    args.quiet or print('{} -- whether there are bidi codes'
-                        .format(now))
-    args.quiet or print('{} {}.bidi'.format(now, outfile))
-    transput(hrt_check_bidi.parsearguments
-             (
-                 [
-                     '--out', outfile + '.bidi',
-                     '--limit={}'.format(args.limit or 100),
-                     *nolimit,
-                     infile
-                 ],
-                 prog = '{} (bidi)'.format(args.prog)
-             ),
-             hrt_check_bidi.main)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (shy)'.format(now, args.prog))
-    args.quiet or print('{} -- whether there are soft hyphens'
-                        .format(now))
-    args.quiet or print('{} {}.shy'.format(now, outfile))
-    transput(hrt_check_shy.parsearguments
-             (
-                 [
-                     '--out', outfile + '.shy',
-                     '--limit={}'.format(args.limit or 100),
-                     *nolimit,
-                     infile
-                 ],
-                 prog = '{} (shy)'.format(args.prog)
-             ),
-             hrt_check_shy.main)
+    outfiles = [ '{}.{}'.format(outfile, ext)
+                 for module, name, ext, what, limited, binary in CHECKS ]
+    for path in outfiles:
+        if os.path.exists(path):
+            print('{}: output file must not exist: {}'
+                  .format(args.prog, path),
+                  file = sys.stderr)
+            exit(1)
+
+    checkpoint = ( Checkpoint('{}.check.checkpoint'.format(outfile),
+                              infile,
+                              ('hrt-check', args.limit, args.no_limit,
+                               args.info),
+                              every = args.checkpoint)
+                   if args.checkpoint or args.resume else
+                   None )
+    resumed = checkpoint.load() if args.resume else None
+    if resumed is not None:
+        args.quiet or print('{} -- {} (resuming at line {})'
+                            .format(_secs(), args.prog, resumed['k'] + 1))
+
+    checks, temps = [], []
+    try:
+        for j, ((module, name, ext, what, limited, binary), path) in (
+                enumerate(zip(CHECKS, outfiles))):
+            now = _secs()
+            args.quiet or print('{} -- {} ({})'.format(now, args.prog, name))
+            args.quiet or print('{} -- {}'.format(now, what))
+            args.quiet or print('{} {}'.format(now, path))
+            checkargs = module.parsearguments(
+                [
+                    '--out', path,
+                    *(( '--limit={}'.format(args.limit or 100),
+                        *nolimit )
+                      if limited else ()),
+                    infile
+                ],
+                prog = '{} ({})'.format(args.prog, name))
+
+            if resumed is None:
+                head, tail = os.path.split(path)
+                fd, temp = mkstemp(dir = head, prefix = tail + '.',
+                                   suffix = '.tmp')
+            else:
+                # continue the report after the checkpoint
+                temp = resumed['temps'][j]
+                truncate(temp, resumed['sizes'][j])
+                fd = os.open(temp, os.O_WRONLY | os.O_APPEND)
+            temps.append(temp)
+            ous = (open(fd, mode = 'wb')
+                   if binary else
+                   open(fd, mode = 'w', encoding = 'UTF-8'))
+            checks.append((module.Check(checkargs,
+                                        Report(ous, binary = binary,
+                                               head = resumed is None)),
+                           ous))
+
+        def save(state):
+            if checkpoint.due():
+                checkpoint.save(dict(state(),
+                                     temps = temps,
+                                     sizes = flushed(*( ous for check, ous
+                                                        in checks ))))
+
+        now = _secs()
+        args.quiet or print('{} -- {} (reading {})'
+                            .format(now, args.prog, infile))
+        with open(infile, mode = 'rb') as ins:
+            check_lines(ins, [ check for check, ous in checks ],
+                        state = resumed,
+                        checkpoint = checkpoint and save)
+
+        for check, ous in checks:
+            ous.close()
+        for temp, path in zip(temps, outfiles):
+            os.rename(temp, path)
+        checkpoint and checkpoint.remove()
+    except KeyboardInterrupt:
+        print(args.prog + ': keyboard interrupt', file = sys.stderr)
+        args.checkpoint or resumed or cleanup(temps)
+        exit(1)
+    except BaseException:
+        args.checkpoint or resumed or cleanup(temps)
+        raise
 
     now = _secs()
     args.quiet or print('{} -- {} (done)'.format(now, args.prog))
+
+def cleanup(temps):
+    for temp in temps:
+        if os.path.exists(temp): os.remove(temp)
@@ -8,8 +8,7 @@ https://en.wikipedia.org/wiki/Bidirectional_text
 
 from libvrt.args import BadData, nat
 from libvrt.args import transput_args
-from libvrt.check import setup_text
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -64,28 +63,41 @@ def main(args, ins, ous):
 
     '''
 
-    setup_text(ous)
+    check_each(ins, Check(args, Report(ous, binary = False)))
 
-    # The characters themselves are valid in a regex range.
-    BIDI = ''.join(('[', *sorted(bidicode.keys()), ']'))
-    
-    occurrences = 0
-    for k, line in enumerate(ins, start = 1):
-        hits = re.findall(BIDI, line)
-        if not hits: continue
+class Check:
+    '''Check for explicit BiDi codes in each line (str).'''
 
-        for hit in hits:
-            occurrences += 1
-            warn(k, 'code', 'U+{:X} {}'
-                 .format(ord(hit), bidicode[hit]))
+    text = True
+
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+        self.occurrences = 0
 
-        if occurrences >= args.limit and not args.no_limit:
-            warn(0, 'code',
-                 'stopped checking at {}'.format(args.limit))
-            return
+        # The characters themselves are valid in a regex range.
+        self.BIDI = re.compile(''.join(('[', *sorted(bidicode.keys()),
+                                         ']')))
+        self.chars = self.BIDI
 
-    if args.info and not occurrences:
-        info(0, 'code', 'no explicit BiDi codes')
+    def line(self, k, line):
+        hits = self.BIDI.findall(line)
+        if not hits: return
+
+        for hit in hits:
+            self.occurrences += 1
+            self.report.warn(k, 'code', 'U+{:X} {}'
+                             .format(ord(hit), bidicode[hit]))
+
+        if self.occurrences >= self.args.limit and not self.args.no_limit:
+            self.report.warn(0, 'code',
+                             'stopped checking at {}'
+                             .format(self.args.limit))
+            return True
+
+    def end(self):
+        if self.args.info and not self.occurrences:
+            self.report.info(0, 'code', 'no explicit BiDi codes')
 
 bidicode = {
     '\u016C' : 'ARABIC LETTER MARK (ALM)',
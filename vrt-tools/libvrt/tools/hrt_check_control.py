@@ -4,8 +4,7 @@
 
 from libvrt.args import BadData, nat
 from libvrt.args import transput_args
-from libvrt.check import setup_text
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -59,25 +58,36 @@ def main(args, ins, ous):
 
     '''
 
-    setup_text(ous)
+    check_each(ins, Check(args, Report(ous, binary = False)))
 
-    # the characters themselves are valid in a regex
-    CONTROLS = ''.join(('[', *sorted(tables), ']'))
+class Check:
+    '''Check for control codes in each line (str).'''
 
-    failures = 0
-    for k, line in enumerate(ins, start = 1):
-        hits = re.findall(CONTROLS, line)
-        if not hits: continue
+    text = True
+
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+        self.failures = 0
+
+        # the characters themselves are valid in a regex
+        self.CONTROLS = re.compile(''.join(('[', *sorted(tables), ']')))
+        self.chars = self.CONTROLS
+
+    def line(self, k, line):
+        hits = self.CONTROLS.findall(line)
+        if not hits: return
 
         for hit in hits:
-            error(k, 'code', tables[hit])
+            self.report.error(k, 'code', tables[hit])
 
-        failures += 1
-        if failures >= args.limit and not args.no_limit:
-            return
+        self.failures += 1
+        return self.failures >= self.args.limit and not self.args.no_limit
 
-    if args.info and not failures:
-        info(0, 'code', 'no spurious control (C0, DEL, C1) codes')
+    def end(self):
+        if self.args.info and not self.failures:
+            self.report.info(0, 'code',
+                             'no spurious control (C0, DEL, C1) codes')
 
 tables = {
     # C0 and DEL adapted from Linux programmer's manual, ASCII(7)
@@ -4,8 +4,7 @@
 
 from libvrt.args import BadData
 from libvrt.args import transput_args
-from libvrt.check import setup_binary
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -35,33 +34,46 @@ def main(args, ins, ous):
 
     '''
 
-    setup_binary(ous)
+    check_each(ins, Check(args, Report(ous, binary = True)))
+
+class Check:
+    '''Check the start tags in each line (bytes).'''
+
+    text = False
 
     META = br'<[a-z._]+(\s+[a-z._][a-z0-9._]+/?="[^"]*")*>\r?\n?'
-    for k, line in enumerate(ins, start = 1):
+
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+
+    def line(self, k, line):
         if (line.startswith(b'<') and
             not line.startswith(b'</')):
 
-            if not re.fullmatch(META, line):
-                error(k, b'meta', b'malformed start tag')
-                continue
+            if not re.fullmatch(self.META, line):
+                self.report.error(k, b'meta', b'malformed start tag')
+                return
 
             name = re.match(b'<([a-z._]+)', line).group(1)
-            check_name(args, ous, line, name)
+            check_name(self.args, self.report, line, name)
 
             attr = re.findall(br'(\S+)="(.*?)"', line)
-            check_attr(args, ous, line, name, attr)
-            
+            check_attr(self.args, self.report, line, name, attr)
+
             # print('name:', name)
             # print('attr:', attr)
 
-def check_name(args, ous, line, name):
+    def end(self):
+        pass
+
+def check_name(args, report, line, name):
     if name not in (b'text', b'paragraph'):
-        warn(line, b'meta',
-             b' '.join((b'unexpected element name:',
-                        name)))
+        report.warn(line, b'meta',
+                    b' '.join((b'unexpected element name:',
+                               name)))
 
-def check_attr(args, ous, line, name, attr):
+def check_attr(args, report, line, name, attr):
     # to check no duplicate names
     # to check no < > in values
     # to check order of names
@@ -11,8 +11,7 @@ characters, and yes, it spells "noncharacter" without a hyphen.)
 
 from libvrt.args import BadData, nat
 from libvrt.args import transput_args
-from libvrt.check import setup_text
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -63,33 +62,46 @@ def main(args, ins, ous):
 
     '''
 
-    setup_text(ous)
+    check_each(ins, Check(args, Report(ous, binary = False)))
+
+class Check:
+    '''Check for noncharacters in each line (str).'''
+
+    text = True
 
     # The characters themselves are valid in a regex range; the last
     # two code points in any plane are "noncharacters", and there is
     # also a contiguous block of 32 noncharacter in BMP.
 
-    NONS = ''.join(('[',
-                    '\uFDD0-\uFDEF',         # block of 32 in BMP
-                    '\uFFFE\uFFFF',          # last two of BMP
-                    *( '{}{}'.format(chr((plane << 16) + 0xFFFE),
-                                     chr((plane << 16) + 0xFFFF))
-                       for plane in range(1, 17)),
-                    ']'))
+    NONS = re.compile(''.join(('[',
+                               '\uFDD0-\uFDEF',         # block of 32 in BMP
+                               '\uFFFE\uFFFF',          # last two of BMP
+                               *( '{}{}'.format(chr((plane << 16) + 0xFFFE),
+                                                chr((plane << 16) + 0xFFFF))
+                                  for plane in range(1, 17)),
+                               ']')))
+    chars = NONS
 
-    failures = 0
-    for k, line in enumerate(ins, start = 1):
-        hits = re.findall(NONS, line)
-        if not hits: continue
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+        self.failures = 0
 
-        for hit in hits:
-            error(k, 'code', 'noncharacter U+{:04X}'.format(ord(hit)))
+    def line(self, k, line):
+        hits = self.NONS.findall(line)
+        if not hits: return
 
-        failures += 1
-        if failures >= args.limit and not args.no_limit:
-            error(0, 'code',
-                  'stopped checking at {}'.format(args.limit))
-            return
-
-    if args.info and not failures:
-        info(0, 'code', 'no noncharacters')
+        for hit in hits:
+            self.report.error(k, 'code',
+                              'noncharacter U+{:04X}'.format(ord(hit)))
+
+        self.failures += 1
+        if self.failures >= self.args.limit and not self.args.no_limit:
+            self.report.error(0, 'code',
+                              'stopped checking at {}'
+                              .format(self.args.limit))
+            return True
+
+    def end(self):
+        if self.args.info and not self.failures:
+            self.report.info(0, 'code', 'no noncharacters')
@@ -8,8 +8,7 @@ https://en.wikipedia.org/wiki/Private_Use_Areas
 
 from libvrt.args import BadData, nat
 from libvrt.args import transput_args
-from libvrt.check import setup_text
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -62,31 +61,44 @@ def main(args, ins, ous):
 
     '''
 
-    setup_text(ous)
+    check_each(ins, Check(args, Report(ous, binary = False)))
+
+class Check:
+    '''Check for private-use codes in each line (str).'''
+
+    text = True
 
     # the characters themselves are valid in a regex range; the last
     # two code points in a plane are "non-characters" and excluded
     # from the supplementary PUA-A and PUA-B "private" ranges.
 
-    PRIVATES = ''.join(('[',
-                        '\ue000-\uF8FF',         # BMP PUA
-                        '\U000F0000-\U000FFFFD', # PUA-A
-                        '\U00100000-\U0010FFFD', # PUA-B
-                        ']'))
+    PRIVATES = re.compile(''.join(('[',
+                                   '\ue000-\uF8FF',         # BMP PUA
+                                   '\U000F0000-\U000FFFFD', # PUA-A
+                                   '\U00100000-\U0010FFFD', # PUA-B
+                                   ']')))
+    chars = PRIVATES
 
-    failures = 0
-    for k, line in enumerate(ins, start = 1):
-        hits = re.findall(PRIVATES, line)
-        if not hits: continue
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+        self.failures = 0
 
-        for hit in hits:
-            error(k, 'code', 'private U+{:X}'.format(ord(hit)))
+    def line(self, k, line):
+        hits = self.PRIVATES.findall(line)
+        if not hits: return
 
-        failures += 1
-        if failures >= args.limit and not args.no_limit:
-            error(0, 'code',
-                  'stopped checking at {}'.format(args.limit))
-            return
-
-    if args.info and not failures:
-        info(0, 'code', 'no private (BMP PUA; PUA-A, PUA-B) codes')
+        for hit in hits:
+            self.report.error(k, 'code', 'private U+{:X}'.format(ord(hit)))
+
+        self.failures += 1
+        if self.failures >= self.args.limit and not self.args.no_limit:
+            self.report.error(0, 'code',
+                              'stopped checking at {}'
+                              .format(self.args.limit))
+            return True
+
+    def end(self):
+        if self.args.info and not self.failures:
+            self.report.info(0, 'code',
+                             'no private (BMP PUA; PUA-A, PUA-B) codes')
@@ -8,8 +8,7 @@ https://en.wikipedia.org/wiki/Soft_hyphen
 
 from libvrt.args import BadData, nat
 from libvrt.args import transput_args
-from libvrt.check import setup_text
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -60,21 +59,36 @@ def main(args, ins, ous):
 
     '''
 
-    setup_text(ous)
+    check_each(ins, Check(args, Report(ous, binary = False)))
 
-    occurrences = 0
-    for k, line in enumerate(ins, start = 1):
-        hits = re.findall('\xAD', line)
-        if not hits: continue
+class Check:
+    '''Check for soft hyphens in each line (str).'''
 
-        for hit in hits:
-            occurrences += 1
-            warn(k, 'code', 'U+{:04X} SOFT HYPHEN'.format(ord(hit)))
+    text = True
+
+    SHY = re.compile('\xAD')
+    chars = SHY
 
-        if occurrences >= args.limit and not args.no_limit:
-            warn(0, 'code',
-                 'stopped checking at {}'.format(args.limit))
-            return
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+        self.occurrences = 0
 
-    if args.info and not occurrences:
-        info(0, 'code', 'no occurrences of SOFT HYPHEN')
+    def line(self, k, line):
+        hits = self.SHY.findall(line)
+        if not hits: return
+
+        for hit in hits:
+            self.occurrences += 1
+            self.report.warn(k, 'code',
+                             'U+{:04X} SOFT HYPHEN'.format(ord(hit)))
+
+        if self.occurrences >= self.args.limit and not self.args.no_limit:
+            self.report.warn(0, 'code',
+                             'stopped checking at {}'
+                             .format(self.args.limit))
+            return True
+
+    def end(self):
+        if self.args.info and not self.occurrences:
+            self.report.info(0, 'code', 'no occurrences of SOFT HYPHEN')
@@ -8,8 +8,7 @@ https://en.wikipedia.org/wiki/Tags_(Unicode_block)
 
 from libvrt.args import BadData, nat
 from libvrt.args import transput_args
-from libvrt.check import setup_text
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -66,7 +65,12 @@ def main(args, ins, ous):
 
     '''
 
-    setup_text(ous)
+    check_each(ins, Check(args, Report(ous, binary = False)))
+
+class Check:
+    '''Check for Unicode tags in each line (str).'''
+
+    text = True
 
     # The characters themselves are valid in a regex range. The block
     # mirrors ASCII, with codes U+0000-U+001F reserved but unused with
@@ -76,36 +80,44 @@ def main(args, ins, ous):
     # (Turns out the first examples found were correct!)
 
     FLAG = '\U0001F3F4'
-    TAGS = ( '[{}\U000E0000-\U000E007F]'
-             .format(FLAG if args.info else '')
-             # FLAG is actually not a "tag" at all,
-             # but tags are intended to modify FLAG
-    )
 
-    failures = 0
-    for k, line in enumerate(ins, start = 1):
-        hits = re.findall(TAGS, line)
-        if not hits: continue
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+        self.failures = 0
+
+        self.TAGS = re.compile( '[{}\U000E0000-\U000E007F]'
+                                .format(self.FLAG if args.info else '')
+                                # FLAG is actually not a "tag" at all,
+                                # but tags are intended to modify FLAG
+        )
+        self.chars = self.TAGS
+
+    def line(self, k, line):
+        hits = self.TAGS.findall(line)
+        if not hits: return
 
         for hit in hits:
-            if hit == FLAG:
+            if hit == self.FLAG:
                 # FLAG can be a hit only when args.info;
                 # flags *should* follow FLAG,
                 # ending with U+E007F.
-                info(k, 'code', 'U+{:X} WAVING BLACK FLAG'
-                     .format(ord(hit)))
+                self.report.info(k, 'code', 'U+{:X} WAVING BLACK FLAG'
+                                 .format(ord(hit)))
                 continue
-            warn(k, 'code', 'tag U+{:X} ({})'
-                 .format(ord(hit), ascii[hit]))
-
-        failures += 1
-        if failures >= args.limit and not args.no_limit:
-            error(0, 'code',
-                  'stopped checking at {}'.format(args.limit))
-            return
-
-    if args.info and not failures:
-        info(0, 'code', 'no Unicode "tag" codes')
+            self.report.warn(k, 'code', 'tag U+{:X} ({})'
+                             .format(ord(hit), ascii[hit]))
+
+        self.failures += 1
+        if self.failures >= self.args.limit and not self.args.no_limit:
+            self.report.error(0, 'code',
+                              'stopped checking at {}'
+                              .format(self.args.limit))
+            return True
+
+    def end(self):
+        if self.args.info and not self.failures:
+            self.report.info(0, 'code', 'no Unicode "tag" codes')
 
 ascii = {
     '\U000E0000' : '^@',
@@ -4,8 +4,7 @@
 
 from libvrt.args import BadData, nat
 from libvrt.args import transput_args
-from libvrt.check import setup_text
-from libvrt.check import error, warn, info
+from libvrt.check import Report, check_each
 
 import re
 
@@ -57,20 +56,29 @@ def main(args, ins, ous):
 
     '''
 
-    setup_text(ous)
+    check_each(ins, Check(args, Report(ous, binary = False)))
 
-    failures = 0
-    for k, line in enumerate(ins, start = 1):
+class Check:
+    '''Check that each line (bytes) decodes as UTF-8.'''
+
+    text = False
+
+    def __init__(self, args, report):
+        self.args = args
+        self.report = report
+        self.failures = 0
+
+    def line(self, k, line):
         try:
-            text = line.decode('UTF-8')
+            line.decode('UTF-8')
         except UnicodeDecodeError as exn:
-            error(k, 'code', 'failed to decode line as UTF-8')
-            failures += 1
+            self.report.error(k, 'code', 'failed to decode line as UTF-8')
+            self.failures += 1
 
-        if failures >= args.limit and not args.no_limit:
-            error(k, 'code', 'stop at {}'.format(failures))
-            return
+        if self.failures >= self.args.limit and not self.args.no_limit:
+            self.report.error(k, 'code', 'stop at {}'.format(self.failures))
+            return True
 
-    if args.info and not failures:
-        info(0, 'code', 'every line decoded as UTF-8')
-    
+    def end(self):
+        if self.args.info and not self.failures:
+            self.report.info(0, 'code', 'every line decoded as UTF-8')
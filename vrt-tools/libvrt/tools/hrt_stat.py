@@ -5,11 +5,14 @@
 from libvrt.args import BadData, nat
 from libvrt.args import multiput_args
 from libvrt.args import transput
+from libvrt.checkpoint import Checkpoint, Reading
 
 from libvrt.tools import hrt_stat_meta
 from libvrt.tools import hrt_stat_data
 
 from datetime import datetime as datetime
+from glob import escape, glob
+import os
 def _secs(): return datetime.now().isoformat(' ', timespec = 'seconds')
 
 def parsearguments(argv, *, prog = None):
@@ -30,101 +33,120 @@ def parsearguments(argv, *, prog = None):
 
                         ''')
 
+    parser.add_argument('--sketch', action = 'store_true',
+                        help = '''
+
+                        also save the sketches of each statistic and
+                        of the values (output files with extension
+                        .sketch) for hrt-stat-merge
+
+                        ''')
+
+    parser.add_argument('--checkpoint', metavar = 'SECS',
+                        type = nat,
+                        help = '''
+
+                        Save the state of the statistic being computed
+                        every SECS seconds in a sidecar file (the
+                        output files with extension .stat.checkpoint)
+                        for --resume.
+
+                        ''')
+    parser.add_argument('--resume', action = 'store_true',
+                        help = '''
+
+                        Continue from the checkpoint of an earlier
+                        run that did not finish, if there is one (on
+                        the same input file and with the same
+                        --sketch), skipping the statistics that are
+                        done (with their sketches if --sketch), else
+                        start from the beginning.
+
+                        ''')
+
     args = parser.parse_args(argv)
     args.prog = prog or parser.prog
 
     return args
 
+# each statistic: module, name, what it is, output file extension,
+# options to the module
+STATS = (
+    (hrt_stat_meta, 'meta len',
+     'length of each attribute value in code points',
+     'meta.len', ['--len', '--sum=h5']),
+    (hrt_stat_meta, 'meta maxw',
+     'longest word-code-run in each attribute',
+     'meta.maxw', ['--max=w', '--sum=h5']),
+    (hrt_stat_data, 'data len',
+     'length of each paragraph in code points',
+     'data.len', ['--len', '--sum=h5']),
+    (hrt_stat_data, 'data maxw',
+     'longest word-code-run in each paragraph',
+     'data.maxw', ['--max=w', '--sum=h5']),
+    (hrt_stat_data, 'data maxnw',
+     'longest non-word-code-run in each paragraph',
+     'data.maxnw', ['--max=W', '--sum=h5']),
+)
+
 def main(args, infile, outfile):
     '''Direct statistic reports on the HRT in infile to output files with
     names obtained by extending the outfile with appropriate suffixes.
 
-    '''
-
-    now = _secs()
-    args.quiet or print('{} -- {} (meta len)'.format(now, args.prog))
-    args.quiet or print('{} -- length of each attribute value in code points'
-                        .format(now))
-    args.quiet or print('{} {}.meta.len'.format(now, outfile))
-    transput(hrt_stat_meta.parsearguments
-             (
-                 [
-                     '--out', outfile + '.meta.len',
-                     '--len',
-                     '--sum=h5',
-                     infile
-                 ],
-                 prog = '{} (meta len)'.format(args.prog)
-             ),
-             hrt_stat_meta.main)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (meta maxw)'.format(now, args.prog))
-    args.quiet or print('{} -- longest word-code-run in each attribute'
-                        .format(now))
-    args.quiet or print('{} {}.meta.maxw'.format(now, outfile))
-    transput(hrt_stat_meta.parsearguments
-             (
-                 [
-                     '--out', outfile + '.meta.maxw',
-                     '--max=w',
-                     '--sum=h5',
-                     infile
-                 ],
-                 prog = '{} (meta maxw)'.format(args.prog)
-             ),
-             hrt_stat_meta.main)
-
-    now = _secs()
-    args.quiet or print('{} -- {} (data len)'.format(now, args.prog))
-    args.quiet or print('{} -- length of each paragraph in code points'
-                        .format(now))
-    args.quiet or print('{} {}.data.len'.format(now, outfile))
-    transput(hrt_stat_data.parsearguments
-             (
-                 [
-                     '--out', outfile + '.data.len',
-                     '--len',
-                     '--sum=h5',
-                     infile
-                 ],
-                 prog = '{} (data len)'.format(args.prog)
-             ),
-             hrt_stat_data.main)
+    With checkpoints, a statistic that was being computed when a run
+    failed continues from its last checkpoint on --resume, and the
+    statistics that were done are not computed again.
 
-    now = _secs()
-    args.quiet or print('{} -- {} (data maxw)'.format(now, args.prog))
-    args.quiet or print('{} -- longest word-code-run in each paragraph'
-                        .format(now))
-    args.quiet or print('{} {}.data.maxw'.format(now, outfile))
-    transput(hrt_stat_data.parsearguments
-             (
-                 [
-                     '--out', outfile + '.data.maxw',
-                     '--max=w',
-                     '--sum=h5',
-                     infile
-                 ],
-                 prog = '{} (data maxw)'.format(args.prog)
-             ),
-             hrt_stat_data.main)
+    '''
 
-    now = _secs()
-    args.quiet or print('{} -- {} (data maxnw)'.format(now, args.prog))
-    args.quiet or print('{} -- longest non-word-code-run in each paragraph'
-                        .format(now))
-    args.quiet or print('{} {}.data.maxnw'.format(now, outfile))
-    transput(hrt_stat_data.parsearguments
-             (
-                 [
-                     '--out', outfile + '.data.maxnw',
-                     '--max=W',
-                     '--sum=h5',
-                     infile
-                 ],
-                 prog = '{} (data maxnw)'.format(args.prog)
-             ),
-             hrt_stat_data.main)
+    checkpoint = ( Checkpoint('{}.stat.checkpoint'.format(outfile),
+                              infile,
+                              ('hrt-stat', args.sketch),
+                              every = args.checkpoint)
+                   if args.checkpoint or args.resume else
+                   None )
+    resumed = checkpoint.load() if args.resume else None
+
+    for stage, (module, name, what, ext, options) in enumerate(STATS):
+        path = '{}.{}'.format(outfile, ext)
+        done = [ path, path + '.sketch' ] if args.sketch else [ path ]
+        if args.resume and all(map(os.path.exists, done)):
+            # done in the earlier run
+            continue
+        if args.resume and os.path.exists(path):
+            # done in the earlier run without the sketch, so do again
+            os.remove(path)
+        if args.resume:
+            # temporary output left by the earlier run that was
+            # stopped while computing this statistic
+            for temp in glob(escape(path) + '.*.tmp'):
+                os.remove(temp)
+
+        now = _secs()
+        args.quiet or print('{} -- {} ({})'.format(now, args.prog, name))
+        args.quiet or print('{} -- {}'.format(now, what))
+        args.quiet or print('{} {}'.format(now, path))
+        statargs = module.parsearguments(
+            [
+                '--out', path,
+                *options,
+                *([ '--sketch', path + '.sketch' ] if args.sketch else []),
+                infile
+            ],
+            prog = '{} ({})'.format(args.prog, name))
+
+        if checkpoint is not None:
+            state = ( resumed['state']
+                      if resumed is not None and resumed['stage'] == stage
+                      else None )
+            if state is not None:
+                args.quiet or print('{} -- {} (resuming at line {})'
+                                    .format(now, args.prog, state['k'] + 1))
+            statargs.reading = Reading(checkpoint, stage, state)
+
+        transput(statargs, module.main)
+
+    checkpoint and checkpoint.remove()
 
     now = _secs()
     args.quiet or print('{} -- {} (done)'.format(now, args.prog))
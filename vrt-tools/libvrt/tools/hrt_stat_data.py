@@ -5,6 +5,7 @@
 from libvrt.args import BadCode, BadData
 from libvrt.args import nat
 from libvrt.args import transput_args
+from libvrt.sketch import Sketch
 from libvrt.stat import quant, sum_of_lengths, number_of_runs, max_length
 
 from collections import defaultdict, Counter
@@ -77,6 +78,17 @@ def parsearguments(argv, *, prog = None):
 
                         ''')
 
+    parser.add_argument('--sketch', metavar = 'FILE',
+                        help = '''
+
+                        also save the statistic and sketches of the
+                        words in the paragraphs (estimated counts,
+                        number of distinct words, most frequent
+                        words) in FILE, to be merged with those of
+                        other files with hrt-stat-merge
+
+                        ''')
+
     args = parser.parse_args(argv)
     args.prog = prog or parser.prog
 
@@ -99,26 +111,25 @@ def main(args, ins, ous):
 
     data = (pair for pair in find_data(args, ins))
     if args.length:
-        report_stats(data,
-                     len, 'len',
-                     args.summ, ous)
+        stat, what = len, 'len'
     elif args.num_such:
         regex = REX[args.num_such]
-        report_stats(data,
-                     sum_of_lengths(regex), 'num_' + args.num_such,
-                     args.summ, ous)
+        stat, what = sum_of_lengths(regex), 'num_' + args.num_such
     elif args.num_runs:
         regex = REX[args.num_runs]
-        report_stats(data,
-                     number_of_runs(regex), 'runs_' + args.num_runs,
-                     args.summ, ous)
+        stat, what = number_of_runs(regex), 'runs_' + args.num_runs
     elif args.max_length:
         regex = REX[args.max_length]
-        report_stats(data,
-                     max_length(regex), 'maxlen_' + args.max_length,
-                     args.summ, ous)
+        stat, what = max_length(regex), 'maxlen_' + args.max_length
     else:
         print('sorry, forgot to have a default stat', file = ous)
+        return
+
+    report_stats(data,
+                 stat, what,
+                 args.summ, ous,
+                 reading = getattr(args, 'reading', None),
+                 sketchfile = args.sketch)
 
 def find_data(args, ins):
     '''Yield each paragraph content block as a pair of the start tag line
@@ -126,8 +137,10 @@ def find_data(args, ins):
 
     '''
 
-    occurrences = 0
-    klines = enumerate(ins, start = 1)
+    # hrt-stat sets args.reading to continue from a checkpoint
+    reading = getattr(args, 'reading', None)
+    occurrences = reading.resumed('occurrences', 0) if reading else 0
+    klines = reading.lines(ins) if reading else enumerate(ins, start = 1)
     while True:
         k, line = next(klines, (None, None))
         if line is None:
@@ -140,6 +153,8 @@ def find_data(args, ins):
             if occurrences == args.limit:
                 return
 
+            reading and reading.at(occurrences = occurrences)
+
 def read_paragraph_lines(klines):
     '''Read numbered lines, yield each line until </paragraph>.'''
 
@@ -155,22 +170,45 @@ def read_paragraph_lines(klines):
         # as if the paragraph just ended
         return
 
-def report_stats(data, stat, what, summ, ous):
-    '''Report on stat(para) for each para in data.
+# the words sketched with --sketch
+WORD = re.compile(REX['w'])
+
+def report_stats(data, stat, what, summ, ous, *,
+                 reading = None, sketchfile = None):
+    '''Report on stat(para) for each para in data. The summary counts
+    (and sketch) are kept in the checkpoints of the reading, if any.
+    Also save a sketch of stat and the words in sketchfile, if any.
 
     '''
+    sketch = sketchfile and Sketch('hrt-stat-data', (), what)
+    if reading and sketch:
+        sketch = reading.resumed('sketch', sketch)
+        reading.keep(sketch = sketch)
+
     if summ:
-        mem = Counter()
+        mem = reading.resumed('mem', Counter()) if reading else Counter()
+        reading and reading.keep(mem = mem)
         for _, para in data:
-            mem[stat(para)] += 1
+            value = stat(para)
+            mem[value] += 1
+            if sketch:
+                sketch.observe((), value)
+                sketch.add((), WORD.findall(para))
         summarize(mem, summ, what, ous)
+        sketch and sketch.save(sketchfile)
         return
 
     # report each observation
 
     print('line', what, sep = '\t', file = ous)
     for line, para in data:
-        print(line, stat(para), sep = '\t', file = ous)
+        value = stat(para)
+        print(line, value, sep = '\t', file = ous)
+        if sketch:
+            sketch.observe((), value)
+            sketch.add((), WORD.findall(para))
+
+    sketch and sketch.save(sketchfile)
 
 def summarize(mem, summ, what, ous):
     head5 = ('min', 'lo', 'med', 'hi', 'max')
@@ -0,0 +1,140 @@
+# -*- mode: Python; -*-
+
+'''Implement hrt-stat-merge: merge the sketches that hrt-stat-data
+and hrt-stat-meta save with --sketch, of parts of a corpus, to a
+report on the whole corpus.
+
+'''
+
+from argparse import ArgumentParser
+from functools import reduce
+import sys
+
+from libvrt.bad import BadData
+from libvrt.sketch import Sketch
+from libvrt.tools import hrt_stat_data, hrt_stat_meta
+
+def parsearguments(argv, *, prog = None):
+
+    description = '''
+
+    Merge the sketches of a statistic and the values (words in
+    paragraphs, or attribute values) that hrt-stat-data --sketch or
+    hrt-stat-meta --sketch saved of parts of a corpus (say, of the
+    fragments of a packed corpus in the array jobs of game), and
+    report on all the parts. The summary of the statistic is exact, as
+    if computed in one pass over the parts; the number of distinct
+    values and the counts of values are estimates (the counts are
+    never less than the true counts). Only the sketches need to fit
+    in memory.
+
+    '''
+
+    parser = ArgumentParser(description = description, prog = prog)
+
+    parser.add_argument('infile', nargs = '+', metavar = 'file',
+                        help = 'sketch')
+
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--sum', dest = 'summ',
+                       default = None,
+                       choices = [ 'h5', 'v5', 'h11', 'v11', 'v101' ],
+                       help = '''
+
+                       summarize the statistic as hrt-stat-data and
+                       hrt-stat-meta do (default h5)
+
+                       ''')
+
+    group.add_argument('--top', metavar = 'N',
+                       type = int,
+                       help = '''
+
+                       report the N most frequent values (at most
+                       100, as far as known) with their estimated
+                       counts
+
+                       ''')
+
+    group.add_argument('--distinct', action = 'store_true',
+                       help = '''
+
+                       report the estimated number of distinct values
+
+                       ''')
+
+    group.add_argument('--count', metavar = 'value',
+                       action = 'append',
+                       help = '''
+
+                       report the estimated count of the value
+                       (repeat for more values)
+
+                       ''')
+
+    parser.add_argument('--sketch', metavar = 'FILE',
+                        help = '''
+
+                        also save the merged sketch in FILE, to be
+                        merged again with others
+
+                        ''')
+
+    parser.add_argument('--out', '-o', metavar = 'file',
+                        help = 'output file (stdout)')
+
+    args = parser.parse_args(argv)
+    args.prog = parser.prog
+
+    return args
+
+def main(args):
+    '''Merge the sketches and report. Return exit status.'''
+
+    def merged(sketch, path):
+        sketch.merge(Sketch.load(path))
+        return sketch
+
+    try:
+        sketch = reduce(merged, args.infile[1:],
+                        Sketch.load(args.infile[0]))
+    except (OSError, BadData) as exn:
+        print('{}: {}'.format(args.prog, exn), file = sys.stderr)
+        return 1
+
+    args.sketch and sketch.save(args.sketch)
+
+    with (open(args.out, mode = 'w', encoding = 'UTF-8')
+          if args.out else
+          open(sys.stdout.fileno(), mode = 'w', encoding = 'UTF-8',
+               closefd = False)) as ous:
+        report(args, sketch, ous)
+
+    return 0
+
+def report(args, sketch, ous):
+    fields = sketch.fields
+    keys = sorted(set(sketch.stats) | set(sketch.values))
+
+    if args.top is not None:
+        print(*fields, 'value', 'count', sep = '\t', file = ous)
+        for key in keys:
+            for value, count in sketch.values[key].top(args.top):
+                print(*key, value, count, sep = '\t', file = ous)
+    elif args.distinct:
+        print(*fields, 'distinct', sep = '\t', file = ous)
+        for key in keys:
+            print(*key, sketch.values[key].distinct(),
+                  sep = '\t', file = ous)
+    elif args.count:
+        print(*fields, 'value', 'count', sep = '\t', file = ous)
+        for key in keys:
+            for value in args.count:
+                print(*key, value, sketch.values[key].count(value),
+                      sep = '\t', file = ous)
+    elif sketch.tool == 'hrt-stat-meta':
+        hrt_stat_meta.summarize(sketch.stats, args.summ or 'h5',
+                                sketch.stat, ous)
+    elif sketch.stats:
+        hrt_stat_data.summarize(sketch.stats[()], args.summ or 'h5',
+                                sketch.stat, ous)
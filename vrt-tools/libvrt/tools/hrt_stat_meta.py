@@ -5,6 +5,7 @@
 from libvrt.args import BadCode, BadData
 from libvrt.args import nat
 from libvrt.args import transput_args
+from libvrt.sketch import Sketch
 from libvrt.stat import quant, sum_of_lengths, number_of_runs, max_length
 
 from collections import defaultdict, Counter
@@ -97,6 +98,17 @@ def parsearguments(argv, *, prog = None):
 
                         ''')
 
+    parser.add_argument('--sketch', metavar = 'FILE',
+                        help = '''
+
+                        also save the statistic and sketches of the
+                        values of each attribute (estimated counts,
+                        number of distinct values, most frequent
+                        values) in FILE, to be merged with those of
+                        other files with hrt-stat-merge
+
+                        ''')
+
     args = parser.parse_args(argv)
     args.prog = prog or parser.prog
 
@@ -119,26 +131,25 @@ def main(args, ins, ous):
 
     meta = (triple for triple in parse_meta(args, ins))
     if args.length:
-        report_stats(meta,
-                     len, 'len',
-                     args.summ, ous)
+        stat, what = len, 'len'
     elif args.num_such:
         regex = REX[args.num_such]
-        report_stats(meta,
-                     sum_of_lengths(regex), 'num_' + args.num_such,
-                     args.summ, ous)
+        stat, what = sum_of_lengths(regex), 'num_' + args.num_such
     elif args.num_runs:
         regex = REX[args.num_runs]
-        report_stats(meta,
-                     number_of_runs(regex), 'runs_' + args.num_runs,
-                     args.summ, ous)
+        stat, what = number_of_runs(regex), 'runs_' + args.num_runs
     elif args.max_length:
         regex = REX[args.max_length]
-        report_stats(meta,
-                     max_length(regex), 'maxlen_' + args.max_length,
-                     args.summ, ous)
+        stat, what = max_length(regex), 'maxlen_' + args.max_length
     else:
         print('sorry, forgot to have a default stat', file = ous)
+        return
+
+    report_stats(meta,
+                 stat, what,
+                 args.summ, ous,
+                 reading = getattr(args, 'reading', None),
+                 sketchfile = args.sketch)
 
 def parse_meta(args, ins):
     '''Yield each relevant meta line as a triple of the line number,
@@ -155,8 +166,11 @@ def parse_meta(args, ins):
     attri = set(name for name in
                 re.findall(r'\S+', ' '.join(args.attr).replace(',', ' ')))
 
-    occurrences = 0
-    for k, line in enumerate(ins, start = 1):
+    # hrt-stat sets args.reading to continue from a checkpoint
+    reading = getattr(args, 'reading', None)
+    occurrences = reading.resumed('occurrences', 0) if reading else 0
+    for k, line in (reading.lines(ins) if reading else
+                    enumerate(ins, start = 1)):
         mo = re.match('<([a-z._]+)', line)
         if not mo: continue
 
@@ -172,16 +186,34 @@ def parse_meta(args, ins):
         if occurrences == args.limit:
             return
 
-def report_stats(meta, stat, what, summ, ous):
-    '''Report on stat(value) for each attribute value in meta.
+        reading and reading.at(occurrences = occurrences)
+
+def report_stats(meta, stat, what, summ, ous, *,
+                 reading = None, sketchfile = None):
+    '''Report on stat(value) for each attribute value in meta. The
+    summary counts (and sketch) are kept in the checkpoints of the
+    reading, if any. Also save a sketch of stat and the values of
+    each attribute in sketchfile, if any.
 
     '''
+    sketch = sketchfile and Sketch('hrt-stat-meta', ('elem', 'attr'), what)
+    if reading and sketch:
+        sketch = reading.resumed('sketch', sketch)
+        reading.keep(sketch = sketch)
+
     if summ:
-        mem = defaultdict(Counter)
+        mem = ( reading.resumed('mem', defaultdict(Counter)) if reading
+                else defaultdict(Counter) )
+        reading and reading.keep(mem = mem)
         for _, elem, attr in meta:
             for key, val in attr.items():
-                mem[elem, key][stat(val)] += 1
+                value = stat(val)
+                mem[elem, key][value] += 1
+                if sketch:
+                    sketch.observe((elem, key), value)
+                    sketch.add((elem, key), (val,))
         summarize(mem, summ, what, ous)
+        sketch and sketch.save(sketchfile)
         return
 
     # report each observation
@@ -189,8 +221,14 @@ def report_stats(meta, stat, what, summ, ous):
     print('line', 'elem', 'attr', what, sep = '\t', file = ous)
     for line, elem, attr in meta:
         for key, val in attr.items():
-            print(line, elem, key, stat(val),
+            value = stat(val)
+            print(line, elem, key, value,
                   sep = '\t', file = ous)
+            if sketch:
+                sketch.observe((elem, key), value)
+                sketch.add((elem, key), (val,))
+
+    sketch and sketch.save(sketchfile)
 
 def summarize(mem, summ, what, ous):
     head5 = ('min', 'lo', 'med', 'hi', 'max')
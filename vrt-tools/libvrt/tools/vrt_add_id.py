@@ -19,7 +19,8 @@ from libvrt.groupargs import grouping_arg, grouped_arg
 
 from libvrt.metaname import nametype # need checked
 from libvrt.metaline import (
-    mapping, starttag, ismeta, isstarttag, isendtag, element, strescape)
+    mapping, parser, starttag, ismeta, isstarttag, isendtag, element,
+    strescape)
 
 from libvrt.strformatters import PartialFormatter
 from libvrt.strformatters import SubstitutingBytesFormatter
@@ -267,7 +268,7 @@ def parsearguments(argv, *, prog = None):
 
                        ''')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     args.prog = prog or parser.prog
     return process_args(args)
 
@@ -658,12 +659,16 @@ def add_default_formatspecs(format_, elem, default_formatspecs):
 
 def main(args, ins, ous):
     '''Transput VRT (bytes) in ins to VRT (bytes) in ous.'''
+    ous.writelines(process(args, ins))
+
+def process(args, ins):
+    '''Yield the lines of VRT (bytes) in ins with the ids added.'''
 
     # If args.optimize == True, check if the faster method in
-    # fast_main can be used: check the first instance of each type of
+    # fast_process can be used: check the first instance of each type of
     # element for not having an attribute with the name of the id
     # attribute, process the lines that far in this function and the
-    # rest in fast_main; otherwise, process all lines here.
+    # rest in fast_process; otherwise, process all lines here.
 
     # FIXME: Handle correctly recursively embedded (nested) elements.
     # Now if elem1 contains another elem1 and elem2 after the end of
@@ -698,6 +703,10 @@ def main(args, ins, ous):
     checked_elems = set()
     verbose = args.verbose
 
+    # Read-only attributes of elements that do not get an id, parsed
+    # with the attribute layout cached
+    parse = parser()
+
     for line in ins:
 
         if ismeta(line):
@@ -705,7 +714,8 @@ def main(args, ins, ous):
             elem_s = elem.decode('UTF-8')
 
             if isstarttag(line):
-                attrs = elem_attrs[elem_s] = mapping(line)
+                attrs = elem_attrs[elem_s] = (
+                    mapping(line) if elem in id_elem_names else parse(line))
 
                 if elem in id_elem_names:
                     # Element-specific options
@@ -724,9 +734,9 @@ def main(args, ins, ous):
                                 # checked, use the faster method for
                                 # this line and the rest of ins
                                 print_verbose(args, 'using the faster method')
-                                fast_main(args, chain([line], ins),
-                                          ous, id_elem_names, ids, idnums,
-                                          id_counts)
+                                yield from fast_process(
+                                    args, chain([line], ins),
+                                    id_elem_names, ids, idnums, id_counts)
                                 break
 
                     if (args.force or args.rename
@@ -756,7 +766,7 @@ def main(args, ins, ous):
                         raise BadData('element has id already')
                     line = starttag(elem, attrs, sort = args.sort)
 
-        ous.write(line)
+        yield line
 
     if check_optimize and verbose:
         # Some element types did not occur
@@ -770,10 +780,10 @@ def main(args, ins, ous):
                             for elem in id_elem_names_list)
     print_verbose(args, 'added ' + elems_added)
 
-def fast_main(args, ins, ous, id_elem_names, ids, idnums_curr, id_counts):
+def fast_process(args, ins, id_elem_names, ids, idnums_curr, id_counts):
     '''A faster main loop.
 
-    args, ins and ous are as for main. id_elem_names are the names of
+    args and ins are as for process. id_elem_names are the names of
     elements to which to add ids (bytes), ids is a dict of id
     generators and idnums_curr are the currently active numeric id
     values.
@@ -877,7 +887,7 @@ def fast_main(args, ins, ous, id_elem_names, ids, idnums_curr, id_counts):
                 if verbose:
                     id_counts[elem] += 1
                 line = append_attr(line, elem_args.idn, format_id[elem]())
-        ous.write(line)
+        yield line
 
 def get_idgen(args):
     '''Return id generator based on args.'''
@@ -0,0 +1,261 @@
+# -*- mode: Python; -*-
+
+'''Implement vrt-annotator-server: keep an external annotator (with
+its model loaded) running as one long-lived process and serve pr1
+clients over a Unix socket, so that a pr1 tool run with --server on
+many small files does not start the annotator for each of them.
+
+The clients are served one at a time, in the order they connect. A
+client sends what the pr1 tool would send to the annotator and closes
+its end for writing; the server writes it to the annotator as it
+comes and sends back the output of the annotator until there is as
+many sentences of output as there were sentences of input. Only the
+server sees the stderr of the annotator.
+
+The annotator must write out each sentence when it has read it, not
+keep it in a buffer until the end of its input (which never comes).
+PYTHONUNBUFFERED is set for it, and stdbuf -oL may help with others.
+
+'''
+
+from argparse import ArgumentParser, REMAINDER
+from socket import socket, AF_UNIX, SOCK_STREAM, SHUT_RDWR
+from subprocess import Popen, PIPE
+from threading import Thread, Condition
+import os, signal, sys
+
+from libvrt.bad import BadData
+
+def parsearguments(argv, *, prog = None):
+
+    description = '''
+
+    Run an external annotator as a server for pr1 tools (such as
+    vrt-finnish-nertag or vrt-sparv-huntag) that are given the socket
+    with their --server option. The command is the same that the tool
+    would run.
+
+    '''
+
+    parser = ArgumentParser(description = description, prog = prog)
+
+    parser.add_argument('--socket', '-s', metavar = 'path',
+                        required = True,
+                        help = '''
+
+                        Unix socket (file) to listen to, removed at
+                        exit
+
+                        ''')
+
+    end = parser.add_mutually_exclusive_group()
+    end.add_argument('--end', choices = [ 'empty', 'line' ],
+                     default = 'empty',
+                     help = '''
+
+                     how a sentence ends in the input and output of
+                     the annotator: in an empty line, or at the end of
+                     every line (default empty)
+
+                     ''')
+    end.add_argument('--sentinel', metavar = 'prefix',
+                     type = str.encode,
+                     help = '''
+
+                     a sentence ends in a line that starts with the
+                     prefix, for annotators that eat empty lines
+
+                     ''')
+
+    parser.add_argument('command', nargs = REMAINDER,
+                        help = '''
+
+                        the annotator command and its arguments
+                        (after --)
+
+                        ''')
+
+    args = parser.parse_args(argv)
+    args.prog = parser.prog
+
+    if args.command[:1] == ['--']:
+        args.command = args.command[1:]
+    if not args.command:
+        parser.error('no annotator command')
+
+    return args
+
+def isend(args):
+    '''Return a test of a line (bytes) of the annotator input or output
+    being the last line of a sentence.
+
+    '''
+    if args.sentinel is not None:
+        return lambda line: line.startswith(args.sentinel)
+    if args.end == 'line':
+        return lambda line: True
+    return lambda line: line in (b'\n', b'\r\n')
+
+def closing(args):
+    '''Return a line (bytes) that ends a sentence, to end a sentence that
+    a client left open, or None when every line ends a sentence.
+
+    '''
+    if args.sentinel is not None:
+        return args.sentinel + b'\n'
+    if args.end == 'line':
+        return None
+    return b'\n'
+
+def main(args):
+    '''Start the annotator and serve clients until terminated or the
+    annotator dies. Return exit status.
+
+    '''
+
+    # SIGTERM to come out of accept() like ^C, to clean up
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    proc = Popen(args.command,
+                 stdin = PIPE,
+                 stdout = PIPE,
+                 stderr = None,
+                 env = dict(os.environ, PYTHONUNBUFFERED = '1'))
+
+    server = socket(AF_UNIX, SOCK_STREAM)
+    try:
+        server.bind(args.socket)
+    except OSError as exn:
+        print('{}: cannot bind: {}: {}'.format(args.prog, args.socket, exn),
+              file = sys.stderr)
+        proc.stdin.close()
+        proc.wait()
+        return 1
+
+    test, close = isend(args), closing(args)
+    try:
+        server.listen()
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    served = serve(test, close, proc, conn)
+                except BadData as exn:
+                    print('{}: {}'.format(args.prog, exn), file = sys.stderr)
+                    return 1
+            if not served:
+                print('{}: client went away'.format(args.prog),
+                      file = sys.stderr)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        server.close()
+        os.remove(args.socket)
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.wait(timeout = 300)
+
+def serve(isend, close, proc, conn):
+    '''Serve one client: copy its input (in a thread) to the annotator
+    and copy the output of the annotator to the client until there are
+    as many sentences of output as there were of input. Should the
+    client leave a sentence unfinished, finish it with the close line.
+    Return whether the client stayed to the end.
+
+    '''
+
+    # sent is the number of sentences written (and flushed) to the
+    # annotator, done is whether the client closed its end
+    state = dict(sent = 0, done = False, failed = None)
+    cond = Condition()
+
+    def copy():
+        carry, unended = b'', False
+        try:
+            while True:
+                chunk = conn.recv(1 << 16)
+                if not chunk:
+                    break
+                lines = (carry + chunk).splitlines(keepends = True)
+                carry = b''
+                if not lines[-1].endswith(b'\n'):
+                    carry = lines.pop()
+                if not lines:
+                    continue
+                proc.stdin.writelines(lines)
+                proc.stdin.flush()
+                unended = not isend(lines[-1])
+                with cond:
+                    state['sent'] += sum(map(isend, lines))
+                    cond.notify()
+        except Exception as exn:
+            state['failed'] = exn
+        try:
+            if carry or unended:
+                # else the annotator would see the next client continue
+                # the sentence and be out of step
+                proc.stdin.write(carry and carry + b'\n')
+                proc.stdin.write(close or b'')
+                proc.stdin.flush()
+                with cond:
+                    state['sent'] += 1
+        except Exception as exn:
+            state['failed'] = exn
+        finally:
+            with cond:
+                state['done'] = True
+                cond.notify()
+
+    feed = Thread(target = copy, name = 'Client Input Thread', daemon = True)
+    feed.start()
+
+    def ready():
+        return seen < state['sent'] or state['done']
+
+    # out is None when the client has gone away, and then the output
+    # of the annotator is read but dropped so that the next client
+    # gets only its own
+    out = conn.makefile('wb')
+    seen = 0
+    while True:
+        with cond:
+            waiting = not ready()
+        if waiting and out is not None:
+            out = _flushed(out)
+        with cond:
+            cond.wait_for(ready)
+            if seen >= state['sent']:
+                break
+
+        line = proc.stdout.readline()
+        if not line:
+            raise BadData('annotator exited')
+        seen += isend(line)
+        if out is not None:
+            out = _written(out, line)
+
+    feed.join()
+    if out is not None:
+        out = _flushed(out)
+    try:
+        conn.shutdown(SHUT_RDWR)
+    except OSError:
+        pass
+
+    return out is not None and state['failed'] is None
+
+def _written(out, line):
+    try:
+        out.write(line)
+        return out
+    except (BrokenPipeError, ConnectionResetError):
+        return None
+
+def _flushed(out):
+    try:
+        out.flush()
+        return out
+    except (BrokenPipeError, ConnectionResetError):
+        return None
@@ -0,0 +1,186 @@
+# -*- mode: Python; -*-
+
+'''Implement vrt-chain: run a chain of vrt tools in one process, over
+one read of the input and one write of the output, without the
+intermediate files and processes of a shell pipeline.
+
+Each stage is a generator that takes the lines of the previous stage
+and yields its own, so the lines pass from stage to stage as they are,
+without being written and read and split again. Consecutive
+field-level stages (vrt-keep, vrt-drop, vrt-rename) are further fused
+into a single libvrt.schema.Plan that maps each token line once.
+
+'''
+
+from argparse import ArgumentTypeError
+from importlib import import_module
+import shlex
+
+from libvrt.args import transput_args
+from libvrt.bad import BadData
+from libvrt.schema import projected, transform
+
+def _transput(name):
+    '''Load a stage from a libvrt.tools module that has the functions
+    parsearguments(argv, *, prog) and either project(args), when the
+    stage is field-level, or process(args, lines), which yields the
+    output lines of the input lines.
+
+    '''
+    def load(argv):
+        module = import_module('libvrt.tools.' + name.replace('-', '_'))
+        args = module.parsearguments(argv, prog = name)
+        if hasattr(module, 'project'):
+            project = module.project(args)
+            return (args,
+                    lambda lines: projected(lines, project),
+                    project)
+        return (args,
+                lambda lines: module.process(args, lines),
+                None)
+    return load
+
+def _processor(name, classname):
+    '''Load a stage from a libvrt.tools module that implements it as a
+    vrtargsoolib.InputProcessor with a method process(args, lines).
+
+    '''
+    def load(argv):
+        module = import_module('libvrt.tools.' + name.replace('-', '_'))
+        proc = getattr(module, classname)()
+        args = proc.parse_args(argv, prog = name)
+        return (args,
+                lambda lines: proc.process(args, lines),
+                None)
+    return load
+
+STAGES = {
+    'vrt-keep' : _transput('vrt-keep'),
+    'vrt-drop' : _transput('vrt-drop'),
+    'vrt-rename' : _transput('vrt-rename'),
+    'vrt-reset-fields' : _transput('vrt-reset-fields'),
+    'vrt-add-id' : _transput('vrt-add-id'),
+    'vrt-drop-empty' : _processor('vrt-drop-empty', 'VrtEmptyStructDropper'),
+    'vrt-select' : _processor('vrt-select', 'StructSelect'),
+}
+
+def stagetype(arg):
+    '''A tool name and its options, split as by a shell.'''
+    try:
+        argv = shlex.split(arg)
+    except ValueError as exn:
+        raise ArgumentTypeError('cannot split: {}: {}'.format(exn, arg))
+
+    if not argv:
+        raise ArgumentTypeError('empty stage')
+
+    if argv[0] not in STAGES:
+        raise ArgumentTypeError('not a stage: {} (stages are: {})'
+                                .format(argv[0], ', '.join(STAGES)))
+
+    return argv
+
+def parsearguments(argv, *, prog = None):
+
+    description = '''
+
+    Run a chain of vrt tools in one process, reading the input once
+    and writing the output once, the lines passing from stage to stage
+    as they are. Consecutive vrt-keep, vrt-drop and vrt-rename stages
+    are fused into one pass over the tokens.
+
+    '''
+
+    parser = transput_args(description = description)
+
+    parser.add_argument('--stage', '-s', metavar = '"tool option*"',
+                        dest = 'stages', action = 'append',
+                        type = stagetype, required = True,
+                        help = '''
+
+                        a stage of the chain, as a tool name and its
+                        options quoted together, without file names;
+                        repeat the option for each stage in order
+                        (tools: {})
+
+                        '''.format(', '.join(STAGES)))
+
+    args = parser.parse_args(argv)
+    args.prog = prog or parser.prog
+
+    loaded = []
+    for tool, *rest in args.stages:
+        try:
+            stage, process, project = STAGES[tool](rest)
+        except BadData as exn:
+            parser.error('{}: {}'.format(tool, exn))
+
+        if any(getattr(stage, name, None)
+               for name in ('infile', 'outfile', 'inplace',
+                            'backup', 'sibling')):
+            parser.error('{}: no files or in-place options in a stage'
+                         .format(tool))
+
+        loaded.append((tool, process, project))
+
+    args.stages = fused(loaded)
+    return args
+
+def fused(stages):
+    '''Return the list of (name, process, project) where each maximal
+    sequence of stages that have a project are fused into one.
+
+    '''
+    result = []
+    for name, process, project in stages:
+        if project is None or not result or result[-1][2] is None:
+            result.append((name, process, project))
+            continue
+
+        last, _, earlier = result.pop()
+        def both(plan, earlier = earlier, project = project):
+            return project(earlier(plan))
+        def process(lines, both = both):
+            return projected(lines, both)
+        result.append(('{}+{}'.format(last, name), process, both))
+
+    return result
+
+def main(args, ins, ous):
+    '''Transput VRT (bytes) in ins through the stages in args to VRT
+    (bytes) in ous. Each stage yields its lines to the next.
+
+    '''
+
+    stages = args.stages
+    if len(stages) == 1 and stages[0][2] is not None:
+        # field-level stages only, mapped in runs of lines
+        name, process, project = stages[0]
+        try:
+            transform(ins, ous, project)
+        except BadData as exn:
+            raise BadData('{}: {}'.format(name, exn))
+        return 0
+
+    lines = ins
+    for name, process, project in stages:
+        lines = _named(name, process(lines))
+
+    try:
+        ous.writelines(lines)
+    except BadData as exn:
+        raise BadData('{}: {}'.format(exn.stage, exn))
+
+    return 0
+
+def _named(name, lines):
+    '''Yield the lines of a stage, marking any BadData with the name
+    of the stage where it was raised.
+
+    '''
+    try:
+        yield from lines
+    except BadData as exn:
+        if not hasattr(exn, 'stage'):
+            exn.stage = name
+        raise
@@ -7,15 +7,11 @@ Develop a transparent mechanism for internal meta instead. Please.
 
 '''
 
-from itertools import chain, filterfalse, islice
-
 from libvrt.args import transput_args
-from libvrt.bad import BadData
-from libvrt.keeper import keeper
 from libvrt.nameargs import bagtype, parsenames
-from libvrt.nameline import isnameline, parsenameline, makenameline
+from libvrt.schema import transform
 
-def parsearguments():
+def parsearguments(argv = None, *, prog = None):
     description = '''
 
     Drop the named fields aka positional attributes.
@@ -46,45 +42,23 @@ def parsearguments():
 
                         ''')
 
-    args = parser.parse_args()
-    args.prog = parser.prog
+    args = parser.parse_args(argv)
+    args.prog = prog or parser.prog
     return args
 
-def main(args, ins, ous):
+def project(args):
+    '''Return a function that extends a libvrt.schema.Plan to drop
+    the fields in args.
 
-    # print(args.fields)
-    drop = parsenames(args.fields)
+    '''
 
-    content = filterfalse(bytes.isspace, ins)
-
-    head = islice(content, 100)
-    for line in head:
-        if isnameline(line):
-            names = parsenameline(line, required = drop)
-            ix = tuple(k for k, name in enumerate(names)
-                       # *keep* the field if not -f name
-                       # *and* *not* (--dots and dotted)
-                       if name not in drop
-                       if not (args.dots and (b'.' in name)))
-            if len(ix) == 0:
-                raise BadData('not allowed to drop all fields')
-            keep = keeper(*ix)
-            ous.write(makenameline(keep(names)))
-            break
-        elif line.startswith(b'<'):
-            ous.write(line)
-        else:
-            raise BadData('fields found before field names')
-    else:
-        raise BadData('first 100 lines: no field names found')
-
-    # broke out of head so found and shipped a name line
-    for line in filterfalse(isnameline, chain(head, content)):
-        if line.startswith(b'<'):
-            ous.write(line)
-            continue
-
-        ous.write(b'\t'.join(keep(line.rstrip(b'\r\n').split(b'\t'))))
-        ous.write(b'\n')
+    drop = parsenames(args.fields)
+    return lambda plan: plan.drop([ name for name in plan.target.names
+                                    # *keep* the field if not -f name
+                                    # *and* *not* (--dots and dotted)
+                                    if (name in drop or
+                                        (args.dots and (b'.' in name))) ])
 
+def main(args, ins, ous):
+    transform(ins, ous, project(args))
     return 0
@@ -37,6 +37,11 @@ class VrtEmptyStructDropper(InputProcessor):
 
     def main(self, args, inf, ouf):
         """Read inf, write to ouf, with command-line arguments args."""
+        ouf.writelines(self.process(args, inf))
+
+    def process(self, args, inf):
+        """Yield the lines of inf that are kept, with command-line
+        arguments args."""
         drop_counts = defaultdict(int)
 
         def drop_empty(lines):
@@ -73,7 +78,6 @@ class VrtEmptyStructDropper(InputProcessor):
         for istag, lines in groupby(inf, lambda line: line[0] == LT):
             if istag:
                 lines = drop_empty(list(lines))
-            for line in lines:
-                ouf.write(line)
+            yield from lines
         if args.verbose:
             output_drop_counts()
@@ -5,12 +5,14 @@
 '''
 
 from itertools import groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import html, re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers, add_tear
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 def _name(arg): return arg.encode('UTF-8')
 
@@ -64,6 +66,11 @@ def parsearguments(argv):
                        ''')
     parser.set_defaults(form = 'all')
 
+    add_workers(parser)
+    add_tear(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
 
     # default depends on args.form so here goes
@@ -85,7 +92,7 @@ def main(args, ins, ous):
              *dict(max = [],
                    all = [ '--show-nested' ],
                    bio = [ '--bio' ])[args.form] ]
-    proc = Popen(real,
+    proc = popen(args, real,
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = None)
@@ -12,12 +12,14 @@ https://zenodo.org/record/5052819#.YTeUAVtRVH4
 
 from argparse import ArgumentTypeError
 from itertools import chain, groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 try:
     from outsidelib import HeLI
@@ -75,6 +77,10 @@ def parsearguments(argv):
 
                         ''')
 
+    add_workers(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
@@ -83,7 +89,7 @@ def main(args, ins, ous):
 
     # should add -c to also receive a confidence score; without
     # input/output filenames HeLi should work stdin/stdout
-    proc = Popen([ 'java', '-jar', HeLI ],
+    proc = popen(args, [ 'java', '-jar', HeLI ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = None)
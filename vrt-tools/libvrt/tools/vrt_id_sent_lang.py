@@ -14,13 +14,15 @@ https://doi.org/10.5281/zenodo.6077089
 
 from argparse import ArgumentTypeError
 from itertools import chain, groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import re, sys
 
 from libvrt.args import transput_args
 from libvrt.nameargs import nametype
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 from libvrt.dataline import unescape
 
 try:
@@ -79,6 +81,10 @@ def parsearguments(argv):
 
                         ''')
 
+    add_workers(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
@@ -87,7 +93,7 @@ def main(args, ins, ous):
 
     # option -c is to also receive a confidence score; without without
     # input/output filenames HeLi should work stdin/stdout
-    proc = Popen([ 'java', '-jar', HeLI, '-c' ],
+    proc = popen(args, [ 'java', '-jar', HeLI, '-c' ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = None)
@@ -0,0 +1,67 @@
+# -*- mode: Python; -*-
+
+'''Implement vrt-index: write the sidecar index (libvrt.index) of VRT
+files for tools that can then seek to elements and tokens instead of
+reading through the whole file.
+
+'''
+
+from argparse import ArgumentParser
+import sys
+
+from libvrt.bad import BadData
+from libvrt.index import build_index, index_path, NAMES
+from libvrt.metaname import nametype
+
+def parsearguments(argv, *, prog = None):
+
+    description = '''
+
+    Index the start of every text, paragraph and sentence (or other
+    named elements) in VRT files, with the number of tokens before
+    each, in a sidecar file (file.vrt.idx) that vrt-sample-elements,
+    vrt-sample-tokens and vrt-split use when it is there and up to
+    date. (vrt-sort and vrt-scramble do not use it: they read and
+    write every line anyway.)
+
+    '''
+
+    parser = ArgumentParser(description = description, prog = prog)
+
+    parser.add_argument('infile', nargs = '+', metavar = 'file',
+                        help = 'VRT file to index')
+
+    parser.add_argument('--element', '-e', metavar = 'name',
+                        dest = 'elements',
+                        action = 'append', type = nametype,
+                        help = '''
+
+                        name of an element to index, can be repeated
+                        (text, paragraph, sentence)
+
+                        ''')
+
+    args = parser.parse_args(argv)
+    args.prog = parser.prog
+    args.elements = tuple(dict.fromkeys(args.elements or NAMES))
+
+    return args
+
+def main(args):
+    '''Index each file. Return exit status.'''
+    status = 0
+    for path in args.infile:
+        try:
+            head = build_index(path, args.elements)
+        except (OSError, BadData) as exn:
+            print('{}: {}: {}'.format(args.prog, path, exn),
+                  file = sys.stderr)
+            status = 1
+            continue
+        print('{}: {}: {} tokens, {}'
+              .format(args.prog, index_path(path), head['tokens'],
+                      ', '.join('{} {}'.format(element['count'], name)
+                                for name, element
+                                in head['elements'].items())),
+              file = sys.stderr)
+    return status
@@ -7,7 +7,7 @@ transparent mechanism to deal with internal structure instead.
 
 '''
 
-from itertools import chain, filterfalse, islice
+from itertools import chain
 import enum, os, re, sys, traceback
 
 
@@ -15,9 +15,9 @@ from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
 from libvrt.keeper import keeper
 from libvrt.nameargs import bagtype, parsenames
-from libvrt.nameline import isnameline, parsenameline, makenameline
+from libvrt.schema import transform, REST
 
-def parsearguments():
+def parsearguments(argv = None, *, prog = None):
     description = '''
 
     Keep the fields (positional attributes) named in the options.
@@ -53,8 +53,8 @@ def parsearguments():
 
                         ''')
 
-    args = parser.parse_args()
-    args.prog = parser.prog
+    args = parser.parse_args(argv)
+    args.prog = prog or parser.prog
     return args
 
 
@@ -110,54 +110,24 @@ def getget(args, source):
 
     return getter
 
-def main(args, ins, ous):
+def project(args):
+    '''Return a function that extends a libvrt.schema.Plan to keep
+    the fields in args. Raise BadData if args make no sense.
+
+    '''
 
     if args.fields.count(b'[...]') > 1:
         raise BadData('more than one --rest')
 
     if b'[...]' in args.fields:
         rest = args.fields.index(b'[...]')
-        before = parsenames(args.fields[:rest])
-        after = parsenames(args.fields[rest + 1:])
+        names = (parsenames(args.fields[:rest]) + [REST] +
+                 parsenames(args.fields[rest + 1:]))
     else:
-        before = parsenames(args.fields)
-        after = parsenames([])
-
-    content = filterfalse(bytes.isspace, ins)
-
-    head = islice(content, 100)
-    for line in head:
-        if isnameline(line):
-            names = parsenameline(line, required = before + after)
-            between = ( [ name for name in names # oh slash TODO
-                          if name not in before
-                          if name not in after ]
-                        if b'[...]' in args.fields
-                        else []
-            )
-            # print(names, '=>', before, between, after)
-            ix = tuple(names.index(name) for name
-                       in before + between + after)
-            if not ix:
-                raise BadData('must keep some of the fields: {}'
-                              .format(b' '.join(names).decode('UTF-8')))
-            keep = keeper(*ix)
-            ous.write(makenameline(keep(names)))
-            break
-        elif line.startswith(b'<'):
-            ous.write(line)
-        else:
-            raise BadData('field found before field names')
-    else:
-        raise BadData('first 100 lines: no field names found')
-
-    # broke out of head so found and shipped a name line
-    for line in filterfalse(isnameline, chain(head, content)):
-        if line.startswith(b'<'):
-            ous.write(line)
-            continue
+        names = parsenames(args.fields)
 
-        ous.write(b'\t'.join(keep(line.rstrip(b'\r\n').split(b'\t'))))
-        ous.write(b'\n')
+    return lambda plan: plan.keep(names)
 
+def main(args, ins, ous):
+    transform(ins, ous, project(args))
     return 0
@@ -3,9 +3,17 @@ based on the value of a specified text attribute. Initially just
 separation by a language summary is implemented, but options to use a
 different attribute or a different interpretation of that attribute
 can be added. The attribute handler should then return a component of
-a file name where the text element is then written. Note that all
-output files be open at the same time - maybe best not to have like
-millions of them? or even hundreds. (Around 150 worked fine in Puhti.)
+a file name where the text element is then written. A general
+method tags by the value of a Python expression over the text
+attributes (--key).
+
+Output is buffered for each file and appended in large writes through
+a pool of open files (libvrt.handles), of which only the least
+recently used are kept open (--handles), so there can be thousands of
+output files. Several input files can be partitioned in parallel
+(--jobs) into the same output files, as the appends are locked; the
+output files are renamed into place only after all input files are
+done.
 
 Any markup lines outside text elements are discarded. This breaks the
 VRT format if some such markup starts outside and ends inside a text
@@ -15,20 +23,26 @@ Please do not have such markup.
 
 '''
 
+from glob import escape, glob
 from itertools import chain, count
-from re import search, findall, fullmatch, ASCII
+from multiprocessing import Pool
+from re import search, findall, fullmatch, sub, ASCII
 
-import os
+import builtins, os, re
 
-from libvrt.args import multiput2_args, BadData
+from libvrt.args import multiput2_args, nat, BadData
+from libvrt.handles import HandlePool
 from libvrt.elements import text_elements
-from libvrt.metaline import mapping
+from libvrt.metaline import parser
 from libvrt.dataline import unescape
 
 # hm libvrt.metaname appears to have similar so one is once again
 # duplicating one's efforts?
 from libvrt.nameargs import nametype, prefixtype, suffixtype
 
+# text start tags are only read, and mostly share an attribute layout
+mapping = parser()
+
 def parsearguments(argv, *, prog = None):
 
     description = '''
@@ -47,6 +61,15 @@ def parsearguments(argv, *, prog = None):
 
     parser = multiput2_args(description = description)
 
+    parser.add_argument('more', nargs = '*', metavar = 'file',
+                        help = '''
+
+                        more input files, partitioned into the same
+                        output files (named by the stem of the first
+                        input file unless --stem is given)
+
+                        ''')
+
     parser.add_argument('--attr', '-a', metavar = 'spec',
                         type = str.encode,
                         help = '''
@@ -82,9 +105,63 @@ def parsearguments(argv, *, prog = None):
 
                         ''')
 
+    method.add_argument('--key', '-k', metavar = 'expr',
+                        help = '''
+
+                        tag by the value of the Python expression
+                        expr, where each text attribute whose name is
+                        an identifier is a variable (str), all are in
+                        the dict attr, and module re is available; any
+                        character other than a letter, digit, "_",
+                        "-" or "." in the value is replaced with "_"
+                        (example: "attr.get('year', 'none')[:3] + '0s'")
+
+                        ''')
+
+    parser.add_argument('--handles', metavar = 'num',
+                        type = nat, default = 100,
+                        help = '''
+
+                        keep at most num output files open at a time
+                        in each process (100)
+
+                        ''')
+
+    parser.add_argument('--buffer', metavar = 'KiB',
+                        type = nat, default = 64,
+                        help = '''
+
+                        buffer up to KiB kibibytes for each output
+                        file before appending it (64), and up to 1024
+                        times that in all
+
+                        ''')
+
+    parser.add_argument('--jobs', '-j', metavar = 'num',
+                        type = nat, default = 1,
+                        help = '''
+
+                        partition up to num input files in parallel
+                        (1); the order of texts from different input
+                        files in an output file then varies
+
+                        ''')
+
     args = parser.parse_args(argv)
     args.prog = prog or parser.prog
 
+    if args.handles < 1 or args.jobs < 1:
+        parser.error('--handles and --jobs must be at least 1')
+
+    if args.key is not None:
+        try:
+            compile(args.key, '--key', 'eval')
+        except SyntaxError as exn:
+            parser.error('--key: {}'.format(exn))
+
+    if args.more and args.infile is None:
+        parser.error('more input files but no first input file')
+
     if args.stem:
         pass
     elif args.infile is None:
@@ -98,8 +175,9 @@ def parsearguments(argv, *, prog = None):
     return args
 
 def main(args, ins, outdir):
-    '''Transput text elements of VRT (bytes) in ins to VRT (bytes) in
-    different output files depending on args.
+    '''Transput text elements of VRT (bytes) in ins (and in any more
+    input files) to VRT (bytes) in different output files depending
+    on args.
 
     Output files are sibling to input file if named, else in current
     working directory. Output filename stem defaults to input filename
@@ -110,65 +188,122 @@ def main(args, ins, outdir):
 
     '''
 
-    tmpname = os.path.join(outdir, '{}-{{}}.vrt.tmp'.format(args.stem))
+    # temporary names are particular to this run, as all processes
+    # append to the same temporary files
+    tmpname = os.path.join(outdir, '{}-{{}}.vrt.{}.tmp'
+                           .format(args.stem, os.getpid()))
     outname = os.path.join(outdir, '{}-{{}}.vrt'.format(args.stem))
 
-    # find the positional-attributes line
-    # - must be before any text element (as well as before any data line)
-    # - discard any preceding lines as being outside text elements
-    head = None
+    head = read_head(ins)
+    for path in args.more:
+        with open(path, mode = 'rb') as more:
+            if read_head(more) != head:
+                raise BadData('positional-attributes line differs: {}'
+                              .format(path))
+
+    # print('field name line:', head)
+    # print('tmpname pattern:', tmpname)
+    # print('outname pattern:', outname)
+    # print('args.tag:', args.tag)
+
+    tags = set()
+    try:
+        if args.jobs > 1 and args.more:
+            ins.close()
+            with Pool(min(args.jobs, 1 + len(args.more))) as pool:
+                for found in pool.starmap(partition_file,
+                                          ((args, path, head,
+                                            tmpname, outname)
+                                           for path
+                                           in (args.infile, *args.more))):
+                    tags.update(found)
+        else:
+            tags.update(partition(args, ins, head, tmpname, outname))
+            for path in args.more:
+                tags.update(partition_file(args, path, head,
+                                           tmpname, outname))
+    except BaseException:
+        for path in glob(os.path.join(escape(outdir),
+                                      '{}-*.vrt.{}.tmp'
+                                      .format(args.stem, os.getpid()))):
+            os.remove(path)
+        raise
+
+    # finish each output file
+    for tag in sorted(tags):
+        if os.path.exists(outname.format(tag)):
+            raise FileExistsError(outname.format(tag))
+
+        # os.rename might raise FileExistsError (since Python 3.3 or
+        # so) if the target file already exists - this is the desired
+        # behaviour - but apparently does not do so in Linux systems
+
+        os.rename(tmpname.format(tag),
+                  outname.format(tag))
+
+def read_head(ins):
+    '''Return the positional-attributes line from ins, reading past it.
+
+    The line must be before any text element (as well as before any
+    data line); any preceding lines are discarded as being outside
+    text elements.
+
+    '''
     for line in ins:
         if not line.startswith(b'<'):
             raise BadData('data line before positional-attributes line')
         if line.startswith((b'<text>', b'<text ')):
             raise BadData('text element start before positional-attributes line')
         if line.startswith(b'<!-- #vrt positional-attributes: '):
-            head = line
-            break
+            return line
+    return None
 
-    # print('field name line:', head)
-    # print('tmpname pattern:', tmpname)
-    # print('outname pattern:', outname)
-    # print('args.tag:', args.tag)
+def partition_file(args, path, head, tmpname, outname):
+    '''Partition the input file at path as in partition, after the
+    positional-attributes line.
+
+    '''
+    with open(path, mode = 'rb') as ins:
+        read_head(ins)
+        return partition(args, ins, head, tmpname, outname)
+
+def partition(args, ins, head, tmpname, outname):
+    '''Append each text element in ins to the temporary output file of
+    its tag, with head at the start of each file, and return the set
+    of tags seen.
+
+    '''
 
     # set partition method according to the options
     method = (
         klk_main_lang if args.klk_main_lang else
         klk_year if args.klk_year else
         yle_month if args.yle_month else
+        keyed(args.key) if args.key is not None else
         None # this cannot happen: method group is required in args
     )
 
-    outstreams = dict() # an open output stream for each tag seen so far
-    for group in text_elements(ins, open(os.devnull, mode = 'wb'),
-                               as_text = False):
-        # lines outside any text element are discarded
-        # lines inside are shipped to different files
-        line = next(group)
-        tag = method(line, args) # get file-name component from text start line
-        # print('would write to:', tmpname.format(tag))
-
-        # opener opens tmpname.format(tag) if it that is not already
-        # in outstreams; otherwise raises FileExistsError on tmpname
-        # or outname existing
-        ous = opener(outstreams, tag, head, tmpname, outname)
-        ous.write(line)
-        for line in group:
-            ous.write(line)
+    tags = set()
+    with HandlePool(head or b'',
+                    limit = args.handles,
+                    buffer = args.buffer << 10,
+                    memory = args.buffer << 20) as pool:
+        for group in text_elements(ins, open(os.devnull, mode = 'wb'),
+                                   as_text = False):
+            # lines outside any text element are discarded
+            # lines inside are shipped to different files
+            line = next(group)
+            tag = method(line, args) # get file-name component from text start line
+            # print('would write to:', tmpname.format(tag))
 
-    # finish each output file
-    for tag, ous in outstreams.items():
-        ous.close()
+            if tag not in tags:
+                if os.path.exists(outname.format(tag)):
+                    raise FileExistsError(outname.format(tag))
+                tags.add(tag)
 
-        if os.path.exists(outname.format(tag)):
-            raise FileExistsError(outname.format(tag))
-
-        # os.rename might raise FileExistsError (since Python 3.3 or
-        # so) if the target file already exists - this is the desired
-        # behaviour - but apparently does not do so in Linux systems
+            pool.write(tmpname.format(tag), b''.join(chain([line], group)))
 
-        os.rename(tmpname.format(tag),
-                  outname.format(tag))
+    return tags
 
 def klk_main_lang(line, args):
     '''Extract a file-name component from the args.attr (sum_lang) in the
@@ -280,21 +415,26 @@ def yle_month(line, args):
 
     return yyyy_mm.decode()
 
-def opener(streams, tag, head, tmpname, outname):
-    '''Return the output stream that points to an output file with "tag"
-    in its name.
-
-    Open a new file if one is not already open (not already in
-    streams). Then write "head" (positional attributes) to that file.
+def keyed(expr):
+    '''Return a partition function that tags by the value of the Python
+    expression expr (str) over the attributes in the line.
 
     '''
-    if tag not in streams:
-        if os.path.exists(outname.format(tag)):
-            raise FileExistsError(outname.format(tag))
-
-        # mode 'x' means to open a *new* file for writing,
-        # else to raise FileExistsError
-        streams[tag] = open(tmpname.format(tag), 'bx')
-        streams[tag].write(head)
-
-    return streams[tag]
+    code = compile(expr, '--key', 'eval')
+    env = dict(__builtins__ = builtins, re = re)
+
+    def key(line, args):
+        attr = { name.decode('UTF-8') : unescape(value).decode('UTF-8')
+                 for name, value in mapping(line).pairs() }
+        names = { name : value for name, value in attr.items()
+                  if name.isidentifier() }
+        names['attr'] = attr
+        try:
+            value = eval(code, env, names)
+        except Exception as exn:
+            raise BadData('--key: {}: {}: {}'
+                          .format(type(exn).__name__, exn,
+                                  line.decode('UTF-8').strip()))
+        return sub(r'[^\w.-]', '_', str(value), flags = ASCII) or '_'
+
+    return key
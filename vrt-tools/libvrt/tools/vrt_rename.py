@@ -2,14 +2,11 @@
 
 '''Implement vrt-rename.'''
 
-from itertools import filterfalse, islice
-
 from libvrt.args import transput_args
 from libvrt.nameargs import maptype, parsemaps
-from libvrt.nameline import isnameline, parsenameline, rename, makenameline
-from libvrt.bad import BadData
+from libvrt.schema import transform
 
-def parsearguments():
+def parsearguments(argv = None, *, prog = None):
     description = '''
 
     Rename some positional attributes aka fields.
@@ -27,10 +24,19 @@ def parsearguments():
                         commas or spaces, or repeat the option
 
                         ''')
-    args = parser.parse_args()
-    args.prog = parser.prog
+    args = parser.parse_args(argv)
+    args.prog = prog or parser.prog
     return args
 
+def project(args):
+    '''Return a function that extends a libvrt.schema.Plan to rename
+    the fields as mapped in args.
+
+    '''
+
+    mapping = parsemaps(args.mapping)
+    return lambda plan: plan.rename(mapping)
+
 def main(args, ins, ous):
     '''Expect to find an old name line somewhere in the first 100 lines,
     before first token line. Ship a new name line instead, then ship
@@ -38,25 +44,5 @@ def main(args, ins, ous):
 
     '''
 
-    mapping = parsemaps(args.mapping)
-    content = filterfalse(bytes.isspace, ins)
-
-    # expect name comment in early lines
-    head = islice(content, 100)
-    for line in head:
-        if isnameline(line):
-            names = parsenameline(line, required = mapping.keys())
-            ous.write(makenameline(rename(names, mapping)))
-            break
-        elif line.startswith(b'<'):
-            ous.write(line)
-        else:
-            raise BadData('fields found before field names')
-    else:
-        raise BadData('first 100 lines: no field names found')
-
-    # broke out of head so found and shipped a name line
-    for line in filterfalse(isnameline, head): ous.write(line)
-    for line in filterfalse(isnameline, content): ous.write(line)
-
+    transform(ins, ous, project(args))
     return 0
@@ -14,7 +14,8 @@ from itertools import chain
 from re import search
 
 from libvrt.args import transput_args
-from libvrt.dataline import record
+from libvrt.bad import BadData
+from libvrt.dataline import resetter
 from libvrt.nameline import isnameline, parsenameline
 
 def _bintags_(arg):
@@ -44,7 +45,7 @@ def _binval_(arg):
     '''arg type for whatever val (but still should sanity check)'''
     return arg.encode()
 
-def parsearguments(argv):
+def parsearguments(argv, *, prog = None):
     description = '''
 
     Replace the values of the specified fields with the specified
@@ -106,10 +107,17 @@ def parsearguments(argv):
                         ''')
 
     args = parser.parse_args(argv)
-    args.prog = parser.prog
+    args.prog = prog or parser.prog
     return args
 
 def main(args, ins, ous):
+    ous.writelines(process(args, ins))
+
+def process(args, ins):
+    '''Yield the lines of ins with the fields reset in the specified
+    sentences.
+
+    '''
 
     head = []
     for line in ins: # assuming no empty lines? is that safe?
@@ -122,6 +130,7 @@ def main(args, ins, ous):
 
     names = parsenameline(head[-1], required = args.fields)
     index = tuple(names.index(name) for name in args.fields)
+    reset = resetter(index, args.empty)
 
     SKIP = False
     for line in chain(head, ins):
@@ -131,17 +140,14 @@ def main(args, ins, ous):
             # which happens when the class is specified negatively
             #
             SKIP = skipping(args, line)
-            ous.write(line)
+            yield line
         elif line.startswith(b'</sentence>'):
             SKIP = True
-            ous.write(line)
+            yield line
         elif SKIP or line.startswith(b'<'):
-            ous.write(line)
+            yield line
         else:
-            data = record(line)
-            for k in index: data[k] = args.empty
-            ous.write(b'\t'.join(data))
-            ous.write(b'\n')
+            yield reset(line)
 
 def skipping(args, sent):
     '''Establish from a sentence start tag whether the tokens in the
@@ -2,11 +2,18 @@ import random # to use random.seed
 
 from itertools import chain, islice
 
-from libvrt.args import transput_args
+from libvrt.args import transput_args, BadData
 from libvrt.elements import elements
+from libvrt.index import open_index
+from libvrt.metaline import parser
 from libvrt.metaname import nametype # need checked
 from libvrt.nameline import isnameline
 from libvrt.reservoir import sample_iter
+from libvrt.sampler import Reservoir, Stratified, generators
+from libvrt.sampler import write_partial
+
+# start tags are only read, and mostly share an attribute layout
+mapping = parser()
 
 def parsearguments(argv, *, prog = None):
 
@@ -16,7 +23,14 @@ def parsearguments(argv, *, prog = None):
     over all occurrences, using a reservoir method. Only the sample
     needs to fit in memory. (Be warned that there is no checking for
     possible begins or ends of overlapping structural annotations.
-    Any such will be left dangling in the output.)
+    Any such will be left dangling in the output.) When the input file
+    has an up-to-date index of the element (vrt-index), only the
+    sampled elements are read.
+
+    The sample can also be stratified by a text attribute (the number
+    of elements for each value), weighted by an attribute or by the
+    number of tokens in each element, or drawn several times over in
+    the same pass (each sample in a wrapping element).
 
     '''
 
@@ -51,9 +65,92 @@ def parsearguments(argv, *, prog = None):
 
                         ''')
 
+    parser.add_argument('--stratify', metavar = 'name',
+                        type = nametype,
+                        help = '''
+
+                        sample the number of elements for each value
+                        of this attribute of the element, or of the
+                        enclosing text element if the element does
+                        not have it, kept in the input order (note
+                        that a fragment from vrt-pack does not have
+                        the start tag of a text that begins in an
+                        earlier fragment)
+
+                        ''')
+
+    weight = parser.add_mutually_exclusive_group()
+    weight.add_argument('--weight', metavar = 'name',
+                        type = nametype,
+                        help = '''
+
+                        weight each element by the value of this
+                        attribute (a non-negative number, missing is
+                        0)
+
+                        ''')
+    weight.add_argument('--weight-tokens', action = 'store_true',
+                        help = '''
+
+                        weight each element by the number of tokens
+                        in it
+
+                        ''')
+
+    parser.add_argument('--samples', metavar = 'm',
+                        type = int, default = 1,
+                        help = '''
+
+                        draw m independent samples (1), each wrapped
+                        in an element (see --wrap) when more than one
+
+                        ''')
+
+    parser.add_argument('--wrap', metavar = 'name',
+                        type = nametype,
+                        help = '''
+
+                        wrap the sample in this element; with
+                        attribute n to number the samples when more
+                        than one ("sample")
+
+                        ''')
+
+    parser.add_argument('--partial', action = 'store_true',
+                        help = '''
+
+                        write partial samples, with the random keys
+                        of the sampled elements and the counts of those
+                        seen, for vrt-sample-merge to merge with the
+                        partial samples of other parts of the corpus
+                        (with --seed, the seed of each part is the
+                        seed and the --part label, or the file name)
+
+                        ''')
+
+    parser.add_argument('--part', metavar = 'label',
+                        help = '''
+
+                        with --partial --seed, a label of the part
+                        that is unique among the parts, to make the
+                        random numbers of the part independent of the
+                        others (the input file name, required when
+                        reading stdin)
+
+                        ''')
+
     args = parser.parse_args()
     args.prog = prog or parser.prog
 
+    if args.samples < 1:
+        parser.error('--samples must be at least 1')
+    if (args.partial and args.seed is not None and
+        args.part is None and args.infile is None):
+        parser.error('--partial --seed needs --part (or an input file)'
+                     ' to seed each part differently')
+    if args.samples > 1 and args.wrap is None:
+        args.wrap = b'sample'
+
     return args
 
 def main(args, ins, ous):
@@ -64,7 +161,18 @@ def main(args, ins, ous):
     # intention is that it would but who really knows; the sampler
     # uses Python's random module and does not take a generator as an
     # argument, so this is as far as one cares to bother for now
-    random.seed(args.seed)
+    random.seed(args.seed
+                if args.seed is None or not args.partial else
+                # the parts need independent random numbers
+                '{}\0{}'.format(args.seed, (args.infile
+                                            if args.part is None else
+                                            args.part)))
+
+    index = (args.infile and not sampled(args) and
+             open_index(args.infile))
+    if index and args.element in index:
+        with index:
+            return main_indexed(args, index, ins, ous)
 
     # for this tool, do not even require positional-attributes line
     # but quietly preserve the line if found in the first 100 lines
@@ -79,8 +187,14 @@ def main(args, ins, ous):
     # pool ever at all, let alone those that remain the in final pool
     # (the ous=None discards all material outside the element type)
     source = chain(head, ins)
+    if sampled(args):
+        return main_sampled(args, source, ous)
+
     population = map(tuple, elements(args.element, source, ous=None))
 
+    if args.wrap is not None:
+        ous.write(b'<' + args.wrap + b'>\n')
+
     # the enumeration provides the means to put the final pool back in
     # the input order, otherwise they would appear in a random order
     pool = sample_iter(enumerate(population), args.number)
@@ -90,3 +204,104 @@ def main(args, ins, ous):
     for k, lines in pool:
         for line in lines:
             ous.write(line)
+
+    if args.wrap is not None:
+        ous.write(b'</' + args.wrap + b'>\n')
+
+def main_indexed(args, index, ins, ous):
+    '''Transput with an index of the elements: sample their numbers and
+    seek to each sampled element in ins.
+
+    '''
+
+    if index.names is not None:
+        ous.write(index.names)
+
+    if args.wrap is not None:
+        ous.write(b'<' + args.wrap + b'>\n')
+
+    count = index.count(args.element)
+    # the same reservoir as in a pass over the input, so that a seed
+    # draws the same sample with and without the index
+    for k in sorted(sample_iter(range(count), args.number)):
+        for line in index.element(ins, args.element, k):
+            ous.write(line)
+
+    if args.wrap is not None:
+        ous.write(b'</' + args.wrap + b'>\n')
+
+def sampled(args):
+    '''Whether args ask for other than a single uniform sample.'''
+    return (args.stratify is not None or
+            args.weight is not None or
+            args.weight_tokens or
+            args.samples > 1 or
+            args.partial)
+
+class Texts:
+    '''Stands for the output stream of the lines outside the sampled
+    elements, to keep the latest text start tag among them.
+
+    '''
+
+    line = b'<text>\n'
+
+    def write(self, line):
+        if line.startswith((b'<text ', b'<text>')):
+            self.line = line
+
+def main_sampled(args, source, ous):
+    '''Transput stratified or weighted or several samples.'''
+
+    texts = Texts()
+    population = map(tuple, elements(args.element, source, ous=texts))
+
+    samplers = [ (Stratified if args.stratify else Reservoir)(args.number,
+                                                              rand = rand)
+                 for rand in generators(args.samples) ]
+
+    for lines in population:
+        weight = (
+            weigh(lines[0], args.weight) if args.weight else
+            sum(1 for line in lines
+                if not line.startswith(b'<')
+                if not line.isspace()) if args.weight_tokens else
+            1.0
+        )
+        if args.stratify:
+            stratum = mapping(lines[0]).get(args.stratify)
+            if stratum is None:
+                stratum = mapping(texts.line).get(args.stratify, b'')
+            for sampler in samplers:
+                sampler.add(stratum, lines, weight)
+        else:
+            for sampler in samplers:
+                sampler.add(lines, weight)
+
+    if args.partial:
+        return write_partial(ous, samplers, args.number)
+
+    for n, sampler in enumerate(samplers, start = 1):
+        if args.wrap is not None:
+            ous.write(b'<%s n="%d">\n' % (args.wrap, n)
+                      if args.samples > 1 else
+                      b'<' + args.wrap + b'>\n')
+        for lines in sampler.sample():
+            for line in lines:
+                ous.write(line)
+        if args.wrap is not None:
+            ous.write(b'</' + args.wrap + b'>\n')
+
+def weigh(line, name):
+    '''Return the weight in the attribute of the name in the start tag
+    line, or 0 if it is not there.
+
+    '''
+    value = mapping(line).get(name)
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        raise BadData('weight not a number: {}'
+                      .format(line.decode('UTF-8').strip()))
@@ -0,0 +1,99 @@
+# -*- mode: Python; -*-
+
+'''Implement vrt-sample-merge: merge the partial samples that
+vrt-sample-elements and vrt-sample-tokens write with --partial, of
+parts of a corpus, to the samples of the whole corpus.
+
+'''
+
+from argparse import ArgumentParser
+import sys
+
+from libvrt.bad import BadData
+from libvrt.metaname import nametype
+from libvrt.sampler import merge_partials, read_partial, write_samples
+
+def parsearguments(argv, *, prog = None):
+
+    description = '''
+
+    Merge partial samples (from vrt-sample-elements --partial or
+    vrt-sample-tokens --partial, say over the fragments of a packed
+    corpus, sampled in the array jobs of game) to the samples of all
+    the parts: the items with the largest random keys in each sample
+    and stratum, which are the same as if sampled in one pass over the
+    parts. The items are kept in the order of the input files and the
+    order in each. Only the samples need to fit in memory.
+
+    '''
+
+    parser = ArgumentParser(description = description, prog = prog)
+
+    parser.add_argument('infile', nargs = '+', metavar = 'file',
+                        help = 'partial sample')
+
+    parser.add_argument('--number', '-n', metavar = 'n',
+                        type = int,
+                        help = '''
+
+                        the number of items in each sample or stratum
+                        (the least number of the partial samples, and
+                        never more)
+
+                        ''')
+
+    parser.add_argument('--partial', action = 'store_true',
+                        help = '''
+
+                        write a partial sample, to be merged again
+                        with others
+
+                        ''')
+
+    parser.add_argument('--wrap', metavar = 'name',
+                        type = nametype,
+                        help = '''
+
+                        wrap the sample in this element, with
+                        attribute n to number the samples when more
+                        than one ("sample")
+
+                        ''')
+
+    parser.add_argument('--out', '-o', metavar = 'file',
+                        help = 'output file (stdout)')
+
+    args = parser.parse_args(argv)
+    args.prog = parser.prog
+
+    return args
+
+def main(args):
+    '''Merge the partial samples. Return exit status.'''
+
+    def partials():
+        for path in args.infile:
+            with open(path, mode = 'rb') as ins:
+                yield read_partial(ins)
+
+    try:
+        names, number, strata, items = merge_partials(partials(),
+                                                      args.number)
+    except (OSError, BadData) as exn:
+        print('{}: {}'.format(args.prog, exn), file = sys.stderr)
+        return 1
+
+    wrap = args.wrap
+    if wrap is None and len({ sample for sample, _ in strata }) > 1:
+        wrap = b'sample'
+
+    with (open(args.out, mode = 'wb')
+          if args.out else
+          open(sys.stdout.fileno(), mode = 'wb', closefd = False)) as ous:
+        if names is not None:
+            ous.write(names)
+        write_samples(ous, number, strata, items,
+                      partial = args.partial,
+                      wrap = wrap)
+
+    return 0
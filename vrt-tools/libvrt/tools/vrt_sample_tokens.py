@@ -3,9 +3,16 @@ import random # to use random.seed
 from itertools import chain, islice
 
 from libvrt.args import transput_args
+from libvrt.index import open_index
+from libvrt.metaline import parser
 from libvrt.metaname import nametype # need checked
 from libvrt.nameline import isnameline
 from libvrt.reservoir import sample_iter
+from libvrt.sampler import Reservoir, Stratified, generators
+from libvrt.sampler import write_partial
+
+# text start tags are only read, and mostly share an attribute layout
+mapping = parser()
 
 def parsearguments(argv, *, prog = None):
 
@@ -13,7 +20,12 @@ def parsearguments(argv, *, prog = None):
 
     Sample a desired number of tokens from a VRT source, uniformly
     over all occurrences, using a reservoir method. Only the sample
-    needs to fit in memory.
+    needs to fit in memory. When the input file has an up-to-date
+    index (vrt-index), only the sampled tokens are read.
+
+    The sample can also be stratified by a text attribute (the number
+    of tokens for each value), or drawn several times over in the same
+    pass (each sample wrapped in an element).
 
     '''
 
@@ -45,13 +57,65 @@ def parsearguments(argv, *, prog = None):
 
                         wrap the whole sample in this element, to have
                         all tokens inside an element; a suggested name
-                        might be "sample"
+                        might be "sample"; with attribute n to number
+                        the samples when more than one ("sample")
+
+                        ''')
+
+    parser.add_argument('--stratify', metavar = 'name',
+                        type = nametype,
+                        help = '''
+
+                        sample the number of tokens for each value of
+                        this attribute of the enclosing text element,
+                        kept in the input order
+
+                        ''')
+
+    parser.add_argument('--samples', metavar = 'm',
+                        type = int, default = 1,
+                        help = '''
+
+                        draw m independent samples (1), each wrapped
+                        in an element when more than one
+
+                        ''')
+
+    parser.add_argument('--partial', action = 'store_true',
+                        help = '''
+
+                        write partial samples, with the random keys
+                        of the sampled tokens and the counts of those
+                        seen, for vrt-sample-merge to merge with the
+                        partial samples of other parts of the corpus
+                        (with --seed, the seed of each part is the
+                        seed and the --part label, or the file name)
+
+                        ''')
+
+    parser.add_argument('--part', metavar = 'label',
+                        help = '''
+
+                        with --partial --seed, a label of the part
+                        that is unique among the parts, to make the
+                        random numbers of the part independent of the
+                        others (the input file name, required when
+                        reading stdin)
 
                         ''')
 
     args = parser.parse_args()
     args.prog = prog or parser.prog
 
+    if args.samples < 1:
+        parser.error('--samples must be at least 1')
+    if (args.partial and args.seed is not None and
+        args.part is None and args.infile is None):
+        parser.error('--partial --seed needs --part (or an input file)'
+                     ' to seed each part differently')
+    if args.samples > 1 and args.wrap is None:
+        args.wrap = b'sample'
+
     return args
 
 def main(args, ins, ous):
@@ -62,7 +126,18 @@ def main(args, ins, ous):
     # intention is that it would but who really knows; the sampler
     # uses Python's random module and does not take a generator as an
     # argument, so this is as far as one cares to bother for now
-    random.seed(args.seed)
+    random.seed(args.seed
+                if args.seed is None or not args.partial else
+                # the parts need independent random numbers
+                '{}\0{}'.format(args.seed, (args.infile
+                                            if args.part is None else
+                                            args.part)))
+
+    index = (args.infile and not sampled(args) and
+             open_index(args.infile))
+    if index:
+        with index:
+            return main_indexed(args, index, ins, ous)
 
     # for this tool, do not even require positional-attributes line
     # but quietly preserve the line if found in the first 100 lines
@@ -72,6 +147,9 @@ def main(args, ins, ous):
             ous.write(line)
             break
 
+    if sampled(args):
+        return main_sampled(args, chain(head, ins), ous)
+
     if args.wrap is not None:
         ous.write(b'<' + args.wrap + b'>\n')
 
@@ -92,3 +170,66 @@ def main(args, ins, ous):
     if args.wrap is not None:
         ous.write(b'</' + args.wrap + b'>\n')
 
+
+def main_indexed(args, index, ins, ous):
+    '''Transput with an index: sample token positions and seek to each
+    sampled token in ins, from the start of its sentence (or of its
+    paragraph or text when sentences are not indexed).
+
+    '''
+
+    if index.names is not None:
+        ous.write(index.names)
+
+    if args.wrap is not None:
+        ous.write(b'<' + args.wrap + b'>\n')
+
+    name = next((name for name in (b'sentence', b'paragraph', b'text')
+                 if name in index),
+                b'sentence')
+    total = index.tokens
+    # the same reservoir as in a pass over the input, so that a seed
+    # draws the same sample with and without the index
+    for n in sorted(sample_iter(range(total), args.number)):
+        ous.write(index.token(ins, n, name))
+
+    if args.wrap is not None:
+        ous.write(b'</' + args.wrap + b'>\n')
+
+def sampled(args):
+    '''Whether args ask for other than a single uniform sample.'''
+    return args.stratify is not None or args.samples > 1 or args.partial
+
+def main_sampled(args, source, ous):
+    '''Transput stratified or several samples.'''
+
+    samplers = [ (Stratified if args.stratify else Reservoir)(args.number,
+                                                              rand = rand)
+                 for rand in generators(args.samples) ]
+
+    stratum = b''
+    for line in source:
+        if line.startswith(b'<'):
+            if args.stratify and line.startswith((b'<text ', b'<text>')):
+                stratum = mapping(line).get(args.stratify, b'')
+        elif line.isspace():
+            pass
+        elif args.stratify:
+            for sampler in samplers:
+                sampler.add(stratum, line)
+        else:
+            for sampler in samplers:
+                sampler.add(line)
+
+    if args.partial:
+        return write_partial(ous, samplers, args.number)
+
+    for n, sampler in enumerate(samplers, start = 1):
+        if args.wrap is not None:
+            ous.write(b'<%s n="%d">\n' % (args.wrap, n)
+                      if args.samples > 1 else
+                      b'<' + args.wrap + b'>\n')
+        for line in sampler.sample():
+            ous.write(line)
+        if args.wrap is not None:
+            ous.write(b'</' + args.wrap + b'>\n')
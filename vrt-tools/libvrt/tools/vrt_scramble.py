@@ -15,6 +15,7 @@ import random
 from math import floor
 
 from vrtargsoolib import InputProcessor
+from libvrt.extsort import Shuffle
 
 
 class VrtScrambler(InputProcessor):
@@ -46,6 +47,15 @@ class VrtScrambler(InputProcessor):
         ('--legacy',
          '''produce the same result as the old vrt-scramble.py for any
             non-empty seed'''),
+        ('--memory=MB :int =256',
+         '''keep about MB megabytes of the structures to shuffle within
+            a containing structure in memory; shuffle more in runs
+            spilled to temporary files and interleave them at random
+            (the output is the same as without a limit for containing
+            structures whose content fits in MB megabytes)'''),
+        ('--temp-dir=dir -> tempdir',
+         '''write temporary files in directory dir (default: the
+            system default)'''),
     ]
 
     # Maximum number of bytes to read from a random seed file
@@ -111,7 +121,7 @@ class VrtScrambler(InputProcessor):
         # current line is inside a container structure)
         collecting = False
         # Shuffle items collected in this container structure
-        items = []
+        items = self._make_items(args)
         # Current shuffle item lines
         current_item = []
         linenr = 0
@@ -153,7 +163,7 @@ class VrtScrambler(InputProcessor):
                         elif items:
                             # Append comment lines following the end
                             # tag of an item to the preceding item
-                            items[-1].append(line)
+                            items.last().append(line)
                         else:
                             # Directly output comment lines after the
                             # start of a container
@@ -169,13 +179,17 @@ class VrtScrambler(InputProcessor):
                 ouf.write(line)
                 if line.startswith(container_start):
                     # A new container begins
-                    items = []
+                    items = self._make_items(args)
                     current_item = []
                     collecting = True
 
+    def _make_items(self, args):
+        """Return an empty Shuffle of items within the memory limit."""
+        return Shuffle(self._random_shuffle, random.random,
+                       memory=args.memory, tempdir=args.tempdir)
+
     def _shuffle(self, items):
-        """Randomly shuffle items and yield lines in them."""
-        self._random_shuffle(items)
+        """Randomly shuffle items (a Shuffle) and yield lines in them."""
         for item in items:
             for line in item:
                 yield line
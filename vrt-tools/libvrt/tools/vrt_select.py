@@ -201,6 +201,12 @@ class StructSelect(InputProcessor):
         args.tests = tests
 
     def main(self, args, inf, ouf):
+        """Read inf, write to ouf, with command-line arguments args."""
+        ouf.writelines(self.process(args, inf))
+
+    def process(self, args, inf):
+        """Yield the lines of inf that are kept, with command-line
+        arguments args."""
 
         LESS_THAN = b'<'[0]
         linenum = 1
@@ -220,12 +226,9 @@ class StructSelect(InputProcessor):
                          else lambda tests: not combine_tests_base(tests))
         tests = args.tests
 
-        def make_attrdict(line):
-            # TODO: This could perhaps be optimized for a single
-            # attribute test by having a separate function to extract
-            # only the value of a single attribute and by choosing the
-            # function to use in advance
-            return ml.mapping(line)
+        # The attribute layout of the structures is typically the
+        # same in all of them, so parse with a cached layout
+        make_attrdict = ml.parser()
 
         def keep_struct(struct_line):
             """Return true if struct_line begins a structure to be kept."""
@@ -249,7 +252,7 @@ class StructSelect(InputProcessor):
                 elif line.startswith(struct_end):
                     in_struct = False
             if keep:
-                ouf.write(line)
+                yield line
             # Keep all lines outside the structures to be selected
             if not in_struct:
                 keep = True
@@ -258,7 +261,7 @@ class StructSelect(InputProcessor):
                 f'{struct_count} {args.struct} structures in input,'
                 f' kept {keep_count}, dropped {struct_count - keep_count}')
             if args.comment:
-                ouf.write(makebinvrtcomment(
-                    b'info', b'vrt-select: ' + infomsg.encode()))
+                yield makebinvrtcomment(
+                    b'info', b'vrt-select: ' + infomsg.encode())
             if args.verbose:
                 sys.stderr.write(infomsg + '\n')
@@ -9,12 +9,14 @@ installed in Puhti by Sam Hardwick.
 
 from argparse import ArgumentTypeError
 from itertools import chain, groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 def _name(arg):
     if re.fullmatch(r'\w+', arg, re.ASCII):
@@ -63,6 +65,10 @@ def parsearguments(argv):
 
                         ''')
 
+    add_workers(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
@@ -74,8 +80,8 @@ def main(args, ins, ous):
     # module at the time, so loaded the module just for the external
     # process; in 2025, pytorch/1.6 is gone, but default seems to
     # work, so load default version now
-    proc = Popen([ '/bin/bash', '-c',
-                   '''
+    proc = popen(args, [ '/bin/bash', '-c',
+                         '''
 
                    module load pytorch
                    /projappl/clarin/s24-cnn-sentiment/sentiment-classification/main.py
@@ -5,14 +5,19 @@ vrt_sort.py
 The actual implementation of vrt-sort.
 
 Sort text structures within VRT input by creating a sort key from text
-attribute values and using the Unix sort command to sort according to the key.
+attribute values and sorting according to the key.
 
-The script uses the GNU/Unix "sort" command to do the actual sorting
-and "cut" to remove the sort key. The script reads the input and
-writes a temporary file with the keys and text start and end offsets,
-sorts the offset file and then reads the original input (or its
-temporary copy if the input is not seekable) using random access in
-the order of the sorted offset file and writes to output.
+The script reads the input in one pass, collecting the key of each
+text with its start and end offsets (or with its content if the input
+is not seekable), sorts them with the external merge sort of
+libvrt.extsort in memory-budgeted runs, and then writes the texts in
+the sorted order, reading the original input using random access.
+
+With --gnu-sort, the script uses the GNU/Unix "sort" command to do
+the actual sorting and "cut" to remove the sort key, as it used to:
+it writes the keys and text start and end offsets to sort, and then
+reads the original input (or its temporary copy if the input is not
+seekable) in the order of the sorted offset file.
 
 Please run "vrt-sort -h" for more information.
 """
@@ -44,6 +49,7 @@ from tempfile import NamedTemporaryFile
 from time import sleep
 
 from vrtargsoolib import InputProcessor
+from libvrt.extsort import keyfunc, sort
 from libvrt.funcdefutils import define_transform_func, FuncDefError
 from libvrt.seekable import get_seekable
 
@@ -69,12 +75,15 @@ class VrtSorter(InputProcessor):
             attribute, secondarily by the second and so on. Multiple
             keys can also be specified by repeating the option. Each
             attribute name may be followed by a colon and sort
-            ordering option characters recognized by the "sort"
-            command: often one or more of the following: b (ignore
+            ordering option characters as those of the "sort"
+            command: one or more of the following: b (ignore
             leading blanks), d (dictionary order), f (ignore case), g
             (general numeric sort), i (ignore nonprinting), M (month
-            sort), h (human numeric sort), R (random sort), r
-            (reverse), V (version sort).''',
+            sort), h (human numeric sort), n (numeric sort), R
+            (random sort), r (reverse), V (version sort), and also D
+            (date: YYYY, YYYY-MM, YYYY-MM-DD or D.M.YYYY) and L
+            (collation of the current locale). Values compare by
+            Unicode code points unless L is given.''',
          {'required': True,
           'action': 'append'}),
         ('--transform = attrname',
@@ -105,6 +114,20 @@ class VrtSorter(InputProcessor):
             order they are specified.''',
          {'metavar': '[attrname:]code',   # colon cannot be used in spec above
           'action': 'append'}),
+        ('--memory=MB :int =256',
+         '''Keep about MB megabytes of keys (and texts, if the input
+            is not seekable) in memory, and sort more in runs spilled
+            to temporary files.'''),
+        ('--workers=num :int =1',
+         '''Sort and spill runs in num processes while reading on;
+            each may hold a run of MB megabytes.'''),
+        ('--temp-dir=dir -> tempdir',
+         '''Write temporary files in directory dir (default: the
+            system default).'''),
+        ('--gnu-sort',
+         '''Sort with the "sort" and "cut" commands, as before; the
+            order then depends on the locale, and D and L are not
+            available.'''),
     ]
 
     def __init__(self):
@@ -120,6 +143,7 @@ class VrtSorter(InputProcessor):
         self._transform_funcs = defaultdict(list)
         self._transform_attrs = set()
         self._transform_sources = {}
+        self._key_funcs = []
 
     def check_args(self, args):
         super().check_args(args)
@@ -129,6 +153,13 @@ class VrtSorter(InputProcessor):
         self._key_attrs_set = set(self._key_attrs)
         key_opts = [key[2] for key in keys]
         self._key_attr_count = len(keys)
+        if not args.gnu_sort:
+            for (attrname, _, opts) in keys:
+                try:
+                    self._key_funcs.append(keyfunc(opts))
+                except ValueError as e:
+                    self.error_exit('Invalid sort option; sort error message:'
+                                    f'\n{attrname}:{opts}: {e}')
         if len(keys) == 1:
             self._make_key = self._make_key_single
             self._key_re = re.compile(b' ' + self._key_attrs[0] + rb'="(.*?)"')
@@ -178,6 +209,93 @@ class VrtSorter(InputProcessor):
         # sys.stderr.write(repr(self._transform_funcs) + '\n')
 
     def main(self, args, inf, ouf):
+        if args.gnu_sort:
+            self._main_gnu_sort(args, inf, ouf)
+            return
+        # If the input is not seekable, carry the content of the texts
+        # in the runs instead of making a temporary copy of it all
+        seekable = inf.seekable() and inf.name != '<stdin>'
+        comments = {'initial': b'', 'final': b''}
+        texts = sort(self._read_texts(inf, seekable, comments),
+                     memory=args.memory,
+                     tempdir=args.tempdir,
+                     workers=args.workers)
+        # The initial comments are known when the first text is read
+        # and the final ones when all are
+        text = next(texts, None)
+        self._write_comments(inf, ouf, comments['initial'])
+        while text is not None:
+            _, content = text
+            if seekable:
+                start, end = content
+                inf.seek(start)
+                ouf.write(inf.read(end - start))
+            else:
+                ouf.write(content)
+            text = next(texts, None)
+        self._write_comments(inf, ouf, comments['final'])
+
+    def _write_comments(self, inf, ouf, comments):
+        if isinstance(comments, bytes):
+            ouf.write(comments)
+        elif comments[1] > comments[0]:
+            inf.seek(comments[0])
+            ouf.write(inf.read(comments[1] - comments[0]))
+
+    def _read_texts(self, inf, seekable, comments):
+        """Yield (key, (start, end)) of each text in inf if seekable,
+        else (key, content), and set comments['initial'] and
+        comments['final'] to the offsets or the content of the lines
+        before the first text and after the last, as in _read_input.
+        """
+
+        LESS_THAN = b'<'[0]
+        text_seen = False
+        text_open = False
+        key = ()
+        linenr = 0
+        text_start_offset = 0
+        start_offset = end_offset = 0
+        # Lines since the end of the previous text (or from the start)
+        lines = []
+        for line in inf:
+            linenr += 1
+            end_offset += len(line)
+            if not seekable:
+                lines.append(line)
+            if text_open:
+                if line[0] == LESS_THAN and line.startswith(b'</text>'):
+                    text_open = False
+                    yield (key,
+                           (text_start_offset, end_offset) if seekable
+                           else b''.join(lines))
+                    lines = []
+                    # Next text starts immediately after
+                    text_start_offset = end_offset
+            else:
+                if line[0] == LESS_THAN and line.startswith(b'<text '):
+                    key = tuple(
+                        func(value) for func, value in
+                        zip(self._key_funcs,
+                            self._key_values(line, linenr)))
+                    # Initial comments
+                    if not text_seen and linenr > 1:
+                        comments['initial'] = (
+                            [0, start_offset] if seekable
+                            else b''.join(lines[:-1]))
+                        text_start_offset = start_offset
+                        lines = lines[-1:]
+                    text_open = text_seen = True
+            start_offset = end_offset
+        # Final comments
+        if text_start_offset != end_offset:
+            comments['final'] = ([text_start_offset, end_offset] if seekable
+                                 else b''.join(lines))
+            if text_open:
+                self.warn('the last <text> structure in input not closed;'
+                          ' keeping it at the end')
+
+    def _main_gnu_sort(self, args, inf, ouf):
         # If the original input is not seekable, wrap it to appear
         # such
         inf = get_seekable(inf)
@@ -292,14 +410,19 @@ class VrtSorter(InputProcessor):
             return b''
 
     def _make_key_multi(self, tagline, keysep, linenr):
+        return keysep.join(self._key_values(tagline, linenr))
+
+    def _key_values(self, tagline, linenr):
+        if self._key_attr_count == 1:
+            return [self._make_key_single(tagline, b'', linenr)]
         attrvals = dict((key, val)
                         for key, val in self._key_re.findall(tagline)
                         if key in self._key_attrs_set)
         for attrname in self._transform_attrs:
             attrvals[attrname] = self._apply_transforms(
                 attrname, attrvals[attrname], linenr)
-        return keysep.join(attrvals.get(attrname, b'')
-                           for attrname in self._key_attrs)
+        return [attrvals.get(attrname, b'')
+                for attrname in self._key_attrs]
 
     def _apply_transforms(self, attrname, value, linenr):
         # sys.stderr.write('_apply_transforms(' + repr(attrname) + ', '
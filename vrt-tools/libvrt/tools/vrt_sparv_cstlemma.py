@@ -8,12 +8,14 @@ vrt-sparv-cstlemma.
 
 from argparse import ArgumentTypeError
 from itertools import groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import codecs, re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers, add_tear
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 try:
     from outsidelib import CSTLEMMA, CSTLEMMAMODELS
@@ -233,16 +235,21 @@ def parsearguments(argv):
 
                         ''')
 
+    add_workers(parser)
+    add_tear(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
 
 def main(args, ins, ous):
 
-    proc = Popen([ CSTLEMMA,
-                   *CSTFORMATOPTIONS,
-                   *CSTENCODING[args.encoding or 'UTF-8'],
-                   *CSTLEMMAMODELS[args.model] ],
+    proc = popen(args, [ CSTLEMMA,
+                         *CSTFORMATOPTIONS,
+                         *CSTENCODING[args.encoding or 'UTF-8'],
+                         *CSTLEMMAMODELS[args.model] ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = PIPE)
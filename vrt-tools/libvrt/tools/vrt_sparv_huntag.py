@@ -8,12 +8,14 @@ vrt-sparv-huntag.
 
 from argparse import ArgumentTypeError
 from itertools import groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers, add_tear
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 try:
     from outsidelib import HUNPOSTAG, HUNPOSMODELS
@@ -82,6 +84,11 @@ def parsearguments(argv):
 
                         ''')
 
+    add_workers(parser)
+    add_tear(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
@@ -89,7 +96,7 @@ def parsearguments(argv):
 def main(args, ins, ous):
 
     # TODO probably add morph table
-    proc = Popen([ HUNPOSTAG, HUNPOSMODELS['sparv'] ],
+    proc = popen(args, [ HUNPOSTAG, HUNPOSMODELS['sparv'] ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = PIPE)
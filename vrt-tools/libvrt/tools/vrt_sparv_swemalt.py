@@ -8,12 +8,15 @@ vrt-sparv-swemalt.
 
 from argparse import ArgumentTypeError
 from itertools import groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers, add_tear
+from libvrt.tear import mend_dependencies
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 try:
     from outsidelib import MALTPARSER, SWEMALTDIR, SWEMALTMODEL
@@ -83,16 +86,21 @@ def parsearguments(argv):
 
     # TODO something about skipping sentences? maybe later
 
+    add_workers(parser)
+    add_tear(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
 
 def main(args, ins, ous):
 
-    proc = Popen([ 'java', '-jar', MALTPARSER,
-                   '-v', 'warn',
-                   '-w', SWEMALTDIR,
-                   '-c', SWEMALTMODEL ],
+    proc = popen(args, [ 'java', '-jar', MALTPARSER,
+                         '-v', 'warn',
+                         '-w', SWEMALTDIR,
+                         '-c', SWEMALTMODEL ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = None)
@@ -190,6 +198,13 @@ def pr1_read(ins):
                 in [ line.rstrip(b'\r\n').split(b'\t') ]
             )
 
+def pr1_mend(shreds):
+    '''Mend the token records of the shreds of a torn sentence into one
+    parse (with --tear), renumbering refs and heads.
+
+    '''
+    return mend_dependencies(shreds, ref = 0, head = 1, rel = 2)
+
 def pr1_join(old, new, ous):
     '''Pass on the old token record, with new ref, head and rel values
     inserted.
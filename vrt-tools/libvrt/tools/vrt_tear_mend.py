@@ -0,0 +1,182 @@
+# -*- mode: Python; -*-
+
+'''Implement vrt-tear-mend: run a VRT tool on a torn view of the input
+and mend its output as it comes (libvrt.tear), so that long sentences
+are protected from the tool (or the tool from them) without writing a
+torn copy and an annotated torn copy of the data. Or only tear or
+only mend, with the tears in a sidecar file or in comment lines.
+
+'''
+
+from argparse import ArgumentParser, REMAINDER
+from subprocess import Popen, PIPE
+from threading import Thread
+import sys
+
+from libvrt.bad import BadData
+from libvrt.metaname import nametype
+from libvrt.tear import mend, tear, Tears, LONG
+
+def parsearguments(argv, *, prog = None):
+
+    description = '''
+
+    Tear the sentences of N or more tokens of VRT input into shreds of
+    3N/5 tokens, run a VRT tool on the torn input, and mend the
+    shreds in its output back into the original sentences, joining the
+    annotations of the shreds (and renumbering dependencies, if so
+    asked). The tears are kept in memory, so there is no in-band
+    markup for the tool to see. Alternatively, only tear or only mend,
+    with the tears in a sidecar file or, if none is given, in comment
+    lines (<!-- #vrt torn: ... -->) that the tool must keep in place.
+    Reads stdin, writes stdout.
+
+    '''
+
+    parser = ArgumentParser(description = description, prog = prog)
+
+    parser.add_argument('--long', metavar = 'N', type = int,
+                        default = LONG,
+                        help = '''
+
+                        tear sentences of N or more tokens
+                        (default {})
+
+                        '''.format(LONG))
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--tear', action = 'store_true',
+                      help = '''
+
+                      only tear, writing the tears to the sidecar
+                      (or in comment lines)
+
+                      ''')
+    mode.add_argument('--mend', action = 'store_true',
+                      help = '''
+
+                      only mend, reading the tears from the sidecar
+                      (or from comment lines)
+
+                      ''')
+
+    parser.add_argument('--sidecar', metavar = 'file',
+                        help = '''
+
+                        file of the tears, for --tear and --mend
+
+                        ''')
+
+    parser.add_argument('--ref', metavar = 'name', type = nametype,
+                        help = '''
+
+                        renumber the dependencies in the mended
+                        sentences, with the token number in this
+                        positional attribute (such as ref or id) and
+                        the --head and --rel
+
+                        ''')
+    parser.add_argument('--head', metavar = 'name', type = nametype,
+                        default = b'dephead',
+                        help = '''
+
+                        dependency head attribute (dephead)
+
+                        ''')
+    parser.add_argument('--rel', metavar = 'name', type = nametype,
+                        default = b'deprel',
+                        help = '''
+
+                        dependency relation attribute (deprel)
+
+                        ''')
+
+    parser.add_argument('command', nargs = REMAINDER,
+                        help = '''
+
+                        the VRT tool and its arguments (after --),
+                        reading stdin and writing stdout
+
+                        ''')
+
+    args = parser.parse_args(argv)
+    args.prog = parser.prog
+
+    if args.command[:1] == ['--']:
+        args.command = args.command[1:]
+    if args.long < 1:
+        parser.error('--long must be at least 1')
+    if bool(args.command) == (args.tear or args.mend):
+        parser.error('want either a command or --tear or --mend')
+    if args.sidecar and args.command:
+        parser.error('the tears of a command are not in a sidecar')
+
+    return args
+
+def main(args):
+    '''Tear, run and mend, or only tear or mend. Return exit status.'''
+
+    ins = sys.stdin.buffer
+    ous = sys.stdout.buffer
+    names = dict(ref = args.ref, head = args.head, rel = args.rel)
+    if args.ref is None:
+        names = dict()
+    try:
+        if args.tear:
+            tears = Tears() if args.sidecar else None
+            ous.writelines(tear(ins, tears, long = args.long))
+            if tears is not None:
+                tears.write(args.sidecar)
+        elif args.mend:
+            tears = Tears.read(args.sidecar) if args.sidecar else None
+            ous.writelines(mend(ins, tears, **names))
+        else:
+            return run(args, ins, ous, names)
+    except BadData as exn:
+        print('{}: {}'.format(args.prog, exn), file = sys.stderr)
+        return 1
+
+    return 0
+
+def run(args, ins, ous, names):
+    '''Feed the torn input to the command in a thread and mend its
+    output. Return exit status.
+
+    '''
+    proc = Popen(args.command, stdin = PIPE, stdout = PIPE)
+    tears = Tears()
+    failed = []
+
+    def feed():
+        # the tears of a sentence are appended before its shreds are
+        # written, so they are there when its shreds come out
+        try:
+            for line in tear(ins, tears, long = args.long):
+                proc.stdin.write(line)
+        except BrokenPipeError:
+            pass
+        except Exception as exn:
+            failed.append(exn)
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = Thread(target = feed, name = 'Tearing Thread', daemon = True)
+    feeder.start()
+    try:
+        ous.writelines(mend(proc.stdout, tears, **names))
+    finally:
+        proc.stdout.close()
+        feeder.join()
+        status = proc.wait()
+
+    if failed:
+        raise failed[0]
+    if status:
+        print('{}: command exit status {}'.format(args.prog, status),
+              file = sys.stderr)
+        return 1
+
+    return 0
@@ -5,12 +5,14 @@
 '''
 
 from itertools import groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers, add_tear
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 def _name(arg): return arg.encode('UTF-8')
 
@@ -49,13 +51,18 @@ def parsearguments(argv):
 
                         ''')
 
+    add_workers(parser)
+    add_tear(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
 
 def main(args, ins, ous):
 
-    proc = Popen([ 'cut', '-c', '-3' ],
+    proc = popen(args, [ 'cut', '-c', '-3' ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = None)
@@ -6,12 +6,14 @@ acquires a new attribute, data (the tokens) are kept as they were.
 '''
 
 from itertools import groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 def _name(arg): return arg.encode('UTF-8')
 
@@ -49,13 +51,17 @@ def parsearguments(argv):
 
                         ''')
 
+    add_workers(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
 
 def main(args, ins, ous):
 
-    proc = Popen([ 'cut', '-f', '3' ],
+    proc = popen(args, [ 'cut', '-f', '3' ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = None)
@@ -10,13 +10,16 @@ vrt-tnpp-en-ewt.
 
 from argparse import ArgumentTypeError
 from itertools import groupby
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 import os, re, sys
 
 from libvrt.args import transput_args
 from libvrt.bad import BadData, BadCode
 from libvrt.dataline import unescape, escape
-from libvrt.pr1 import transput
+from libvrt.pr1 import transput, popen, add_workers, add_tear
+from libvrt.tear import mend_dependencies
+from libvrt.cache import add_cache
+from libvrt.flow import add_flow
 
 try:
     from outsidelib import TURKUNPPDIR
@@ -169,6 +172,11 @@ def parsearguments(argv, description, model):
 
                         ''')
 
+    add_workers(parser)
+    add_tear(parser)
+    add_cache(parser)
+    add_flow(parser)
+
     args = parser.parse_args(argv)
     args.prog = parser.prog
     return args
@@ -178,10 +186,10 @@ def main(args, ins, ous):
     # insert the model name into a conventional dirname
     TNPP_PIPELINES = os.path.join(TURKUNPPDIR, 'models_{}/pipelines.yaml'.format(args.model))
 
-    proc = Popen([ PYTHON, TURKUNPP,
-                   '--conf-yaml', TNPP_PIPELINES, # defines parse_conllu
-                   '--batch-lines', args.batch, # overrides default
-                   'parse_conllu' ],
+    proc = popen(args, [ PYTHON, TURKUNPP,
+                         '--conf-yaml', TNPP_PIPELINES, # defines parse_conllu
+                         '--batch-lines', args.batch, # overrides default
+                         'parse_conllu' ],
                  stdin = PIPE,
                  stdout = PIPE,
                  stderr = None)
@@ -269,6 +277,13 @@ def pr1_read(ins):
                 in [ line.rstrip(b'\r\n').split(b'\t') ]
             )
 
+def pr1_mend(shreds):
+    '''Mend the token records of the shreds of a torn sentence into one
+    parse (with --tear), renumbering refs and heads.
+
+    '''
+    return mend_dependencies(shreds, ref = 0, head = 5, rel = 6)
+
 def pr1_join(old, new, ous):
     '''Pass on the old token record, with new annotations inserted after
     the "word" field.
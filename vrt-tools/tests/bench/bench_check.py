@@ -0,0 +1,76 @@
+"""
+bench_check.py
+
+Benchmark the character checks of hrt-check run by libvrt.check,
+scanning blocks of lines for the characters of all the checks at
+once, against calling each check on every line.
+
+The input is clean, as most input is, or has a hit every so many
+lines.
+
+Run in the vrt-tools directory:
+
+    python3 -m tests.bench.bench_check [tokens [every]]
+"""
+
+
+import sys
+
+from argparse import Namespace
+from io import BytesIO, StringIO
+from time import perf_counter
+
+from libvrt.check import Report, check_lines
+from libvrt.tools import (hrt_check_bidi, hrt_check_control,
+                          hrt_check_nonchar, hrt_check_private,
+                          hrt_check_shy, hrt_check_tags)
+
+from tests.bench.synth import corpus
+
+
+MODULES = (hrt_check_control, hrt_check_nonchar, hrt_check_private,
+           hrt_check_tags, hrt_check_bidi, hrt_check_shy)
+
+
+def checks():
+    """Return new checks, with reports to nowhere."""
+    args = Namespace(limit=10, no_limit=True, info=False)
+    return [module.Check(args, Report(StringIO(), binary=False))
+            for module in MODULES]
+
+
+def perline(data, checks):
+    """Call every check on every line, as before the scanning."""
+    for k, line in enumerate(data.decode('UTF-8').split('\n'), start=1):
+        for check in checks:
+            check.line(k, line)
+
+
+def scanning(data, checks):
+    """Run the checks with check_lines."""
+    check_lines(BytesIO(data), checks)
+
+
+def main(tokens=1000000, every=0):
+    data = corpus(tokens)
+    if every:
+        lines = data.splitlines(True)
+        for k in range(0, len(lines), every):
+            lines[k] = lines[k].replace(b'\n', '\xad\n'.encode('UTF-8'))
+        data = b''.join(lines)
+    total = data.count(b'\n')
+    print(f'{total} lines, {len(data) / 2**20:.1f} MiB')
+    for name, loop in (('per line', perline),
+                       ('libvrt.check.check_lines', scanning)):
+        best = None
+        for _ in range(3):
+            todo = checks()
+            start = perf_counter()
+            loop(data, todo)
+            took = perf_counter() - start
+            best = took if best is None else min(best, took)
+        print(f'{name:<25} {total / best / 1e6:7.2f} M lines/s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,97 @@
+"""
+bench_dataline.py
+
+Benchmark the lazily split token lines of libvrt.dataline (picker,
+resetter) against splitting every token line into all its fields and
+joining them back.
+
+For each way, report tokens per second and the memory allocated per
+token, as the peak traced by tracemalloc while making one output line,
+averaged over some tokens (the input line and the output line not
+counted).
+
+Run in the vrt-tools directory:
+
+    python3 -m tests.bench.bench_dataline [tokens]
+"""
+
+
+import sys
+import tracemalloc
+
+from time import perf_counter
+
+from libvrt.dataline import picker, record, resetter
+from libvrt.keeper import keeper
+
+from tests.bench.synth import corpus
+
+
+# the fields in synth.corpus are word lemma pos msd ref dephead deprel
+
+def splitjoin(ix):
+    keep = keeper(*ix)
+    return lambda line: b'\t'.join(keep(record(line))) + b'\n'
+
+
+def splitreset(ix, value):
+    def reset(line):
+        data = record(line)
+        for k in ix: data[k] = value
+        return b'\t'.join(data) + b'\n'
+    return reset
+
+
+CASES = (
+    ('keep word,lemma,msd', (
+        ('split and join', splitjoin((0, 1, 3))),
+        ('picker', picker(0, 1, 3)))),
+    ('keep word', (
+        ('split and join', splitjoin((0,))),
+        ('picker', picker(0)))),
+    ('drop ref,dephead,deprel', (
+        ('split and join', splitjoin((0, 1, 2, 3))),
+        ('picker', picker(0, 1, 2, 3)))),
+    ('reset pos,msd', (
+        ('split and join', splitreset((2, 3), b'_')),
+        ('resetter', resetter((2, 3), b'_')))),
+)
+
+
+def allocated(func, lines):
+    """Return the mean peak of memory allocated while func(line)."""
+    total = 0
+    tracemalloc.start()
+    for line in lines:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        out = func(line)
+        total += tracemalloc.get_traced_memory()[1] - base - sys.getsizeof(out)
+        del out
+    tracemalloc.stop()
+    return total / len(lines)
+
+
+def main(tokens=1000000):
+    lines = [line for line in corpus(tokens).splitlines(keepends=True)
+             if not line.startswith(b'<')]
+    print(f'{len(lines)} tokens')
+    for case, ways in CASES:
+        print(case)
+        expected = list(map(ways[0][1], lines[:1000]))
+        for name, func in ways:
+            assert list(map(func, lines[:1000])) == expected, name
+            best = None
+            for _ in range(3):
+                start = perf_counter()
+                for line in lines:
+                    func(line)
+                took = perf_counter() - start
+                best = took if best is None else min(best, took)
+            size = allocated(func, lines[:10000])
+            print(f'  {name:<15} {len(lines) / best / 1e6:6.2f} M tokens/s'
+                  f' {size:6.0f} bytes/token')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,100 @@
+"""
+bench_metaline.py
+
+Benchmark libvrt.metaline.parser against mapping and pairs on start
+tags shaped like those of Suomi24 comments and threads, KLK pages,
+paragraphs and sentences.
+
+Run in the vrt-tools directory:
+
+    python3 -m tests.bench.bench_metaline [tags]
+"""
+
+
+import random
+import sys
+
+from time import perf_counter
+
+from libvrt.metaline import mapping, pairs, parser
+
+
+def _suomi24_comment(rand, k):
+    return (
+        b'<text anonnick="" comment_id="%d" created="2015-03-0%d 12:34:56"'
+        b' datefrom="20150301" dateto="20150301" deleted="false"'
+        b' hierarchy_id="%d" parent_comment_id="0" quote_id="0"'
+        b' thread_id="%d" timefrom="123456" timeto="123456"'
+        b' user_id="%d">\n'
+        % (k, rand.randrange(1, 10), rand.randrange(100),
+           k // 20, rand.randrange(10 ** 6)))
+
+
+def _suomi24_thread(rand, k):
+    return (
+        b'<text anonnick="nimim. %d" comment_id="0"'
+        b' created="2015-03-01 12:00:00" datefrom="20150301"'
+        b' dateto="20150301" deleted="false" hierarchy_id="0"'
+        b' parent_comment_id="0" quote_id="0" thread_id="%d"'
+        b' timefrom="120000" timeto="120000"'
+        b' title="Otsikko %d" topic_adultcontent="false"'
+        b' topic_names="Keskustelu|Yhteiskunta|Politiikka"'
+        b' user_id="%d">\n'
+        % (k, k, k, rand.randrange(10 ** 6)))
+
+
+def _klk_text(rand, k):
+    return (
+        b'<text binding_id="%d" date="1923-04-01" datefrom="19230401"'
+        b' dateto="19230401" filename_orig="%d.xml"'
+        b' issue_date="01.04.1923" issue_no="%d"'
+        b' issue_title="Uusi Suometar 1923 no %d" label="SUOMETAR"'
+        b' language="fi" page_id="%d" page_no="%d" part_name=""'
+        b' publ_id="1234-5678" publ_title="Uusi Suometar"'
+        b' publ_type="sanomalehti" sentcount="%d" timefrom="000000"'
+        b' timeto="235959" tokencount="%d">\n'
+        % (k, k, k % 300, k % 300, k, k % 12 + 1,
+           rand.randrange(500), rand.randrange(5000)))
+
+
+def _paragraph(rand, k):
+    return b'<paragraph id="%d" type="%s">\n' % (
+        k, rand.choice((b'heading', b'body', b'quote')))
+
+
+def _sentence(rand, k):
+    return b'<sentence id="%d" lang="%s" langconf="%d">\n' % (
+        k, rand.choice((b'fin', b'swe', b'eng')), rand.randrange(100))
+
+
+def tags(count, make, *, seed=1):
+    """Return a list of count start tags made with make."""
+    rand = random.Random(seed)
+    return [make(rand, k) for k in range(count)]
+
+
+def main(count=200000):
+    for shape, make in (('Suomi24 comment', _suomi24_comment),
+                        ('Suomi24 thread', _suomi24_thread),
+                        ('KLK page', _klk_text),
+                        ('paragraph', _paragraph),
+                        ('sentence', _sentence)):
+        lines = tags(count, make)
+        parse = parser()
+        assert all(parse(line) == mapping(line) for line in lines[:100])
+        print(shape)
+        for name, func in (('mapping', mapping),
+                           ('pairs', pairs),
+                           ('parser', parser())):
+            best = None
+            for _ in range(3):
+                start = perf_counter()
+                for line in lines:
+                    func(line)
+                took = perf_counter() - start
+                best = took if best is None else min(best, took)
+            print(f'  {name:<10} {count / best / 1e6:7.3f} M tags/s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,109 @@
+"""
+bench_runs.py
+
+Benchmark libvrt.runs against the per-line loops it replaces.
+
+Each loop reads the whole input, tells meta from data, and writes
+every non-blank line out again, as a tool that only looks at some of
+the lines would.
+
+Run in the vrt-tools directory:
+
+    python3 -m tests.bench.bench_runs [tokens]
+"""
+
+
+import sys
+
+from io import BytesIO
+from itertools import filterfalse, groupby
+from time import perf_counter
+
+from libvrt.metaline import ismeta, iscomment
+from libvrt.runs import chunks, groups, runs, COMMENT
+
+from tests.bench.synth import corpus
+
+
+def perline(ins, ous):
+    """As in vrt-keep and vrt-drop, with the libvrt.metaline tests."""
+    comments = 0
+    for line in filterfalse(bytes.isspace, ins):
+        if ismeta(line):
+            if iscomment(line):
+                comments += 1
+        ous.write(line)
+    return comments
+
+
+def groupbyloop(ins, ous):
+    """As in vrt-udpipe and vrt-redact-long."""
+    def issome(line): return not line.isspace()
+    def ismeta(line): return line.startswith(b'<')
+    comments = 0
+    for groupismeta, group in groupby(filter(issome, ins), ismeta):
+        if groupismeta:
+            for line in group:
+                if iscomment(line):
+                    comments += 1
+                ous.write(line)
+            continue
+        for line in group:
+            ous.write(line)
+    return comments
+
+
+def runloop(ins, ous):
+    """Write data runs at once, look at meta only."""
+    comments = 0
+    for kind, lines in runs(ins):
+        if kind == COMMENT:
+            comments += len(lines)
+        ous.writelines(lines)
+    return comments
+
+
+def grouploop(ins, ous):
+    """As groupbyloop but with libvrt.runs.groups."""
+    comments = 0
+    for ismeta, lines in groups(ins):
+        if ismeta:
+            for line in lines:
+                if iscomment(line):
+                    comments += 1
+        ous.writelines(lines)
+    return comments
+
+
+def chunkloop(ins, ous):
+    """Write data chunks as they are."""
+    comments = 0
+    for kind, chunk in chunks(ins):
+        if kind == COMMENT:
+            comments += chunk.count(b'\n')
+        ous.write(chunk)
+    return comments
+
+
+def main(tokens=2000000):
+    data = corpus(tokens)
+    total = data.count(b'\n')
+    print(f'{total} lines, {len(data) / 2**20:.1f} MiB')
+    for name, loop in (('per-line metaline', perline),
+                       ('groupby(filter(issome))', groupbyloop),
+                       ('libvrt.runs.runs', runloop),
+                       ('libvrt.runs.groups', grouploop),
+                       ('libvrt.runs.chunks', chunkloop)):
+        best = None
+        for _ in range(3):
+            ous = BytesIO()
+            start = perf_counter()
+            loop(BytesIO(data), ous)
+            took = perf_counter() - start
+            best = took if best is None else min(best, took)
+        assert ous.getvalue() == data, name
+        print(f'{name:<25} {total / best / 1e6:7.2f} M lines/s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""
+bench_sort.py
+
+Benchmark vrt-sort with libvrt.extsort against vrt-sort --gnu-sort.
+
+Each run sorts the texts of a synthetic corpus by date and author,
+from a file (seekable) and from a pipe, and with a memory budget small
+enough to spill runs to temporary files. The output of every run must
+be the same as that of the GNU sort path in the C locale.
+
+Run in the vrt-tools directory:
+
+    python3 -m tests.bench.bench_sort [tokens]
+"""
+
+
+import os
+import sys
+
+from subprocess import run, PIPE
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from tests.bench.synth import corpus
+
+
+def timed(args, path, pipe):
+    env = dict(os.environ, LC_ALL='C')
+    best = None
+    for _ in range(3):
+        start = perf_counter()
+        if pipe:
+            with open(path, mode='rb') as ins:
+                proc = run(args, stdin=ins, stdout=PIPE, env=env, check=True)
+        else:
+            proc = run(args + [path], stdout=PIPE, env=env, check=True)
+        took = perf_counter() - start
+        best = took if best is None else min(best, took)
+    return best, proc.stdout
+
+
+def main(tokens=1000000):
+    data = corpus(tokens)
+    print(f'{data.count(b"<text ")} texts, {len(data) / 2**20:.1f} MiB')
+    key = ['./vrt-sort', '--key', 'date,author:n']
+    with TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, 'in.vrt')
+        with open(path, mode='wb') as out:
+            out.write(data)
+        want = None
+        for name, args in (
+                ('--gnu-sort', ['--gnu-sort']),
+                ('extsort', []),
+                ('extsort --memory=1', ['--memory=1']),
+                ('extsort --memory=1 --workers=4',
+                 ['--memory=1', '--workers=4'])):
+            for pipe in (False, True):
+                took, got = timed(key + args, path, pipe)
+                want = want or got
+                assert got == want, name
+                print(f'{name:<32} {"pipe" if pipe else "file":<4}'
+                      f' {took:7.2f} s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,48 @@
+"""
+synth.py
+
+Synthetic VRT for the benchmarks in this directory.
+"""
+
+
+import random
+
+
+WORDS = ('talo kissa koira juoksi nopeasti kotiin ja sitten taas '
+         'ulos , . ? ! että kun mutta hyvin paljon').split()
+
+
+def corpus(tokens, *, seed=1, names=(b'word', b'lemma', b'pos', b'msd',
+                                     b'ref', b'dephead', b'deprel')):
+    """Return synthetic VRT (bytes) of about `tokens` tokens.
+
+    The shape is that of a parsed forum corpus: texts with a few
+    attributes, paragraphs, sentences of 1 to 30 tokens, and seven
+    positional attributes.
+    """
+    rand = random.Random(seed)
+    out = [b'<!-- #vrt positional-attributes: '
+           + b' '.join(names) + b' -->\n']
+    count = 0
+    text = 0
+    while count < tokens:
+        text += 1
+        out.append(b'<text id="t%d" title="Otsikko %d" date="2015-%02d-%02d"'
+                   b' author="nimi%d">\n'
+                   % (text, text, rand.randint(1, 12), rand.randint(1, 28),
+                      rand.randint(1, 500)))
+        for para in range(rand.randint(1, 5)):
+            out.append(b'<paragraph id="p%d-%d">\n' % (text, para))
+            for sent in range(rand.randint(1, 6)):
+                out.append(b'<sentence id="s%d-%d-%d">\n'
+                           % (text, para, sent))
+                for ref in range(1, rand.randint(2, 31)):
+                    word = rand.choice(WORDS).encode('UTF-8')
+                    fields = [word, word.lower(), b'N', b'Case=Nom',
+                              b'%d' % ref, b'%d' % (ref - 1), b'nsubj']
+                    out.append(b'\t'.join(fields[:len(names)]) + b'\n')
+                    count += 1
+                out.append(b'</sentence>\n')
+            out.append(b'</paragraph>\n')
+        out.append(b'</text>\n')
+    return b''.join(out)
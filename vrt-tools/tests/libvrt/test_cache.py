@@ -0,0 +1,95 @@
+"""
+test_cache.py
+
+Pytest tests for libvrt.cache.
+"""
+
+
+from libvrt.args import transput_args
+from libvrt.cache import Cache, add_cache, context
+from libvrt.flow import add_flow
+from libvrt.pr1 import add_workers
+
+
+def test_get_put(tmpdir):
+    """Test that a value put is got, also after reopening."""
+    cache = Cache(str(tmpdir), b'ctx')
+    key = cache.key(b'a\nb\n\n')
+    assert cache.get(key) is None
+    cache.put(key, [b'A', (b'B', b'b')])
+    assert cache.get(key) == [b'A', (b'B', b'b')]
+    cache.close()
+    assert (cache.hits, cache.misses, cache.stored) == (1, 1, 1)
+
+    cache = Cache(str(tmpdir), b'ctx')
+    assert cache.get(cache.key(b'a\nb\n\n')) == [b'A', (b'B', b'b')]
+    cache.close()
+
+
+def test_context(tmpdir):
+    """Test that a different context has different keys."""
+    one = Cache(str(tmpdir), b'one')
+    two = Cache(str(tmpdir), b'two')
+    assert one.key(b'a\n') != two.key(b'a\n')
+    one.close()
+    two.close()
+
+
+def test_context_options():
+    """Test that driver options do not affect the context."""
+    parser = transput_args(description="test")
+    parser.add_argument('--word')
+    add_workers(parser)
+    add_cache(parser)
+    add_flow(parser)
+    args = parser.parse_args(['--word=word', '--cache=c', 'x.vrt'])
+    same = parser.parse_args(['--word=word', '--cache=d', '--workers=3',
+                              '--batch=10', '--window=5', '--stall=1',
+                              '--in-sibling=out', 'y.vrt'])
+    other = parser.parse_args(['--word=form', '--cache=c', 'x.vrt'])
+    assert context(args, ['cut']) == context(same, ['cut'])
+    assert context(args, ['cut']) != context(other, ['cut'])
+    assert context(args, ['cut']) != context(args, ['cut', '-c'])
+
+
+def test_evict(tmpdir):
+    """Test that least recently used entries are evicted."""
+    cache = Cache(str(tmpdir), b'ctx', size=1, batch=10)
+    value = b'x' * (1 << 16)
+    keys = [cache.key(b'%d' % k) for k in range(40)]
+    for key in keys[:10]:
+        cache.put(key, value)
+    for key in keys[:10]:
+        # used, so newer than those put next
+        assert cache.get(key) == value
+    for key in keys[10:]:
+        cache.put(key, value)
+    cache.close()
+    assert cache.evicted > 0
+    assert cache.total <= 1 << 20
+
+    cache = Cache(str(tmpdir), b'ctx', size=1)
+    assert cache.get(keys[10]) is None
+    assert cache.get(keys[-1]) == value
+    cache.close()
+
+
+def test_evict_counted(tmpdir):
+    """Test that only as many entries are evicted as are needed, also
+    of a batch flushed at the same time, and that the total size is
+    kept right when entries are replaced."""
+    cache = Cache(str(tmpdir), b'ctx', size=1, batch=100)
+    value = b'x' * (1 << 14)
+    keys = [cache.key(b'%d' % k) for k in range(120)]
+    for key in keys[:10]:
+        cache.put(key, value)
+    for key in keys:
+        cache.put(key, value)
+    cache.close()
+    assert 0 < cache.evicted < 100
+    evicted, total = cache.evicted, cache.total
+
+    cache = Cache(str(tmpdir), b'ctx', size=1)
+    assert cache.total == total
+    assert sum(cache.get(key) is not None for key in keys) == 120 - evicted
+    cache.close()
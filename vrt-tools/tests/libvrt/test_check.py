@@ -0,0 +1,137 @@
+"""
+test_check.py
+
+Pytest tests for libvrt.check.
+"""
+
+
+import io
+import pickle
+import re
+
+import libvrt.check
+
+from libvrt.check import (Report, Scanner, check_each, check_lines,
+                          _textlines)
+
+
+class Lines:
+
+    """A check that keeps the lines it is given, stopping at stop."""
+
+    def __init__(self, text, stop=None):
+        self.text = text
+        self.stop = stop
+        self.lines = []
+        self.ended = False
+
+    def line(self, k, line):
+        self.lines.append((k, line))
+        return line == self.stop
+
+    def end(self):
+        self.ended = True
+
+
+def test_textlines():
+    """Test that lines are split as in text mode."""
+    assert _textlines('a\n') == ('a\n',)
+    assert _textlines('a\r\n') == ('a\n',)
+    assert _textlines('a\rb\r\n') == ('a\n', 'b\n')
+    assert _textlines('a\rb') == ('a\n', 'b')
+
+
+def test_check_lines():
+    """Test that byte and text checks see the lines as when reading the
+    input in binary and in text mode, and that a stopped check is
+    not ended."""
+    data = b'a\nb\rc\n\xff\nd\ne\n'
+    binary, text = Lines(False), Lines(True)
+    stopped = Lines(True, stop='c\n')
+    check_lines(io.BytesIO(data), [binary, text, stopped])
+    assert binary.lines == list(enumerate(io.BytesIO(data), start=1))
+    assert text.lines == [(1, 'a\n'), (2, 'b\n'), (3, 'c\n'),
+                          (5, 'd\n'), (6, 'e\n')]
+    assert stopped.lines == [(1, 'a\n'), (2, 'b\n'), (3, 'c\n')]
+    assert binary.ended and text.ended and not stopped.ended
+
+
+class Chars(Lines):
+
+    """A check that keeps the lines it is given, that only looks at
+    lines with a soft hyphen or a control character."""
+
+    chars = re.compile('[\xad\x00-\x08]')
+
+
+def test_scanner():
+    """Test that a block is clean only when it has none of the
+    characters and no CR, also when not otherwise UTF-8."""
+    scanner = Scanner([Chars(True)])
+    assert scanner.clean([b'abc\n', 'äö\n'.encode('UTF-8')])
+    assert scanner.clean(['abc\n', 'äö\n'])
+    assert not scanner.clean(['abc\n', 'a\xadb\n'])
+    assert not scanner.clean([b'a\x07\n'])
+    assert not scanner.clean([b'a\r\n'])
+    assert not scanner.clean([b'\xc2\n', b'a\n'])
+    assert Scanner.of([Chars(True), Lines(True)]) is None
+
+
+def test_check_blocks(monkeypatch):
+    """Test that skipping clean blocks and parts of lines gives the
+    checks with chars the same lines with the characters."""
+    monkeypatch.setattr(libvrt.check, 'BLOCK', 100)
+    monkeypatch.setattr(libvrt.check, 'PART', 3)
+    data = b''.join(b'line %d\n' % k if k % 7 else
+                    b'line %d\xc2\xad\r\n' % k if k % 2 else
+                    b'line \xff%d\n' % k
+                    for k in range(100))
+    lines, chars = Lines(True), Chars(True)
+    check_lines(io.BytesIO(data), [lines])
+    check_lines(io.BytesIO(data), [chars])
+    assert chars.lines == [(k, line) for k, line in lines.lines
+                           if '\xad' in line]
+    assert len(chars.lines) == 7
+    each = Chars(True)
+    check_each(io.TextIOWrapper(io.BytesIO(data), encoding='UTF-8',
+                                errors='replace'),
+               each)
+    assert each.lines == chars.lines
+
+
+def test_check_resume(monkeypatch):
+    """Test that checks resumed from a state saved after any block of
+    lines see the same lines as when run in one go."""
+    monkeypatch.setattr(libvrt.check, 'BLOCK', 20)
+    data = b''.join(b'line %d\xc2\xad\r\n' % k if k % 5 == 0 else
+                    b'line \xff%d\n' % k if k % 7 == 0 else
+                    b'line %d\n' % k
+                    for k in range(60))
+
+    def run():
+        return [Lines(False), Chars(True), Lines(True, stop='line 33\n')]
+
+    whole = run()
+    states = []
+    check_lines(io.BytesIO(data), whole,
+                checkpoint=lambda state: states.append(
+                    pickle.loads(pickle.dumps(state()))))
+    assert len(states) > 10
+    for state in states:
+        checks = run()
+        check_lines(io.BytesIO(data), checks, state=state)
+        for check, one in zip(checks, whole):
+            assert check.lines == one.lines
+            assert check.ended == one.ended
+
+
+def test_report():
+    """Test the report lines in binary and in text."""
+    ous = io.BytesIO()
+    Report(ous, binary=True).warn(3, b'meta', b'what')
+    assert ous.getvalue() == (b'line\tlevel\tkind\twhat\n'
+                              b'3\twarning\tmeta\twhat\n')
+    ous = io.StringIO()
+    Report(ous, binary=False).error(0, 'code', 'what')
+    assert ous.getvalue() == ('line\tlevel\tkind\twhat\n'
+                              '0\terror\tcode\twhat\n')
@@ -0,0 +1,89 @@
+"""
+test_checkpoint.py
+
+Pytest tests for libvrt.checkpoint.
+"""
+
+
+import os
+
+import pytest
+
+from libvrt.bad import BadData
+from libvrt.checkpoint import Checkpoint, Reading, flushed, truncate
+
+
+def _write(tmpdir, data='a\nb\nc\nd\ne\n'):
+    path = str(tmpdir.join('in.txt'))
+    with open(path, mode='w') as out:
+        out.write(data)
+    return path
+
+
+def test_save_load(tmpdir):
+    """Test that a saved state is loaded only for the same input file
+    and key, and not after it is removed."""
+    infile = _write(tmpdir)
+    path = str(tmpdir.join('in.txt.checkpoint'))
+    checkpoint = Checkpoint(path, infile, ('tool', 1))
+    assert checkpoint.load() is None
+    checkpoint.save(dict(k=3))
+    assert Checkpoint(path, infile, ('tool', 1)).load() == dict(k=3)
+    with pytest.raises(BadData):
+        Checkpoint(path, infile, ('tool', 2)).load()
+    _write(tmpdir, 'a\nb\n')
+    with pytest.raises(BadData):
+        Checkpoint(path, infile, ('tool', 1)).load()
+    checkpoint.remove()
+    assert not os.path.exists(path)
+    assert checkpoint.load() is None
+
+
+def test_due(tmpdir):
+    """Test that a checkpoint is never due without every."""
+    infile = _write(tmpdir)
+    assert not Checkpoint(infile + '.checkpoint', infile, ()).due()
+    assert Checkpoint(infile + '.checkpoint', infile, (), every=0).due()
+
+
+def test_truncate(tmpdir):
+    """Test that an output is continued from its flushed size."""
+    path = str(tmpdir.join('out.txt'))
+    with open(path, mode='w') as out:
+        out.write('abc')
+        [size] = flushed(out)
+        out.write('def')
+    assert size == 3
+    truncate(path, size)
+    with open(path, mode='a') as out:
+        out.write('x')
+    with open(path) as ins:
+        assert ins.read() == 'abcx'
+
+
+def test_reading(tmpdir):
+    """Test that a reading resumes from the last checkpoint with the
+    values and kept objects as they were."""
+    infile = _write(tmpdir)
+    checkpoint = Checkpoint(infile + '.checkpoint', infile, (), every=0)
+    reading = Reading(checkpoint, 3)
+    seen = []
+    reading.keep(seen=seen)
+    with open(infile) as ins:
+        for k, line in reading.lines(ins):
+            seen.append(line)
+            reading.at(count=k)
+            if k == 2:
+                break
+
+    state = checkpoint.load()
+    assert state['stage'] == 3
+    reading = Reading(checkpoint, 3, state['state'])
+    assert reading.resumed('count', 0) == 2
+    assert reading.resumed('other', 0) == 0
+    seen = reading.resumed('seen', [])
+    with open(infile) as ins:
+        for k, line in reading.lines(ins):
+            seen.append(line)
+    assert k == 5
+    assert seen == ['a\n', 'b\n', 'c\n', 'd\n', 'e\n']
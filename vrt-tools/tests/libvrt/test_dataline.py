@@ -0,0 +1,53 @@
+"""
+test_dataline.py
+
+Pytest tests for libvrt.dataline.
+"""
+
+
+import pytest
+
+import libvrt.dataline as dl
+from libvrt.bad import BadData
+from libvrt.keeper import keeper
+
+
+_lines = [
+    b'a\tb\tc\td\n',
+    b'a\tb\tc\td\r\n',
+    b'a\tb\tc\td',
+    b'a\t\t\td\n',
+    b'a\tb\tc\td\te\tf\n',
+]
+
+
+def _picked(ix, line):
+    """Return the fields ix of line the split-and-rejoin way."""
+    return b'\t'.join(keeper(*ix)(dl.record(line))) + b'\n'
+
+
+@pytest.mark.parametrize('line', _lines)
+@pytest.mark.parametrize('ix', [(0,), (3,), (0, 1), (1, 2), (0, 2),
+                                (0, 1, 2, 3), (3, 2, 1, 0), (2, 0, 3)])
+def test_picker(line, ix):
+    """Test that picker(*ix) agrees with split, keep and join."""
+    assert dl.picker(*ix)(line) == _picked(ix, line)
+
+
+@pytest.mark.parametrize('line', _lines)
+@pytest.mark.parametrize('ix', [(0,), (3,), (1, 2), (3, 0)])
+def test_resetter(line, ix):
+    """Test that resetter(ix, value) agrees with split, set and join."""
+    fields = dl.record(line)
+    for k in ix:
+        fields[k] = b'_'
+    assert dl.resetter(ix, b'_')(line) == b'\t'.join(fields) + b'\n'
+
+
+@pytest.mark.parametrize('ix', [(0, 1, 2), (2,), (2, 0)])
+def test_too_few(ix):
+    """Test that a line with too few fields is bad data."""
+    with pytest.raises(BadData):
+        dl.picker(*ix)(b'a\tb\n')
+    with pytest.raises(BadData):
+        dl.resetter(ix, b'_')(b'a\tb\n')
@@ -0,0 +1,131 @@
+"""
+test_extsort.py
+
+Pytest tests for libvrt.extsort.
+"""
+
+
+import os
+import random
+
+from collections import Counter
+
+import pytest
+
+import libvrt.extsort as extsort
+
+from libvrt.extsort import keyfunc, sort, Shuffle
+
+
+def _pairs(count):
+    rand = random.Random(1)
+    return [(rand.randrange(50), b'v%d' % k) for k in range(count)]
+
+
+@pytest.mark.parametrize('memory,workers', [(256, 1), (0, 1), (0, 3)])
+def test_sort(tmpdir, monkeypatch, memory, workers):
+    """Test that the order is stable with and without spilled runs,
+    and that no run files are left behind."""
+    # Force a multi-level merge
+    monkeypatch.setattr(extsort, 'FANIN', 4)
+    pairs = _pairs(100)
+    got = list(sort(iter(pairs), memory=memory, tempdir=str(tmpdir),
+                    workers=workers, size=lambda pair: 1))
+    assert got == sorted(pairs, key=lambda pair: pair[0])
+    assert os.listdir(str(tmpdir)) == []
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_sort_error(tmpdir, workers):
+    """Test that no run files are left behind when the input fails."""
+    def pairs():
+        yield from _pairs(100)
+        raise ValueError('bad input')
+    with pytest.raises(ValueError):
+        list(sort(pairs(), memory=0, tempdir=str(tmpdir),
+                  workers=workers, size=lambda pair: 1))
+    assert os.listdir(str(tmpdir)) == []
+
+
+def _shuffled(items, rand, tempdir, memory=0):
+    shuffle = Shuffle(rand.shuffle, rand.random, memory=memory,
+                      tempdir=tempdir)
+    for item in items:
+        shuffle.append([item])
+        shuffle.last().append(item)
+    return [tuple(item) for item in shuffle]
+
+
+@pytest.mark.parametrize('memory', [256, 0])
+def test_shuffle(tmpdir, memory):
+    """Test that the shuffle is a reproducible permutation, with and
+    without spilled runs, and that no run files are left behind."""
+    items = [b'%d' % k for k in range(50)]
+    got = _shuffled(items, random.Random(1), str(tmpdir), memory)
+    assert sorted(got) == sorted((item, item) for item in items)
+    assert got != [(item, item) for item in items]
+    assert got == _shuffled(items, random.Random(1), str(tmpdir), memory)
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_shuffle_fanin(tmpdir, monkeypatch):
+    """Test that at most FANIN runs are read at a time, and that the
+    staged shuffle is still a permutation."""
+    monkeypatch.setattr(extsort, 'FANIN', 3)
+    reading, most = 0, 0
+    read = extsort._read
+    def counted(path):
+        nonlocal reading, most
+        reading += 1
+        most = max(most, reading)
+        try:
+            yield from read(path)
+        finally:
+            reading -= 1
+    monkeypatch.setattr(extsort, '_read', counted)
+    items = [b'%d' % k for k in range(50)]
+    got = _shuffled(items, random.Random(1), str(tmpdir))
+    assert sorted(got) == sorted((item, item) for item in items)
+    assert most <= 3
+    assert os.listdir(str(tmpdir)) == []
+
+
+@pytest.mark.parametrize('fanin', [128, 2])
+def test_shuffle_uniform(tmpdir, monkeypatch, fanin):
+    """Test that the interleaved runs give every order about as often,
+    also when interleaved in stages."""
+    monkeypatch.setattr(extsort, 'FANIN', fanin)
+    rand = random.Random(1)
+    counts = Counter(tuple(_shuffled([b'a', b'b', b'c'], rand, str(tmpdir)))
+                     for _ in range(600))
+    assert len(counts) == 6
+    assert all(60 < count < 140 for count in counts.values())
+
+
+def _sorted(options, values):
+    key = keyfunc(options)
+    return sorted(values, key=lambda value: key(value.encode()))
+
+
+def test_keyfunc_types():
+    """Test the typed keys."""
+    assert _sorted('', ['b', 'B', 'a']) == ['B', 'a', 'b']
+    assert _sorted('f', ['b', 'B', 'a']) == ['a', 'b', 'B']
+    assert _sorted('n', ['10', '9', '-1', 'x', '2.5']) == [
+        '-1', 'x', '2.5', '9', '10']
+    assert _sorted('nr', ['10', '9', '2.5']) == ['10', '9', '2.5']
+    assert _sorted('g', ['1e3', '5', 'x']) == ['x', '5', '1e3']
+    assert _sorted('h', ['2M', '3K', '-1G', '10']) == [
+        '-1G', '10', '3K', '2M']
+    assert _sorted('M', ['feb', 'JAN', 'x']) == ['x', 'JAN', 'feb']
+    assert _sorted('V', ['a10', 'a9', 'a1.2']) == ['a1.2', 'a9', 'a10']
+    assert _sorted('D', ['2001-02', '1.1.2001', '2000', 'x']) == [
+        'x', '2000', '1.1.2001', '2001-02']
+
+
+def test_keyfunc_errors():
+    """Test that unknown and incompatible options are rejected."""
+    with pytest.raises(ValueError):
+        keyfunc('x')
+    with pytest.raises(ValueError):
+        keyfunc('nM')
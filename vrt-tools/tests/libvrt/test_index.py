@@ -0,0 +1,78 @@
+"""
+test_index.py
+
+Pytest tests for libvrt.index.
+"""
+
+
+from libvrt.elements import elements
+from libvrt.index import build_index, open_index
+
+
+VRT = b''.join((
+    b'<!-- #vrt positional-attributes: word -->\n',
+    *( b''.join((b'<text id="t%d">\n' % t,
+                 *( b''.join((b'<sentence id="s%d.%d">\n' % (t, s),
+                              *( b'w%d.%d.%d\n' % (t, s, w)
+                                 for w in range(s + 1) ),
+                              b'</sentence>\n'))
+                    for s in range(5) ),
+                 b'</text>\n'))
+       for t in range(3) ),
+))
+
+
+def _write(tmpdir):
+    path = str(tmpdir.join('test.vrt'))
+    with open(path, mode = 'wb') as out:
+        out.write(VRT)
+    return path
+
+
+def test_elements(tmpdir):
+    """Test that every element is found by number."""
+    path = _write(tmpdir)
+    build_index(path)
+    with open(path, mode = 'rb') as ins:
+        want = [ list(element) for element in elements(b'sentence', ins, None) ]
+    with open_index(path) as index, open(path, mode = 'rb') as ins:
+        assert index.count(b'text') == 3
+        assert index.count(b'paragraph') == 0
+        assert index.count(b'sentence') == len(want) == 15
+        assert index.names == b'<!-- #vrt positional-attributes: word -->\n'
+        assert [ index.element(ins, b'sentence', k)
+                 for k in range(15) ] == want
+
+
+def test_tokens(tmpdir):
+    """Test that every token is found by number."""
+    path = _write(tmpdir)
+    build_index(path)
+    want = [ line + b'\n' for line in VRT.split(b'\n')
+             if line and not line.startswith(b'<') ]
+    with open_index(path) as index, open(path, mode = 'rb') as ins:
+        assert index.tokens == len(want) == 45
+        assert [ index.token(ins, n) for n in range(45) ] == want
+        assert [ index.token(ins, n, b'text') for n in range(45) ] == want
+        assert index.find_token(b'text', 14) == 0
+        assert index.find_token(b'text', 15) == 1
+
+
+def test_stale(tmpdir):
+    """Test that an index of a changed file is not used."""
+    path = _write(tmpdir)
+    assert open_index(path) is None
+    build_index(path)
+    open_index(path).close()
+    with open(path, mode = 'ab') as out:
+        out.write(b'<text>\n</text>\n')
+    assert open_index(path) is None
+
+
+def test_repeated_name(tmpdir):
+    """Test that a name given twice is indexed once."""
+    path = _write(tmpdir)
+    head = build_index(path, (b'text', b'text'))
+    assert head['elements'] == {'text': {'count': 3, 'start': 0}}
+    with open_index(path) as index:
+        assert index.count(b'text') == 3
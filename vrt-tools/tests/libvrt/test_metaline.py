@@ -63,6 +63,59 @@ class TestAttributeFuncs:
         """Test that attributes(input) contains names in attrs."""
         assert ml.attributes(input) == tuple(name for name, _ in attrs)
 
+    def test_parser(self, input, attrs):
+        """Test that parser()(input) has the pairs in attrs, also cached."""
+        parse = ml.parser()
+        assert parse(input).pairs() == attrs
+        assert parse(input).pairs() == attrs
+        assert dict(parse(input)) == dict(attrs)
+
+
+class TestParser:
+
+    """Tests for libvrt.metaline.parser."""
+
+    def test_layout_change(self):
+        """Test that a change of attribute layout is noticed."""
+        parse = ml.parser()
+        assert parse(b'<s id="1" a="x">\n').pairs() == [(b'id', b'1'),
+                                                       (b'a', b'x')]
+        assert parse(b'<s a="x" id="1">\n').pairs() == [(b'a', b'x'),
+                                                       (b'id', b'1')]
+        assert parse(b'<s id="2">\n').pairs() == [(b'id', b'2')]
+        assert parse(b'<s>\n').pairs() == []
+        assert parse(b'<s id="3" a="">\n').pairs() == [(b'id', b'3'),
+                                                      (b'a', b'')]
+
+    def test_elements(self):
+        """Test that elements with the same attributes are kept apart."""
+        parse = ml.parser()
+        assert parse(b'<s id="1">\n')[b'id'] == b'1'
+        assert parse(b'<p id="2">\n')[b'id'] == b'2'
+        assert parse(b'<s id="3">\n')[b'id'] == b'3'
+        # a prefix of the element name of the cached layout
+        assert parse(b'<se id="4">\n')[b'id'] == b'4'
+
+    def test_mapping_interface(self):
+        """Test the read-only mapping interface of Attributes."""
+        attrs = ml.parser()(b'<text b="2" a="1">\r\n')
+        assert len(attrs) == 2
+        assert list(attrs) == [b'b', b'a']
+        assert list(attrs.items()) == [(b'b', b'2'), (b'a', b'1')]
+        assert b'a' in attrs and b'c' not in attrs
+        assert attrs.get(b'c') is None
+        assert attrs.get(b'c', b'') == b''
+        assert attrs == ml.mapping(b'<text b="2" a="1">\r\n')
+        with pytest.raises(KeyError):
+            attrs[b'c']
+
+    def test_limit(self):
+        """Test that parsing works past the layout cache limit."""
+        parse = ml.parser(limit=2)
+        for k in range(5):
+            name = b'a%d' % k
+            assert parse(b'<s ' + name + b'="v">\n').pairs() == [(name, b'v')]
+
 
 class TestElement:
 
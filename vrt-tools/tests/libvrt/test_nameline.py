@@ -0,0 +1,39 @@
+"""
+test_nameline.py
+
+Pytest tests for libvrt.nameline.
+"""
+
+
+from io import BytesIO
+
+import pytest
+
+from libvrt.bad import BadData
+from libvrt.nameline import makenameline, splitnames
+from libvrt.runs import runs, COMMENT, START
+
+
+_names = makenameline([b'word', b'lemma'])
+
+
+def test_splitnames():
+    """Test that meta before names is written and the rest returned."""
+    data = (b'<!-- a -->\n' + _names + b'<!-- b -->\n'
+            + b'<text>\nx\tX\n</text>\n')
+    ous = BytesIO()
+    line, rest = splitnames(runs(BytesIO(data)), ous)
+    assert line == _names
+    assert ous.getvalue() == b'<!-- a -->\n'
+    assert [kind for kind, lines in rest][:2] == [COMMENT, START]
+
+
+@pytest.mark.parametrize('data', [
+    b'<text>\nx\tX\n' + _names,
+    b'<!-- a -->\n' * 100 + _names,
+    b'<text>\n',
+])
+def test_splitnames_bad(data):
+    """Test that data before names or too late names are errors."""
+    with pytest.raises(BadData):
+        splitnames(runs(BytesIO(data)), BytesIO())
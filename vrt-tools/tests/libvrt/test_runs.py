@@ -0,0 +1,123 @@
+"""
+test_runs.py
+
+Pytest tests for libvrt.runs.
+"""
+
+
+from io import BytesIO, StringIO
+from itertools import groupby
+
+import pytest
+
+import libvrt.runs as runs
+from libvrt.metaline import ismeta, iscomment, isendtag
+
+
+_vrt = (
+    '<!-- #vrt positional-attributes: word lemma -->\n'
+    '<text id="1">\n'
+    '<sentence>\n'
+    'a\tA\n'
+    '\n'
+    'b\tB\r\n'
+    'c\r\tC\n'
+    '</sentence>\n'
+    '</text>\n'
+    '  \n'
+    '<text>\n'
+    '<sentence>\n'
+    ' <x\tX\n'
+    '</sentence>\n'
+    '<!-- comment -->\n'
+    '<!-- comment -->\n'
+    '<sentence>\n'
+    'd\tD\n'
+    '</sentence>\n'
+    '</text>'
+)
+
+
+def _kind(line):
+    """Return the kind of line (bytes) the slow way."""
+    if not ismeta(line):
+        return runs.DATA
+    if iscomment(line):
+        return runs.COMMENT
+    if isendtag(line):
+        return runs.END
+    return runs.START
+
+
+def _expected(data, blanks):
+    """Return the expected runs of data (bytes) the slow way."""
+    lines = BytesIO(data).readlines()
+    if not blanks:
+        lines = [line for line in lines if not line.isspace()]
+    return [(kind, list(group)) for kind, group in groupby(lines, _kind)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 30, runs.BLOCK])
+@pytest.mark.parametrize('blanks', [False, True])
+def test_runs_bytes(size, blanks):
+    """Test that runs match the per-line classification in any blocks."""
+    data = _vrt.encode('UTF-8')
+    result = list(runs.runs(BytesIO(data), size=size, blanks=blanks))
+    assert result == _expected(data, blanks)
+
+
+@pytest.mark.parametrize('size', [1, 7, runs.BLOCK])
+def test_runs_str(size):
+    """Test that text streams give the same runs as str."""
+    result = list(runs.runs(StringIO(_vrt, newline='\n'), size=size))
+    expected = [(kind, [line.decode('UTF-8') for line in lines])
+                for kind, lines in _expected(_vrt.encode('UTF-8'), False)]
+    assert result == expected
+
+
+@pytest.mark.parametrize('size', [3, runs.BLOCK])
+def test_groups(size):
+    """Test that groups match groupby(filter(issome, ins), ismeta)."""
+    data = _vrt.encode('UTF-8')
+    lines = [line for line in BytesIO(data) if not line.isspace()]
+    expected = [(bool(key), list(group))
+                for key, group in groupby(lines, ismeta)]
+    assert list(runs.groups(BytesIO(data), size=size)) == expected
+
+
+def test_lines():
+    """Test that lines yields every non-blank line once, in order."""
+    data = _vrt.encode('UTF-8')
+    lines = [line for line in BytesIO(data) if not line.isspace()]
+    result = list(runs.lines(BytesIO(data), size=5))
+    assert [line for kind, line in result] == lines
+    assert [kind for kind, line in result] == list(map(_kind, lines))
+
+
+def test_empty():
+    """Test that empty input yields nothing."""
+    assert list(runs.runs(BytesIO(b''))) == []
+    assert list(runs.runs(BytesIO(b'\n \n'))) == []
+
+
+@pytest.mark.parametrize('size', [1, 7, runs.BLOCK])
+@pytest.mark.parametrize('blanks', [False, True])
+def test_chunks(size, blanks):
+    """Test that chunks split into the lines of the runs."""
+    data = _vrt.encode('UTF-8')
+    result = [(kind, BytesIO(chunk).readlines())
+              for kind, chunk
+              in runs.chunks(BytesIO(data), size=size, blanks=blanks)]
+    merged = [(kind, [line for kind, lines in group for line in lines])
+              for kind, group in groupby(result, lambda run: run[0])]
+    assert merged == _expected(data, blanks)
+
+
+@pytest.mark.parametrize('size', [1, 4])
+def test_blank_block(size):
+    """Test that a block of blank lines does not break a run."""
+    data = b'</a>\n  \n\n</b>\nx\n\n'
+    assert (list(runs.runs(BytesIO(data), size=size))
+            == [(runs.END, [b'</a>\n', b'</b>\n']), (runs.DATA, [b'x\n'])])
+    assert (list(runs.groups(BytesIO(data), size=size))
+            == [(True, [b'</a>\n', b'</b>\n']), (False, [b'x\n'])])
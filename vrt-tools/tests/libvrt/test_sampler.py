@@ -0,0 +1,113 @@
+"""
+test_sampler.py
+
+Pytest tests for libvrt.sampler.
+"""
+
+
+import random
+
+from collections import Counter
+from io import BytesIO
+
+import pytest
+
+from libvrt.sampler import Reservoir, Stratified, generators
+from libvrt.sampler import merge_partials, read_partial, write_partial
+
+
+def test_uniform():
+    """Test that each item is about as likely to be sampled, and that
+    the sample is in the input order."""
+    rand = random.Random(1)
+    counts = Counter()
+    for _ in range(2000):
+        reservoir = Reservoir(5, rand=rand.random)
+        for item in range(20):
+            reservoir.add(item)
+        sample = reservoir.sample()
+        assert len(sample) == 5
+        assert sample == sorted(sample)
+        counts.update(sample)
+    # each expected 500 times
+    assert all(400 < counts[item] < 600 for item in range(20))
+
+
+def test_weighted():
+    """Test that items are sampled in proportion to their weight."""
+    rand = random.Random(1)
+    counts = Counter()
+    for _ in range(4000):
+        reservoir = Reservoir(1, rand=rand.random)
+        for item, weight in (('a', 1), ('b', 3), ('z', 0), ('c', 0.0)):
+            reservoir.add(item, weight)
+        counts.update(reservoir.sample())
+    assert set(counts) == {'a', 'b'}
+    # b expected 3000 times
+    assert 2850 < counts['b'] < 3150
+    with pytest.raises(ValueError):
+        Reservoir(1).add('x', -1)
+
+
+def test_few():
+    """Test that all items are sampled when there are not more than k."""
+    reservoir = Reservoir(5)
+    for item in range(3):
+        reservoir.add(item)
+    assert reservoir.sample() == [0, 1, 2]
+    reservoir = Reservoir(0)
+    reservoir.add(1)
+    assert reservoir.sample() == []
+
+
+def test_stratified():
+    """Test that each stratum gets k items, kept in the input order."""
+    stratified = Stratified(2, rand=random.Random(1).random)
+    for item in range(100):
+        stratified.add(item % 3 if item < 90 else 'few', item)
+    sample = stratified.sample()
+    assert sample == sorted(sample)
+    assert Counter(item % 3 for item in sample if item < 90) == {0: 2,
+                                                                 1: 2,
+                                                                 2: 2}
+    assert len([item for item in sample if item >= 90]) == 2
+
+
+def test_generators():
+    """Test that the generators are independent but repeatable."""
+    random.seed('x')
+    first = [rand() for rand in generators(3)]
+    random.seed('x')
+    again = [rand() for rand in generators(3)]
+    assert first == again
+    assert len(set(first)) == 3
+
+
+def _partial(items, k, rand):
+    reservoir = Reservoir(k, rand=rand)
+    for item in items:
+        reservoir.add(item)
+    ous = BytesIO()
+    write_partial(ous, [reservoir], k)
+    return ous.getvalue()
+
+
+def test_merge():
+    """Test that merged partial samples are a uniform sample of all
+    the parts, in the order of the parts."""
+    rand = random.Random(1)
+    parts = [[b'%d\n' % (10 * part + k) for k in range(10)]
+             for part in range(4)]
+    counts = Counter()
+    for _ in range(2000):
+        partials = [_partial(part, 4, rand.random) for part in parts]
+        names, number, strata, items = merge_partials(
+            read_partial(BytesIO(partial)) for partial in partials)
+        assert number == 4
+        assert strata == {(1, b''): [40, 40.0]}
+        sample = [lines for key, order, lines in items[1, b'']]
+        assert len(sample) == 4
+        assert sample == sorted(sample, key=lambda lines: int(lines[0]))
+        counts.update(int(lines[0]) for lines in sample)
+    # each expected 200 times
+    assert all(150 < counts[item] < 250 for item in range(40))
@@ -0,0 +1,148 @@
+"""
+test_schema.py
+
+Pytest tests for libvrt.schema.
+"""
+
+
+import io
+
+import pytest
+
+from libvrt.bad import BadData
+from libvrt.schema import Schema, REST, projected, transform
+
+
+_names = b'word lemma pos msd'.split()
+_line = b'<!-- #vrt positional-attributes: word lemma pos msd -->\n'
+
+
+def test_fromline():
+    """Test parsing a name line into a schema and back."""
+    schema = Schema.fromline(_line)
+    assert schema.names == tuple(_names)
+    assert schema.index[b'pos'] == 2
+    assert schema.line() == _line
+    assert schema == Schema(_names)
+
+
+def test_required():
+    """Test that a missing required name is BadData."""
+    with pytest.raises(BadData):
+        Schema.fromline(_line, required=[b'ref'])
+
+
+def test_duplicate_names():
+    """Test that duplicate names are BadData."""
+    with pytest.raises(BadData):
+        Schema([b'word', b'word'])
+
+
+def test_identity():
+    """Test that the plan of a schema maps every line to itself."""
+    plan = Schema(_names).plan()
+    assert plan.isidentity()
+    assert plan.target == plan.source
+    assert plan.maker()(b'a\tb\tc\td\n') == b'a\tb\tc\td\n'
+
+
+@pytest.mark.parametrize(
+    'step,names,ix', [
+        (lambda plan: plan.keep([b'pos', b'word']),
+         [b'pos', b'word'], (2, 0)),
+        (lambda plan: plan.keep([b'msd', REST]),
+         [b'msd', b'word', b'lemma', b'pos'], (3, 0, 1, 2)),
+        (lambda plan: plan.keep([b'msd', REST, b'word']),
+         [b'msd', b'lemma', b'pos', b'word'], (3, 1, 2, 0)),
+        (lambda plan: plan.drop([b'lemma', b'msd']),
+         [b'word', b'pos'], (0, 2)),
+        (lambda plan: plan.insert([b'x', b'y'], after=b'word'),
+         [b'word', b'x', b'y', b'lemma', b'pos', b'msd'],
+         (0, b'_', b'_', 1, 2, 3)),
+        (lambda plan: plan.insert([b'x'], value=b''),
+         [b'word', b'lemma', b'pos', b'msd', b'x'], (0, 1, 2, 3, b'')),
+        (lambda plan: plan.rename({b'pos': b'upos'}),
+         [b'word', b'lemma', b'upos', b'msd'], (0, 1, 2, 3)),
+    ])
+def test_step(step, names, ix):
+    """Test the names and the index of one projection."""
+    plan = step(Schema(_names).plan())
+    assert plan.target.names == tuple(names)
+    assert plan.ix == ix
+
+
+def test_combined():
+    """Test that projections combine into one index."""
+    plan = (Schema(_names).plan()
+            .drop([b'lemma'])
+            .insert([b'id'], after=b'word', value=b'0')
+            .rename({b'word': b'form'})
+            .keep([b'id', b'form', b'msd']))
+    assert plan.target.names == (b'id', b'form', b'msd')
+    assert plan.ix == (b'0', 0, 3)
+    make = plan.maker()
+    assert make(b'a\tb\tc\td\n') == b'0\ta\td\n'
+    assert make(b'a\tb\tc\td\r\n') == b'0\ta\td\n'
+    assert make(b'a\tb\tc\td') == b'0\ta\td\n'
+
+
+@pytest.mark.parametrize('line', [b'a\tb\tc\td\n', b'a\tb\tc\td\te\n'])
+def test_maker_insert(line):
+    """Test inserting fields in a line, short or long."""
+    make = Schema(_names).plan().insert([b'x'], after=b'lemma').maker()
+    fields = line.rstrip(b'\n').split(b'\t')
+    assert make(line) == b'\t'.join(fields[:2] + [b'_'] + fields[2:4]) + b'\n'
+
+
+def test_maker_only_values():
+    """Test a plan that keeps only inserted fields."""
+    plan = Schema(_names).plan().insert([b'x']).keep([b'x'])
+    assert plan.maker()(b'a\tb\tc\td\n') == b'_\n'
+
+
+@pytest.mark.parametrize(
+    'step', [
+        lambda plan: plan.keep([b'ref']),
+        lambda plan: plan.keep([REST, b'word', REST]),
+        lambda plan: plan.keep([b'word', b'word']),
+        lambda plan: plan.keep([]),
+        lambda plan: plan.drop(_names),
+        lambda plan: plan.drop([b'ref']),
+        lambda plan: plan.insert([b'pos']),
+        lambda plan: plan.insert([b'x', b'x/']),
+        lambda plan: plan.insert([b'x'], after=b'ref'),
+        lambda plan: plan.rename({b'ref': b'x'}),
+        lambda plan: plan.rename({b'pos': b'msd'}),
+    ])
+def test_bad(step):
+    """Test that a bad projection is BadData."""
+    with pytest.raises(BadData):
+        step(Schema(_names).plan())
+
+
+def test_transform_identity():
+    """Test that the identity plan ships token lines as they are, and
+    that a plan that picks fields finds lines of too few fields bad."""
+    text = (_line + b'a\tb\tc\td\n'
+            b'a\tb\tc\td\te\r\n'
+            b'short\tx\n')
+    ous = io.BytesIO()
+    transform(io.BytesIO(text), ous, lambda plan: plan)
+    assert ous.getvalue() == text
+    with pytest.raises(BadData):
+        transform(io.BytesIO(_line + b'a\tb\tc\n'),
+                  io.BytesIO(), lambda plan: plan.keep([b'msd']))
+
+
+@pytest.mark.parametrize('project', [
+    lambda plan: plan,
+    lambda plan: plan.keep([b'pos', b'word']),
+    lambda plan: plan.drop([b'lemma']).rename({b'msd': b'feats'}),
+])
+def test_projected(project):
+    """Test that the generator of lines yields what transform writes."""
+    text = (b'<!-- comment -->\n' + _line + b'<text>\n'
+            b'a\tb\tc\td\n\n<s>\nA\tB\tC\tD\n</s>\n</text>\n')
+    ous = io.BytesIO()
+    transform(io.BytesIO(text), ous, project)
+    assert b''.join(projected(io.BytesIO(text), project)) == ous.getvalue()
@@ -0,0 +1,115 @@
+"""
+test_sketch.py
+
+Pytest tests for libvrt.sketch.
+"""
+
+
+import random
+
+from collections import Counter
+
+import pytest
+
+import libvrt.sketch
+
+from libvrt.bad import BadData
+from libvrt.sketch import CountMin, HyperLogLog, Sketch, TopK, Values
+
+
+def _items(seed, n=20000):
+    """Return n items of a skewed distribution."""
+    rng = random.Random(seed)
+    return ['w{}'.format(int(rng.paretovariate(1.0))) for _ in range(n)]
+
+
+def test_countmin():
+    """Test that counts are never underestimated, and that merged
+    sketches are the sketch of all the items."""
+    one, two, both = CountMin(width=64), CountMin(width=64), CountMin(width=64)
+    items = _items(1)
+    for item in items[:10000]:
+        one.add(item)
+    for item in items[10000:]:
+        two.add(item)
+    for item in items:
+        both.add(item)
+    one.merge(two)
+    assert one.table == both.table
+    for item, count in Counter(items).items():
+        assert both.estimate(item) >= count
+    assert both.estimate('w1') <= Counter(items)['w1'] + len(items) // 10
+    with pytest.raises(BadData):
+        one.merge(CountMin(width=32))
+
+
+@pytest.mark.parametrize('n', [10, 1000, 50000])
+def test_hyperloglog(n):
+    """Test that the number of distinct items is estimated closely, also
+    when merged."""
+    one, two = HyperLogLog(), HyperLogLog()
+    for k in range(n):
+        (one if k % 3 else two).add(str(k))
+        one.add(str(k % 7))
+    one.merge(two)
+    assert abs(one.count() - n) <= max(1, 0.03 * n)
+
+
+def test_topk():
+    """Test that the most frequent items are found, with counts that
+    are at most floor more than the true counts."""
+    items = _items(2)
+    counts = Counter(items)
+    topk = TopK(k=10)
+    for j in range(0, len(items), 1000):
+        part = TopK(k=10)
+        for item in items[j:j + 1000]:
+            part.add(item)
+        topk.merge(part)
+    for item, count in counts.most_common(3):
+        assert count <= topk.counts[item] <= count + topk.floor
+    assert all(count <= topk.floor
+               for item, count in counts.items()
+               if item not in topk.counts)
+
+
+def test_values(monkeypatch):
+    """Test that batches of items are counted as all at once."""
+    monkeypatch.setattr(libvrt.sketch, 'BATCH', 5)
+    items = _items(3)
+    values, whole = Values(), Values()
+    for j in range(0, len(items), 100):
+        values.update(items[j:j + 100])
+    whole.update(items)
+    assert values.top(3) == whole.top(3)
+    assert [item for item, _ in values.top(3)] == [
+        item for item, _ in Counter(items).most_common(3)]
+    assert values.count('w1') >= Counter(items)['w1']
+    assert values.distinct() == whole.distinct()
+    assert abs(values.distinct() - len(set(items))) <= 3
+
+
+def test_sketch(tmpdir):
+    """Test that a sketch is saved and loaded as it was, and that only
+    sketches of the same statistic merge."""
+    path = str(tmpdir.join('test.sketch'))
+    sketch = Sketch('hrt-stat-meta', ('elem', 'attr'), 'len')
+    for value in ['a', 'bb', 'a', 'ccc']:
+        sketch.observe(('text', 'id'), len(value))
+        sketch.add(('text', 'id'), [value])
+    sketch.save(path)
+    loaded = Sketch.load(path)
+    assert loaded.fields == ('elem', 'attr')
+    assert loaded.stats == {('text', 'id'): Counter({1: 2, 2: 1, 3: 1})}
+    assert loaded.values[('text', 'id')].top(2) == [('a', 2), ('bb', 1)]
+
+    loaded.merge(sketch)
+    assert loaded.stats[('text', 'id')][1] == 4
+    assert loaded.values[('text', 'id')].count('a') == 4
+    with pytest.raises(BadData):
+        loaded.merge(Sketch('hrt-stat-meta', ('elem', 'attr'), 'num_w'))
+
+    with open(path, mode='w') as out:
+        out.write('line\tlen\n')
+    with pytest.raises(BadData):
+        Sketch.load(path)
@@ -0,0 +1,103 @@
+"""
+test_tear.py
+
+Pytest tests for libvrt.tear.
+"""
+
+
+import pytest
+
+from libvrt.bad import BadData
+from libvrt.tear import mend, mend_dependencies, shreds, tear, Tears
+
+
+def test_shreds():
+    """Tear as vrt-simple-tear does."""
+    assert [ len(shred) for shred in shreds(list(range(250)), 100) ] == [
+        60, 60, 60, 70 ]
+    assert [ len(shred) for shred in shreds(list(range(99)), 100) ] == [
+        99 ]
+    assert sum(shreds(list(range(9)), 1), []) == list(range(9))
+
+
+def test_mend_dependencies():
+    """Renumber as vrt-conllu-mend does."""
+    shreds = [
+        [ (b'1', b'2', b'nsubj'), (b'2', b'0', b'root') ],
+        [ (b'1', b'0', b'root'), (b'2', b'1', b'obj') ],
+        [ (b'1', b'0', b'punct') ],
+    ]
+    assert mend_dependencies(shreds, ref = 0, head = 1, rel = 2) == [
+        (b'1', b'2', b'nsubj'),
+        (b'2', b'0', b'root'),
+        (b'3', b'2', b'dep'),
+        (b'4', b'3', b'obj'),
+        (b'5', b'0', b'punct'),
+    ]
+
+
+VRT = [
+    b'<!-- #vrt positional-attributes: word -->\n',
+    b'<text>\n',
+    b'<sentence id="1">\n',
+    *( b'a%d\n' % k for k in range(12) ),
+    b'</sentence>\n',
+    b'<sentence id="2">\n',
+    b'b\n',
+    b'</sentence>\n',
+    b'<sentence id="3">\n',
+    *( b'c%d\n' % k for k in range(5) ),
+    b'</sentence>\n',
+    b'</text>\n',
+]
+
+
+def test_tears(tmpdir):
+    """Test that the torn lines mend back with the tears, also when
+    read back from a sidecar file."""
+    tears = Tears()
+    torn = list(tear(VRT, tears, long = 5))
+    assert tears.tears == [ (0, (3, 3, 3, 3)), (2, (3, 2)) ]
+    assert torn.count(b'<sentence>\n') == 4
+    assert torn[2:4] == [ b'<sentence id="1">\n', b'a0\n' ]
+    assert list(mend(torn, tears)) == VRT
+    path = str(tmpdir.join('tears'))
+    tears.write(path)
+    assert list(mend(torn, Tears.read(path))) == VRT
+
+
+def test_comments():
+    """Test that the torn lines mend back with the tears in comments."""
+    torn = list(tear(VRT, long = 5))
+    assert b'<!-- #vrt torn: 3 3 3 3 -->\n' in torn
+    assert list(mend(torn)) == VRT
+
+
+def test_mend_annotated():
+    """Test that dependencies are renumbered in the positional
+    attributes and that mismatched shreds are caught."""
+    tears = Tears()
+    torn = list(tear(VRT, tears, long = 10))
+    annotated, ref = [], 0
+    for line in torn:
+        if line.startswith(b'<!-- #vrt positional-attributes:'):
+            line = b'<!-- #vrt positional-attributes: word ref head rel -->\n'
+        elif line.startswith(b'<sentence'):
+            ref = 0
+        elif not line.startswith(b'<'):
+            ref += 1
+            line = b'%s\t%d\t%d\t%s\n' % (line.rstrip(), ref, ref - 1,
+                                          b'dep' if ref > 1 else b'root')
+        annotated.append(line)
+    mended = list(mend(annotated, Tears(tears.tears),
+                       ref = b'ref', head = b'head', rel = b'rel'))
+    assert mended[3:15] == [
+        b'a%d\t%d\t%d\t%s\n' % (k, k + 1,
+                                 # the root of the second shred
+                                 1 if k == 6 else k,
+                                 b'dep' if k else b'root')
+        for k in range(12)
+    ]
+    lost = annotated.index(b'a3\t4\t3\tdep\n')
+    with pytest.raises(BadData, match = 'do not match'):
+        list(mend(annotated[:lost] + annotated[lost + 1:], tears))
@@ -25,7 +25,7 @@ for dir in data.u.tmp \
 	       data.u.tmpx \
 	       data.u.tmpx.resx \
 	       x \
-	       names lines tokens bytes
+	       names lines tokens bytes jobs
 do
     test -d ${dir} && rm -r ${dir}
 done
@@ -61,11 +61,11 @@ ok_data_trip () {
 
 ok_have_names () {
     [ $(
-	  find $1 -type f |
+	  find $1 -name '*.vrf' |
 	      xargs -n 1 head -n 2 |
 	      grep -c '<!-- #vrt positional-attributes:'
       ) = \
-	$( find $1 -type f | wc -l ) ]
+	$( find $1 -name '*.vrf' | wc -l ) ]
 }
 
 # ADAPT! OR REMOVE!
@@ -226,3 +226,21 @@ then
 else
     date "+%F %T FAIL 8"
 fi
+
+### Test 9 ###
+
+date "+%F %T Test 9 data.n / jobs/{tmp.n,res.n} in parallel"
+
+mkdir jobs
+
+${PACK} --out=jobs/tmp.n --tokens=100 --jobs=3 data.n/
+${UNPACK} --out=jobs/res.n --jobs=3 --verify=sha1 jobs/tmp.n/
+
+if ok_file_trip data.n jobs/res.n &&
+	ok_data_trip data.n jobs/res.n &&
+	ok_have_names jobs/tmp.n
+then
+    date "+%F %T PASS 9"
+else
+    date "+%F %T FAIL 9"
+fi
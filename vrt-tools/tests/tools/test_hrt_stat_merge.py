@@ -0,0 +1,103 @@
+from subprocess import run, PIPE
+
+import pytest
+
+def data(part):
+    '''Return HRT of ten texts of paragraphs of words.'''
+    return ''.join(
+        '<text id="{}.{}" genre="{}">\n'.format(part, t, 'ab'[t % 2]) +
+        ''.join('<paragraph>\n{}\n</paragraph>\n'
+                .format(' '.join(['w{}'.format(p % 5)] * (p + t + 1)))
+                for p in range(8)) +
+        '</text>\n'
+        for t in range(10)).encode('UTF-8')
+
+def stat(tool, *args):
+    return run([tool, *args],
+               stdout = PIPE, check = True, timeout = 30).stdout
+
+def sketches(tmpdir, tool, parts):
+    '''Return the sketch files of the parts and the whole.'''
+    paths = []
+    for part in (*parts, sum(parts, ())):
+        infile = str(tmpdir.join('{}.hrt'.format(len(paths))))
+        with open(infile, mode = 'wb') as out:
+            out.write(b''.join(map(data, part)))
+        paths.append(infile + '.sketch')
+        stat(tool, '--len', '--sum=h5', '--sketch', paths[-1], infile)
+    return paths[:-1], paths[-1]
+
+@pytest.mark.parametrize('tool', ['./hrt-stat-data', './hrt-stat-meta'])
+def test_merge(tmpdir, tool):
+    # the merged sketches of the parts report as the sketch of the
+    # whole, and the summary is as reported on the whole
+    parts, whole = sketches(tmpdir, tool, [(1,), (2, 3), (4,)])
+    for opts in [(), ('--sum=v11',), ('--top=3',), ('--distinct',),
+                 ('--count=w0', '--count=a')]:
+        assert (stat('./hrt-stat-merge', *opts, *parts) ==
+                stat('./hrt-stat-merge', *opts, whole))
+    assert (stat('./hrt-stat-merge', whole) ==
+            stat(tool, '--len', '--sum=h5', str(tmpdir.join('3.hrt'))))
+
+def test_words(tmpdir):
+    # the counts of the words are exact when there are few
+    parts, whole = sketches(tmpdir, './hrt-stat-data', [(1,), (2,)])
+    counts = sorted(((w, 2 * sum(p + t + 1
+                                 for t in range(10)
+                                 for p in range(8)
+                                 if p % 5 == w))
+                     for w in range(5)),
+                    key = lambda pair: -pair[1])
+    assert stat('./hrt-stat-merge', '--top=2', *parts) == (
+        b'value\tcount\n' +
+        b''.join(b'w%d\t%d\n' % pair for pair in counts[:2]))
+    assert stat('./hrt-stat-merge', '--distinct', *parts) == (
+        b'distinct\n5\n')
+
+def test_staged(tmpdir):
+    # a merged sketch merges again
+    parts, whole = sketches(tmpdir, './hrt-stat-meta', [(1,), (2,), (3,)])
+    staged = str(tmpdir.join('staged.sketch'))
+    stat('./hrt-stat-merge', '--sketch', staged, *parts[:2])
+    assert (stat('./hrt-stat-merge', '--top=5', staged, parts[2]) ==
+            stat('./hrt-stat-merge', '--top=5', whole))
+
+def test_mismatch(tmpdir):
+    # sketches of different statistics do not merge
+    parts, whole = sketches(tmpdir, './hrt-stat-meta', [(1,)])
+    infile = str(tmpdir.join('0.hrt'))
+    other = infile + '.maxw.sketch'
+    stat('./hrt-stat-meta', '--max=w', '--sum=h5', '--sketch', other,
+         infile)
+    done = run(['./hrt-stat-merge', *parts, other],
+               stdout = PIPE, stderr = PIPE, timeout = 30)
+    assert done.returncode == 1
+    assert b'different statistics' in done.stderr
+
+def test_resume_sketch(tmpdir):
+    # a statistic that is done without its sketch is done again for
+    # the sketch on --resume --sketch
+    infile = str(tmpdir.join('test.hrt'))
+    with open(infile, mode = 'wb') as out:
+        out.write(data(1))
+    run(['./hrt-stat', '--quiet', infile], check = True, timeout = 60)
+    before = sorted(tmpdir.listdir())
+    assert not any(path.ext == '.sketch' for path in before)
+    run(['./hrt-stat', '--quiet', '--resume', '--sketch', infile],
+        check = True, timeout = 60)
+    sketched = [ path for path in tmpdir.listdir() if path.ext == '.sketch' ]
+    assert len(sketched) == len(before) - 1
+
+def test_resume_temp(tmpdir):
+    # the temporary output of a statistic that was being computed when
+    # the run was stopped is removed when the statistic is done again
+    infile = str(tmpdir.join('test.hrt'))
+    with open(infile, mode = 'wb') as out:
+        out.write(data(1))
+    run(['./hrt-stat', '--quiet', infile], check = True, timeout = 60)
+    tmpdir.join('test.hrt.meta.maxw').remove()
+    tmpdir.join('test.hrt.meta.maxw.wouj50zo.tmp').write('partial')
+    run(['./hrt-stat', '--quiet', '--resume', infile],
+        check = True, timeout = 60)
+    assert tmpdir.join('test.hrt.meta.maxw').check()
+    assert not any(path.ext == '.tmp' for path in tmpdir.listdir())
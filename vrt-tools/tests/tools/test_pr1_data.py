@@ -350,3 +350,135 @@ def test_003d():
                     b'</text>',
                     b''))
     )
+
+def test_workers():
+    # more sentences than in one batch, so every worker gets some
+    inf = b''.join((b'<!-- #vrt positional-attributes: ref word -->\n',
+                    b'<text>\n',
+                    *( b'<sentence n="%d">\n1\tTietokoneilla\n'
+                       b'2\tvoi%d\n</sentence>\n' % (k, k)
+                       for k in range(1000) ),
+                    b'</text>\n'))
+    one = run([ './vrt-test-pr1-data', '--word=word' ],
+              input = inf,
+              stdout = PIPE,
+              stderr = PIPE,
+              timeout = 10)
+    many = run([ './vrt-test-pr1-data', '--word=word', '--workers=3',
+                 '--batch=100' ],
+               input = inf,
+               stdout = PIPE,
+               stderr = PIPE,
+               timeout = 10)
+    assert not one.returncode
+    assert not many.returncode
+    assert many.stdout == one.stdout
+    assert many.stderr.count(b'worker') == 3
+
+def test_cache(tmpdir):
+    # a second run answers every sentence from the cache
+    inf = b''.join((b'<!-- #vrt positional-attributes: ref word -->\n',
+                    b'<text>\n',
+                    *( b'<sentence n="%d">\n1\tTietokoneilla\n'
+                       b'2\tvoi%d\n</sentence>\n' % (k, k % 100)
+                       for k in range(1000) ),
+                    b'</text>\n'))
+    want = run([ './vrt-test-pr1-data', '--word=word' ],
+               input = inf,
+               stdout = PIPE,
+               stderr = PIPE,
+               timeout = 10)
+    # how many repeated sentences hit in the first run depends on
+    # how soon the first instance of them comes back
+    for hits in (b' hits', b' 1000 hits'):
+        proc = run([ './vrt-test-pr1-data', '--word=word',
+                     '--cache', str(tmpdir) ],
+                   input = inf,
+                   stdout = PIPE,
+                   stderr = PIPE,
+                   timeout = 10)
+        assert not proc.returncode
+        assert proc.stdout == want.stdout
+        assert hits in proc.stderr
+
+def test_window():
+    # cut keeps its output in a buffer, so a small window must grow
+    inf = b''.join((b'<!-- #vrt positional-attributes: ref word -->\n',
+                    b'<text>\n',
+                    *( b'<sentence n="%d">\n1\tTietokoneilla\n'
+                       b'2\tvoi%d\n</sentence>\n' % (k, k)
+                       for k in range(2000) ),
+                    b'</text>\n'))
+    want = run([ './vrt-test-pr1-data', '--word=word' ],
+               input = inf,
+               stdout = PIPE,
+               stderr = PIPE,
+               timeout = 10)
+    proc = run([ './vrt-test-pr1-data', '--word=word',
+                 '--window=4', '--stall=0.1' ],
+               input = inf,
+               stdout = PIPE,
+               stderr = PIPE,
+               timeout = 20)
+    assert not proc.returncode
+    assert proc.stdout == want.stdout
+    assert b'grown to 8' in proc.stderr
+
+def test_window_options():
+    # a window or stall that would never let a full window wait
+    for option in ('--window=-1', '--stall=0', '--stall=-1'):
+        proc = run([ './vrt-test-pr1-data', '--word=word', option ],
+                   input = b'',
+                   stdout = PIPE,
+                   stderr = PIPE,
+                   timeout = 10)
+        assert proc.returncode == 2
+        assert option.split('=')[0].encode() in proc.stderr
+
+def long_sentences(lengths):
+    return b''.join((b'<!-- #vrt positional-attributes: ref word -->\n',
+                     b'<text>\n',
+                     *( b''.join((b'<sentence n="%d">\n' % k,
+                                  *( b'%d\tsana%d\n' % (r + 1, r)
+                                     for r in range(n) ),
+                                  b'</sentence>\n'))
+                        for k, n in enumerate(lengths) ),
+                     b'</text>\n'))
+
+def test_tear():
+    # torn sentences are mended to the same output as without tearing
+    inf = long_sentences([3, 250, 99, 100, 1, 1000, 2] * 5)
+    want = run([ './vrt-test-pr1-data', '--word=word' ],
+               input = inf,
+               stdout = PIPE,
+               stderr = PIPE,
+               timeout = 10)
+    for options in ([ '--tear=100' ],
+                     [ '--tear=7', '--batch=50' ],
+                     [ '--tear=100', '--workers=2', '--batch=300' ]):
+        proc = run([ './vrt-test-pr1-data', '--word=word', *options ],
+                   input = inf,
+                   stdout = PIPE,
+                   stderr = PIPE,
+                   timeout = 10)
+        assert not proc.returncode
+        assert proc.stdout == want.stdout
+
+def test_tear_cache(tmpdir):
+    # the mended result is what is cached
+    inf = long_sentences([250, 3] * 10)
+    want = run([ './vrt-test-pr1-data', '--word=word' ],
+               input = inf,
+               stdout = PIPE,
+               stderr = PIPE,
+               timeout = 10)
+    for k in range(2):
+        proc = run([ './vrt-test-pr1-data', '--word=word', '--tear=100',
+                     '--cache', str(tmpdir) ],
+                   input = inf,
+                   stdout = PIPE,
+                   stderr = PIPE,
+                   timeout = 10)
+        assert not proc.returncode
+        assert proc.stdout == want.stdout
+    assert b' 20 hits' in proc.stderr
@@ -0,0 +1,84 @@
+import os, time
+from socket import socket, AF_UNIX, SOCK_STREAM, SHUT_WR
+from subprocess import Popen, run, PIPE
+
+import pytest
+
+MOCK = os.path.join('libvrt', 'tools', 'mock-ud-parse.py')
+
+@pytest.fixture
+def server(tmpdir):
+    '''Start vrt-annotator-server with the given options and command,
+    return the socket path; terminate the server at the end.
+
+    '''
+    procs = []
+    def start(*argv):
+        path = str(tmpdir.join('annotator.socket'))
+        procs.append(Popen(['./vrt-annotator-server', '-s', path, *argv]))
+        for _ in range(100):
+            if os.path.exists(path): return path
+            time.sleep(0.05)
+        raise Exception('server did not start')
+    yield start
+    for proc in procs:
+        proc.terminate()
+        assert proc.wait(timeout = 10) == 0
+
+def sentences(n):
+    return b''.join((b'<!-- #vrt positional-attributes: ref word -->\n',
+                     b'<text>\n',
+                     *( b'<sentence id="s%d">\n1\tTietokoneilla\n'
+                        b'2\tvoi%d\n</sentence>\n' % (k, k)
+                        for k in range(n) ),
+                     b'</text>\n'))
+
+def test_data(server):
+    # several clients in turn get the same output as without server
+    path = server('--', 'stdbuf', '-oL', 'cut', '-c', '-3')
+    inf = sentences(500)
+    want = run(['./vrt-test-pr1-data'], input = inf,
+               stdout = PIPE, stderr = PIPE, timeout = 10)
+    for k in range(3):
+        proc = run(['./vrt-test-pr1-data', '--server', path],
+                   input = inf, stdout = PIPE, stderr = PIPE, timeout = 10)
+        assert proc.returncode == 0
+        assert not proc.stderr
+        assert proc.stdout == want.stdout
+
+def test_meta(server):
+    # one line per sentence
+    path = server('--end', 'line', '--', 'stdbuf', '-oL', 'cut', '-f', '3')
+    inf = sentences(50)
+    want = run(['./vrt-test-pr1-meta'], input = inf,
+               stdout = PIPE, stderr = PIPE, timeout = 10)
+    proc = run(['./vrt-test-pr1-meta', '--server', path],
+               input = inf, stdout = PIPE, stderr = PIPE, timeout = 10)
+    assert proc.returncode == 0
+    assert proc.stdout == want.stdout
+
+def test_mock(server):
+    # the mock parser sees the same as a real UD parser would
+    path = server('--', 'python3', MOCK)
+    with open(MOCK[:-len('.py')] + '.conllu', mode = 'rb') as ins:
+        inf = ins.read()
+    want = run(['python3', MOCK], input = inf, stdout = PIPE, timeout = 10)
+    for k in range(2):
+        with socket(AF_UNIX, SOCK_STREAM) as conn:
+            conn.connect(path)
+            conn.sendall(inf)
+            conn.shutdown(SHUT_WR)
+            out = b''.join(iter(lambda: conn.recv(1 << 16), b''))
+        assert out == want.stdout
+
+def test_no_server(tmpdir):
+    proc = run(['./vrt-test-pr1-data', '--server', str(tmpdir.join('no'))],
+               input = sentences(2), stdout = PIPE, stderr = PIPE,
+               timeout = 10)
+    assert proc.returncode == 1
+    assert b'cannot connect' in proc.stderr
+
+def test_exclusive(tmpdir):
+    proc = run(['./vrt-test-pr1-data', '--server', 'x', '--workers', '2'],
+               input = b'', stdout = PIPE, stderr = PIPE, timeout = 10)
+    assert proc.returncode == 2
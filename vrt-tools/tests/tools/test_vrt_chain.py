@@ -0,0 +1,77 @@
+from subprocess import Popen, PIPE
+
+from tests.tools import fake # sibling library module to provide fake data
+
+def run(*argv, send = b''):
+    proc = Popen(argv,
+                 stdin = PIPE,
+                 stdout = PIPE,
+                 stderr = PIPE)
+    out, err = proc.communicate(input = send, timeout = 10)
+    return out, err, proc.returncode
+
+def pipeline(send, *stages):
+    '''Output of the stages run as separate processes.'''
+    for stage in stages:
+        send, err, code = run(*stage, send = send)
+        assert not err and code == 0
+    return send
+
+def test_000(tmpdir):
+    out, err, code = run('./vrt-chain', '--help')
+    assert out
+    assert not err
+    assert code == 0
+
+def test_fused(tmpdir):
+    # vrt-rename, vrt-drop, vrt-keep fuse into one plan
+    send = b''.join(fake.nameloop(120, b'word line loop'.split()))
+    want = pipeline(send,
+                    ['./vrt-rename', '-m', 'word=form'],
+                    ['./vrt-drop', '-f', 'line'],
+                    ['./vrt-keep', '-f', 'loop', '--rest'])
+    out, err, code = run('./vrt-chain',
+                         '-s', 'vrt-rename -m word=form',
+                         '-s', 'vrt-drop -f line',
+                         '-s', 'vrt-keep -f loop --rest',
+                         send = send)
+    assert out.decode() == want.decode()
+    assert not err
+    assert code == 0
+
+def test_generators(tmpdir):
+    # vrt-select, vrt-add-id and vrt-drop-empty pass their lines on
+    # as generators, after a fused stage
+    send = b''.join(fake.nameloop(120, b'word line loop'.split()))
+    want = pipeline(send,
+                    ['./vrt-keep', '-f', 'line'],
+                    ['./vrt-select', '-s', 'meta', '-t', 'loop=[12]'],
+                    ['./vrt-add-id', '-e', 'meta', '--type', 'counter'],
+                    ['./vrt-drop-empty'])
+    out, err, code = run('./vrt-chain',
+                         '-s', 'vrt-keep -f line',
+                         '-s', 'vrt-select -s meta -t "loop=[12]"',
+                         '-s', 'vrt-add-id -e meta --type counter',
+                         '-s', 'vrt-drop-empty',
+                         send = send)
+    assert out.decode() == want.decode()
+    assert not err
+    assert code == 0
+
+def test_bad_data(tmpdir):
+    # a stage error is reported with the stage name
+    send = b''.join(fake.nameloop(120, b'word line loop'.split()))
+    out, err, code = run('./vrt-chain',
+                         '-s', 'vrt-keep -f nosuch',
+                         '-s', 'vrt-drop-empty',
+                         send = send)
+    assert b'vrt-keep' in err
+    assert code == 1
+
+def test_bad_stage(tmpdir):
+    out, err, code = run('./vrt-chain', '-s', 'vrt-keep -f word file.vrt')
+    assert err
+    assert code == 2
+    out, err, code = run('./vrt-chain', '-s', 'vrt-nosuch')
+    assert err
+    assert code == 2
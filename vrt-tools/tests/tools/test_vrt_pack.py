@@ -0,0 +1,81 @@
+import os
+from subprocess import run, PIPE
+
+DATA = os.path.join('tests', 'pack', 'data.n')
+
+def tree(top):
+    '''Return a dict of the files under top by relative path.'''
+    found = {}
+    for path, dirs, files in os.walk(top):
+        for name in files:
+            with open(os.path.join(path, name), mode = 'rb') as ins:
+                found[os.path.relpath(os.path.join(path, name), top)] = (
+                    ins.read())
+    return found
+
+def test_jobs(tmpdir):
+    # parallel packing and unpacking by the manifest is the same
+    # round trip as the sequential
+    for jobs in ('1', '3'):
+        pack = str(tmpdir.join('pack' + jobs))
+        back = str(tmpdir.join('back' + jobs))
+        run(['./vrt-pack', '--tokens=100', '--jobs', jobs, '--out', pack,
+             DATA], check = True, timeout = 30)
+        assert os.path.exists(os.path.join(pack, 'manifest.tsv'))
+        run(['./vrt-unpack', '--jobs', jobs, '--verify=sha1', '--out', back,
+             pack], check = True, timeout = 30)
+    assert tree(str(tmpdir.join('back3'))) == tree(str(tmpdir.join('back1')))
+    assert b''.join(tree(str(tmpdir.join('back1'))).values())
+
+def test_verify(tmpdir):
+    # a lost token does not match the manifest
+    pack = str(tmpdir.join('pack'))
+    run(['./vrt-pack', '--tokens=100', '--out', pack, DATA],
+        check = True, timeout = 30)
+    member = os.path.join(pack, 'a000', 'm001.vrf')
+    with open(member, mode = 'rb') as ins:
+        lines = ins.readlines()
+    k = next(k for k, line in enumerate(lines) if not line.startswith(b'<'))
+    with open(member, mode = 'wb') as out:
+        out.writelines(lines[:k] + lines[k + 1:])
+    proc = run(['./vrt-unpack', '--verify=tokens', '--jobs=2',
+                '--out', str(tmpdir.join('back')), pack],
+               stdout = PIPE, stderr = PIPE, timeout = 30)
+    assert proc.returncode == 1
+    assert b'manifest has' in proc.stderr
+
+def test_update(tmpdir):
+    # an updated pack keeps the members of unchanged documents and
+    # unpacks to the same as a new pack of the changed documents
+    data = str(tmpdir.join('data'))
+    run(['cp', '-r', DATA, data], check = True, timeout = 30)
+    pack = str(tmpdir.join('pack'))
+    run(['./vrt-pack', '--tokens=100', '--out', pack, data],
+        check = True, timeout = 30)
+    before = tree(pack)
+
+    proc = run(['./vrt-pack', '--tokens=100', '--update', '--out', pack,
+                data], stdout = PIPE, check = True, timeout = 30)
+    assert proc.stdout == b''
+    assert tree(pack) == before
+
+    with open(os.path.join(data, 'four.vrt'), mode = 'ab') as out:
+        out.write(b'<text>\nnew\n</text>\n')
+    os.remove(os.path.join(data, 'six.vrt'))
+    proc = run(['./vrt-pack', '--tokens=100', '--update', '--jobs=2',
+                '--out', pack, data],
+               stdout = PIPE, check = True, timeout = 30)
+    new = proc.stdout.decode('UTF-8').split()
+    assert new
+    after = tree(pack)
+    assert all(member in after for member in new)
+    assert all(member not in before for member in new)
+    assert sum(member in after for member in before) > len(before) // 2
+
+    run(['./vrt-unpack', '--verify=sha1', '--out',
+         str(tmpdir.join('back')), pack], check = True, timeout = 30)
+    run(['./vrt-pack', '--tokens=100', '--out', str(tmpdir.join('fresh')),
+         data], check = True, timeout = 30)
+    run(['./vrt-unpack', '--out', str(tmpdir.join('freshback')),
+         str(tmpdir.join('fresh'))], check = True, timeout = 30)
+    assert tree(str(tmpdir.join('back'))) == tree(str(tmpdir.join('freshback')))
@@ -0,0 +1,68 @@
+import os
+from subprocess import run, PIPE
+
+HEAD = b'<!-- #vrt positional-attributes: word -->\n'
+
+def data(count):
+    '''Return VRT of count texts with attribute n, cycling 0 to 9.'''
+    return HEAD + b''.join(
+        b'<text n="%d" id="t%d">\nw%d\n</text>\n' % (k % 10, k, k)
+        for k in range(count))
+
+def parts(outdir):
+    '''Return a dict of the output files in outdir by name.'''
+    found = {}
+    for name in os.listdir(outdir):
+        with open(os.path.join(outdir, name), mode = 'rb') as ins:
+            found[name] = ins.read()
+    return found
+
+def test_key(tmpdir):
+    # more partitions than open handles, each in input order
+    infile = str(tmpdir.join('in.vrt'))
+    with open(infile, mode = 'wb') as out:
+        out.write(data(100))
+    outdir = str(tmpdir.join('out'))
+    run(['./vrt-partition', '--key', "'n' + n", '--handles=3',
+         '--buffer=0', '--outdir', outdir, infile],
+        check = True, timeout = 30)
+    found = parts(outdir)
+    assert sorted(found) == [ 'in-n{}.vrt'.format(k) for k in range(10) ]
+    assert found['in-n3.vrt'] == HEAD + b''.join(
+        b'<text n="3" id="t%d">\nw%d\n</text>\n' % (k, k)
+        for k in range(3, 100, 10))
+
+def test_jobs(tmpdir):
+    # several inputs in parallel into the same partitions
+    infiles = []
+    for k in range(4):
+        infiles.append(str(tmpdir.join('in{}.vrt'.format(k))))
+        with open(infiles[-1], mode = 'wb') as out:
+            out.write(data(100))
+    outdir = str(tmpdir.join('out'))
+    run(['./vrt-partition', '--key', "attr['n']", '--jobs=4',
+         '--handles=2', '--buffer=0', '--outdir', outdir, *infiles],
+        check = True, timeout = 30)
+    found = parts(outdir)
+    assert sorted(found) == [ 'in0-{}.vrt'.format(k) for k in range(10) ]
+    lines = found['in0-3.vrt'].splitlines(keepends = True)
+    assert lines[0] == HEAD
+    assert lines.count(HEAD) == 1
+    starts = [ line for line in lines if line.startswith(b'<text ') ]
+    assert len(starts) == 40
+    assert len(set(starts)) == 10
+    assert all(b' n="3" ' in line for line in starts)
+    assert len(lines) == 1 + 3 * len(starts)
+
+def test_bad_key(tmpdir):
+    # no partial output when the key fails
+    infile = str(tmpdir.join('in.vrt'))
+    with open(infile, mode = 'wb') as out:
+        out.write(data(10) + b'<text id="x">\nw\n</text>\n')
+    outdir = str(tmpdir.join('out'))
+    proc = run(['./vrt-partition', '--key', 'n', '--outdir', outdir,
+                infile],
+               stdout = PIPE, stderr = PIPE, timeout = 30)
+    assert proc.returncode == 1
+    assert b'NameError' in proc.stderr
+    assert os.listdir(outdir) == []
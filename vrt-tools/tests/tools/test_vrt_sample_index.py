@@ -0,0 +1,33 @@
+from subprocess import run, PIPE
+
+import pytest
+
+def data():
+    '''Return VRT of texts of sentences of various lengths.'''
+    return b'<!-- #vrt positional-attributes: word -->\n' + b''.join(
+        b'<text id="t%d">\n' % t +
+        b''.join(b'<sentence>\n' +
+                 b''.join(b'w%d.%d.%d\n' % (t, s, w)
+                          for w in range((t * s) % 7 + 1)) +
+                 b'</sentence>\n'
+                 for s in range(t % 4 + 1)) +
+        b'</text>\n'
+        for t in range(200))
+
+def sample(*args):
+    return run(args, stdout = PIPE, check = True, timeout = 30).stdout
+
+@pytest.mark.parametrize('tool', [
+    ('./vrt-sample-elements', '--element=text', '--number=7'),
+    ('./vrt-sample-elements', '--element=sentence', '--number=300'),
+    ('./vrt-sample-tokens', '--number=11'),
+])
+def test_seed(tmpdir, tool):
+    # a seed draws the same sample with and without an index
+    infile = str(tmpdir.join('test.vrt'))
+    with open(infile, mode = 'wb') as out:
+        out.write(data())
+    scanned = sample(*tool, '--seed=3', infile)
+    run(['./vrt-index', infile], stderr = PIPE, check = True, timeout = 30)
+    assert sample(*tool, '--seed=3', infile) == scanned
+    assert sample(*tool, '--seed=4', infile) != scanned
@@ -0,0 +1,83 @@
+from subprocess import run, PIPE
+
+import pytest
+
+HEAD = b'<!-- #vrt positional-attributes: word -->\n'
+
+def data(part):
+    '''Return VRT of a text of 20 sentences.'''
+    return HEAD + b''.join((
+        b'<text part="%d">\n' % part,
+        *( b'<sentence id="s%d.%d">\nw\n</sentence>\n' % (part, k)
+           for k in range(20) ),
+        b'</text>\n'))
+
+def sample(tmpdir, *args):
+    '''Return the partial samples of three parts.'''
+    partials = []
+    for part in range(3):
+        infile = str(tmpdir.join('part{}.vrt'.format(part)))
+        with open(infile, mode = 'wb') as out:
+            out.write(data(part))
+        partials.append(infile + '.part')
+        run(['./vrt-sample-elements', '--partial', '--seed=1',
+             '--out', partials[-1], *args, infile],
+            check = True, timeout = 30)
+    return partials
+
+def merge(*args):
+    return run(['./vrt-sample-merge', *args],
+               stdout = PIPE, check = True, timeout = 30).stdout
+
+def test_merge(tmpdir):
+    # the merged sample is of all parts, in order, and the same when
+    # merged in stages
+    partials = sample(tmpdir, '--number=5')
+    merged = merge(*partials)
+    ids = [ tuple(map(int, line[15:-2].split(b'.')))
+            for line in merged.splitlines()
+            if line.startswith(b'<sentence ') ]
+    assert merged.startswith(HEAD)
+    assert len(ids) == 5
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 5
+
+    staged = str(tmpdir.join('staged.part'))
+    with open(staged, mode = 'wb') as out:
+        out.write(merge('--partial', *partials[:2]))
+    assert merge(staged, partials[2]) == merged
+    assert merge('--number=2', *partials) != merged
+
+def test_strata(tmpdir):
+    # two samples of two sentences of each part
+    partials = sample(tmpdir, '--number=2', '--stratify=part',
+                      '--samples=2')
+    merged = merge(*partials)
+    assert merged.count(b'<sample n="1">\n') == 1
+    assert merged.count(b'<sample n="2">\n') == 1
+    assert merged.count(b'<sentence id="s1.') == 4
+
+def test_number(tmpdir):
+    # a sample cannot be larger than the partial samples
+    partials = sample(tmpdir, '--number=2')
+    proc = run(['./vrt-sample-merge', '--number=3', *partials],
+               stdout = PIPE, stderr = PIPE, timeout = 30)
+    assert proc.returncode == 1
+    assert b'less than 3' in proc.stderr
+
+@pytest.mark.parametrize('tool', ['./vrt-sample-elements',
+                                  './vrt-sample-tokens'])
+def test_stdin_parts(tool):
+    # parts read from stdin are seeded by their labels, so they draw
+    # different keys, and need a label with a seed
+    def keys(*args):
+        out = run([tool, '--partial', '--seed=1', '--number=5', *args],
+                  input = data(0), stdout = PIPE, stderr = PIPE,
+                  timeout = 30)
+        return out.returncode, [ line for line in out.stdout.splitlines()
+                                 if b' key="' in line ]
+    code, one = keys('--part=one')
+    assert code == 0 and len(one) == 5
+    assert keys('--part=two')[1] != one
+    assert keys('--part=one')[1] == one
+    assert keys()[0] == 2
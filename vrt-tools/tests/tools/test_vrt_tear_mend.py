@@ -0,0 +1,61 @@
+import sys
+from subprocess import run, PIPE
+
+DATA = b''.join((
+    b'<!-- #vrt positional-attributes: word -->\n',
+    b'<text>\n',
+    *( b''.join((b'<sentence id="s%d">\n' % s,
+                 *( b'w%d\n' % w for w in range(3 * s) ),
+                 b'</sentence>\n'))
+       for s in range(1, 10) ),
+    b'</text>\n',
+))
+
+# passes VRT through if no sentence has 10 or more tokens
+SHORT = '''
+import sys
+size = 0
+for line in sys.stdin.buffer:
+    if line.startswith(b'<sentence'):
+        size = 0
+    elif not line.startswith(b'<'):
+        size += 1
+    assert size < 10, 'long sentence'
+    sys.stdout.buffer.write(line)
+'''
+
+def test_command():
+    # the command sees only short shreds, the output is mended
+    proc = run(['./vrt-tear-mend', '--long=10', '--',
+                sys.executable, '-c', SHORT],
+               input = DATA, stdout = PIPE, timeout = 30)
+    assert proc.returncode == 0
+    assert proc.stdout == DATA
+    proc = run([sys.executable, '-c', SHORT],
+               input = DATA, stdout = PIPE, stderr = PIPE, timeout = 30)
+    assert proc.returncode == 1
+
+def test_sidecar(tmpdir):
+    # tear and mend in separate steps
+    sidecar = str(tmpdir.join('tears'))
+    torn = run(['./vrt-tear-mend', '--long=10', '--tear',
+                '--sidecar', sidecar],
+               input = DATA, stdout = PIPE, check = True,
+               timeout = 30).stdout
+    assert torn != DATA
+    assert b'#vrt torn' not in torn
+    mended = run(['./vrt-tear-mend', '--mend', '--sidecar', sidecar],
+                 input = torn, stdout = PIPE, check = True,
+                 timeout = 30).stdout
+    assert mended == DATA
+
+def test_comments():
+    # tear and mend with the tears in comments
+    torn = run(['./vrt-tear-mend', '--long=10', '--tear'],
+               input = DATA, stdout = PIPE, check = True,
+               timeout = 30).stdout
+    assert b'<!-- #vrt torn: 6 6 -->\n' in torn
+    mended = run(['./vrt-tear-mend', '--mend'],
+                 input = torn, stdout = PIPE, check = True,
+                 timeout = 30).stdout
+    assert mended == DATA
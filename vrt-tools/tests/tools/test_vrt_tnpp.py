@@ -0,0 +1,21 @@
+# -*- mode: Python; -*-
+
+'''Testing the options of vrt-tnpp-finnish-tdt and vrt-tnpp-english-ewt,
+whose --batch-lines is passed on to the parser while the --batch of
+libvrt protocol 1 aka pr1 sizes the batches of tokens that are sent.
+
+'''
+
+from libvrt.pr1 import BATCH
+from libvrt.tools.vrt_tnpp_fi_tdt import parsearguments
+
+def test_defaults():
+    args = parsearguments([], 'test', 'fi_tdt_dia')
+    assert args.batch == '1000'
+    assert args.batch_tokens == BATCH
+
+def test_batches():
+    args = parsearguments([ '--batch=500', '--batch-lines=5000' ],
+                          'test', 'en_ewt_dia')
+    assert args.batch == '5000'
+    assert args.batch_tokens == 500
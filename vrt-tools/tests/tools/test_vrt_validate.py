@@ -0,0 +1,65 @@
+from subprocess import run, PIPE
+
+import pytest
+
+# issues that depend on the state at the start of a chunk: open
+# elements, field names and numbers, attribute names
+LINES = [
+    b'<text id="1" a="x">\n',
+    b'<text a="x" id="2">\n',
+    b'</text>\n',
+    b'<sentence>\n',
+    b'</sentence>\n',
+    b'<p q="1">\n',
+    b'</p>\n',
+    b'a\tb\tc\n',
+    b'a\tb\n',
+    b'bad&\tb\tc\n',
+    b'a\x07\tb\tc\r\n',
+    b'\xff\tb\tc\n',
+    b'\n',
+    b'<!-- #vrt positional-attributes: w l p -->\n',
+    b'<!-- #vrt positional-attributes: w l -->\n',
+    b'<!-- comment -->\n',
+    b'<bad tag\n',
+]
+
+def data(seed):
+    '''Return VRT of every sort of line, seeded to differ.'''
+    return b''.join(LINES[(seed * k * k + k) % len(LINES)]
+                    for k in range(2000))
+
+def validate(*args):
+    return run(['./vrt-validate', *args],
+               stdout = PIPE, check = True, timeout = 60).stdout
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('opts', [(), ('--summary', '--info'),
+                                  ('--verbose', '--info')])
+def test_jobs(tmpdir, seed, opts):
+    # validating in chunks in parallel reports exactly the same as
+    # validating in one process
+    infile = str(tmpdir.join('data.vrt'))
+    with open(infile, mode = 'wb') as out:
+        out.write(data(seed))
+    report = validate(*opts, infile)
+    assert report.count(b'\n') > 10
+    assert validate('--jobs=3', *opts, infile) == report
+
+def test_jobs_fields(tmpdir):
+    # the number of fields and late field names seen in one chunk are
+    # known in the later chunks
+    infile = str(tmpdir.join('data.vrt'))
+    with open(infile, mode = 'wb') as out:
+        out.write(b'<text>\n<sentence>\n')
+        for k in range(3000):
+            if k % 1000 == 500:
+                out.write(b'<!-- #vrt positional-attributes: w l -->\n'
+                          if k < 2000 else
+                          b'<!-- #vrt positional-attributes: w p -->\n')
+            out.write(b'a\tb\tc\n' if k % 3 else b'a\tb\n')
+        out.write(b'</sentence>\n</text>\n')
+    report = validate('--summary', infile)
+    assert b'late field names: w l' in report
+    assert b'different field names: w p' in report
+    assert validate('--jobs=3', '--summary', infile) == report
@@ -633,6 +633,17 @@ class InputProcessor(BasicProcessor):
                   in_as_text=self.OPTIONS.in_as_text,
                   out_as_text=self.OPTIONS.out_as_text)
 
+    def parse_args(self, unparsed_args=None, *, prog=None):
+        """Return the command-line arguments parsed and checked, without
+        running the main method, as when the processor is a stage of
+        another script (vrt-chain). `prog` replaces the program name
+        in messages."""
+        self._get_argparser(inplace=self.OPTIONS.arg_inplace)
+        if prog is not None:
+            self._argparser.prog = self._progname = prog
+        return get_args(self._argparser, unparsed_args=unparsed_args,
+                        argcheck_fn=self.check_args)
+
     def main(self, args, inf, ouf):
         """The actual main method, to be implemented in a subclass.
 
@@ -0,0 +1,194 @@
+# -*- mode: Python; -*-
+
+'''Manifest of a pack of vrt fragments, written by vrt-pack and read
+by vrt-unpack, and the grouping of input for their parallel jobs.
+
+The manifest (manifest.tsv in the top directory of the pack) is a TSV
+file with a head line and a row for each run of fragments of one
+source in one member, in order. A row tells the member (the *.vrf file
+relative to the pack, as packed), the source (the *.vrt file relative
+to the original directory), the ranges of fragment numbers and of the
+bytes, lines and tokens of the source in the run (counting from 0 but
+fragments from 1, end not included, of lines as packed, that is,
+without empty lines), the SHA-1 of the run as packed, and the field
+names in effect at the end of the run.
+
+The sources (sources.tsv in the same directory) is a TSV file with a
+head line and a row for each source, telling its size and modification
+time (in nanoseconds) and the SHA-1 of its content when packed, for
+vrt-pack --update to repack only the sources that have changed.
+
+The grouping functions are also used by vrt-split to plan parts of
+balanced size, and the plan file that vrt-split --plan writes for
+vrt-unsplit (a TSV file with a head line and a row for each run of
+lines that goes to one output file) has the fields in PLAN_FIELDS.
+
+'''
+
+from heapq import heappop, heappush
+import os
+from tempfile import mkstemp
+
+from vrtargslib import BadData
+
+MANIFEST = 'manifest.tsv'
+
+FIELDS = ( 'member', 'source',
+           'fragment_start', 'fragment_end',
+           'byte_start', 'byte_end',
+           'line_start', 'line_end',
+           'token_start', 'token_end',
+           'sha1', 'names' )
+
+SOURCES = 'sources.tsv'
+
+SOURCE_FIELDS = ( 'source', 'size', 'mtime_ns', 'sha1' )
+
+PLAN_FIELDS = ( 'file', 'start', 'lines', 'tokens' )
+
+NUMERIC = frozenset(( 'fragment_start', 'fragment_end',
+                      'byte_start', 'byte_end',
+                      'line_start', 'line_end',
+                      'token_start', 'token_end' ))
+
+def write_manifest(dirname, rows):
+    '''Write the manifest of rows (dicts of FIELDS) in dirname, through
+    a temporary file that is renamed at the end.
+
+    '''
+    fd, temp = mkstemp(dir = dirname, prefix = MANIFEST, suffix = '.tmp')
+    with open(fd, mode = 'w', encoding = 'UTF-8') as out:
+        print(*FIELDS, sep = '\t', file = out)
+        for row in rows:
+            print(*(row[name] for name in FIELDS), sep = '\t', file = out)
+    os.rename(temp, os.path.join(dirname, MANIFEST))
+
+def read_manifest(dirname):
+    '''Return the rows of the manifest in dirname as dicts of FIELDS, or
+    None if there is no manifest.
+
+    '''
+    path = os.path.join(dirname, MANIFEST)
+    if not os.path.exists(path):
+        return None
+
+    rows = []
+    with open(path, encoding = 'UTF-8') as ins:
+        head = ins.readline().rstrip('\n').split('\t')
+        if head != list(FIELDS):
+            raise BadData('not a manifest: {}'.format(path))
+        for k, line in enumerate(ins, start = 2):
+            values = line.rstrip('\n').split('\t')
+            if len(values) != len(FIELDS):
+                raise BadData('bad manifest line {}: {}'.format(k, path))
+            row = dict(zip(FIELDS, values))
+            for name in NUMERIC:
+                row[name] = int(row[name])
+            rows.append(row)
+
+    return rows
+
+def write_sources(dirname, rows):
+    '''Write the sources of rows (dicts of SOURCE_FIELDS) in dirname,
+    through a temporary file that is renamed at the end.
+
+    '''
+    fd, temp = mkstemp(dir = dirname, prefix = SOURCES, suffix = '.tmp')
+    with open(fd, mode = 'w', encoding = 'UTF-8') as out:
+        print(*SOURCE_FIELDS, sep = '\t', file = out)
+        for row in rows:
+            print(*(row[name] for name in SOURCE_FIELDS),
+                  sep = '\t', file = out)
+    os.rename(temp, os.path.join(dirname, SOURCES))
+
+def read_sources(dirname):
+    '''Return the sources in dirname as a dict from source to a dict of
+    SOURCE_FIELDS, or None if there are no sources.
+
+    '''
+    path = os.path.join(dirname, SOURCES)
+    if not os.path.exists(path):
+        return None
+
+    rows = {}
+    with open(path, encoding = 'UTF-8') as ins:
+        head = ins.readline().rstrip('\n').split('\t')
+        if head != list(SOURCE_FIELDS):
+            raise BadData('not a list of sources: {}'.format(path))
+        for k, line in enumerate(ins, start = 2):
+            values = line.rstrip('\n').split('\t')
+            if len(values) != len(SOURCE_FIELDS):
+                raise BadData('bad sources line {}: {}'.format(k, path))
+            row = dict(zip(SOURCE_FIELDS, values))
+            row['size'], row['mtime_ns'] = (int(row['size']),
+                                            int(row['mtime_ns']))
+            rows[row['source']] = row
+
+    return rows
+
+def groups(items, sizes, count):
+    '''Split items (a list) to at most count contiguous groups (lists)
+    of roughly equal total size, given the size of each item.
+
+    '''
+    total = sum(sizes)
+    result, group, size = [], [], 0
+    for item, itemsize in zip(items, sizes):
+        group.append(item)
+        size += itemsize
+        if (len(result) < count - 1 and
+            size * count >= total * (len(result) + 1)):
+            result.append(group)
+            group = []
+    if group:
+        result.append(group)
+    return result
+
+def balanced(sizes, count):
+    '''Return the number (from 0) of the part of each item, assigning
+    the items to count parts of roughly equal total size, given the
+    size of each item: each item in turn from the largest to the part
+    that has the least total size so far (Graham's LPT). Parts are
+    numbered in the order of their first item.
+
+    '''
+    parts = [ None ] * len(sizes)
+    heap = [ (0, part) for part in range(count) ]
+    for k in sorted(range(len(sizes)), key = lambda k: (-sizes[k], k)):
+        size, part = heappop(heap)
+        parts[k] = part
+        heappush(heap, (size + sizes[k], part))
+    return _renumbered(parts)
+
+def contiguous(sizes, count):
+    '''Return the number (from 0) of the part of each item, assigning
+    contiguous runs of the items to at most count parts so that the
+    largest total size of a part is the least possible, given the size
+    of each item.
+
+    '''
+    def fill(limit):
+        parts, part, size = [], 0, 0
+        for itemsize in sizes:
+            if size and size + itemsize > limit:
+                part, size = part + 1, 0
+            parts.append(part)
+            size += itemsize
+        return parts
+
+    if not sizes:
+        return []
+
+    # the least limit for which the runs fit in count parts
+    low, high = max(sizes), sum(sizes)
+    while low < high:
+        middle = (low + high) // 2
+        if fill(middle)[-1] < count:
+            high = middle
+        else:
+            low = middle + 1
+    return fill(low)
+
+def _renumbered(parts):
+    numbers = {}
+    return [ numbers.setdefault(part, len(numbers)) for part in parts ]